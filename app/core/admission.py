@@ -0,0 +1,133 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from typing import Optional
+
+from fastapi import Request
+
+from app.core.exceptions import LengthRequiredError
+from app.core.exceptions import ServiceUnavailableError
+from app.core.metrics import registry
+from app.core.settings import settings
+from app.helpers.rabbit_publisher import RabbitPublisher
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent_uploads: int = settings.admission_max_concurrent_uploads,
+        max_inflight_bytes: int = settings.admission_max_inflight_bytes,
+        max_queue_depth: Optional[int] = settings.admission_max_queue_depth,
+        queue_name: str = settings.admission_queue_name or settings.UPLOAD_ROUTING_KEY,
+        poll_interval: float = settings.admission_queue_poll_interval,
+        retry_after: int = settings.admission_retry_after,
+    ) -> None:
+        """
+        Load shedding for the upload endpoints.
+
+        Each upload takes a slot and reserves its declared ``Content-Length`` from the in-flight
+        byte budget before its body is read. When a limit is exceeded, or the conversion queue is
+        deeper than ``max_queue_depth``, the request is rejected at once with 503 and
+        ``Retry-After``. A request bigger than the whole byte budget is still admitted when no
+        other upload is in flight, so it cannot be starved forever. Uploads without a
+        ``Content-Length`` (chunked transfer) would escape the byte budget and get 411 instead.
+        """
+        self.max_concurrent_uploads = max_concurrent_uploads
+        self.max_inflight_bytes = max_inflight_bytes
+        self.max_queue_depth = max_queue_depth
+        self.queue_name = queue_name
+        self.poll_interval = poll_interval
+        self.retry_after = retry_after
+        self.in_flight_uploads = 0
+        self.in_flight_bytes = 0
+        self.queue_depth: Optional[int] = None
+        self.rejected = 0
+        self._poll_task: Optional[asyncio.Task] = None
+
+    async def start(self, publisher: RabbitPublisher) -> None:
+        if self.max_queue_depth is not None:
+            self._poll_task = asyncio.create_task(self._poll_queue_depth(publisher))
+
+    async def close(self) -> None:
+        if self._poll_task:
+            self._poll_task.cancel()
+            await asyncio.gather(self._poll_task, return_exceptions=True)
+            self._poll_task = None
+
+    @asynccontextmanager
+    async def admit(self, request: Request) -> AsyncIterator[None]:
+        size = self._declared_size(request)
+        self._check(size)
+        self.in_flight_uploads += 1
+        self.in_flight_bytes += size
+        try:
+            yield
+        finally:
+            self.in_flight_uploads -= 1
+            self.in_flight_bytes -= size
+
+    def _check(self, size: int) -> None:
+        if self.in_flight_uploads >= self.max_concurrent_uploads:
+            self._reject("concurrency", "Too many uploads in progress")
+        if self.in_flight_uploads and self.in_flight_bytes + size > self.max_inflight_bytes:
+            self._reject("bytes", "Upload capacity exhausted")
+        if (
+            self.max_queue_depth is not None
+            and self.queue_depth is not None
+            and self.queue_depth > self.max_queue_depth
+        ):
+            self._reject("queue_depth", "Conversion queue is full")
+
+    def _reject(self, limit: str, reason: str) -> None:
+        self.rejected += 1
+        admission_rejections.labels(limit).inc()
+        raise ServiceUnavailableError(
+            detail=f"{reason}, please retry later", headers={"Retry-After": str(self.retry_after)}
+        )
+
+    @staticmethod
+    def _declared_size(request: Request) -> int:
+        # The server never reads more body than Content-Length declares, so the reservation holds.
+        try:
+            size = int(request.headers["content-length"])
+        except (KeyError, ValueError):
+            size = -1
+        if size < 0:
+            raise LengthRequiredError(detail="Uploads must declare their Content-Length")
+        return size
+
+    async def _poll_queue_depth(self, publisher: RabbitPublisher) -> None:
+        while True:
+            try:
+                self.queue_depth = await publisher.queue_depth(self.queue_name)
+            except Exception as error:
+                # An unknown depth must not block uploads: shed only on fresh readings.
+                self.queue_depth = None
+                print(f"Could not read depth of queue {self.queue_name!r}: {error!r}")
+            await asyncio.sleep(self.poll_interval)
+
+
+admission_controller = AdmissionController()
+
+admission_rejections = registry.counter(
+    "gateway_admission_rejections", "Uploads shed with 503, by exceeded limit.", ["limit"]
+)
+registry.gauge(
+    "gateway_uploads_in_flight",
+    "Uploads currently admitted.",
+    function=lambda: {(): admission_controller.in_flight_uploads},
+)
+registry.gauge(
+    "gateway_upload_bytes_in_flight",
+    "Declared bytes of the uploads currently admitted.",
+    function=lambda: {(): admission_controller.in_flight_bytes},
+)
+registry.gauge(
+    "gateway_conversion_queue_depth",
+    "Last conversion queue depth read by admission control, when polling is enabled.",
+    function=lambda: {} if admission_controller.queue_depth is None else {(): admission_controller.queue_depth},
+)
+
+
+def admit_upload(request: Request):
+    return admission_controller.admit(request)
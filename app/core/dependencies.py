@@ -1,21 +1,35 @@
 from typing import Annotated
+from typing import Optional
 
 from aiohttp import ClientSession
 from fastapi import Depends
-from pika.adapters.blocking_connection import BlockingChannel
+from pydantic import EmailStr
 
 from app.core.exceptions import AuthError
 from app.core.http_client import get_async_client
 from app.core.security import JWTBearer
 from app.core.settings import settings
 from app.helpers import AsyncS3Manager
-from app.helpers.rabbit_manager import get_rabbit_channel
+from app.helpers import Outbox
+from app.helpers import RabbitPublisher
+from app.helpers.content_index import ContentIndex
+from app.helpers.content_index import get_content_index
+from app.helpers.download_cache import DownloadCache
+from app.helpers.download_cache import get_download_cache
+from app.helpers.job_index import get_job_index
+from app.helpers.job_index import JobIndex
+from app.helpers.outbox import get_outbox
+from app.helpers.presigned_url_cache import PresignedUrlCache
+from app.helpers.rabbit_publisher import get_rabbit_publisher
+from app.helpers.upload_sessions import get_upload_session_store
+from app.helpers.upload_sessions import UploadSessionStore
 from app.schemas.user_schema import User
 from app.schemas.user_schema import User as UserSchema
 from app.services import AuthService
 from app.services import ConverterService
 
 async_s3 = AsyncS3Manager()
+presigned_url_cache = PresignedUrlCache(async_s3)
 
 
 async def get_current_user(user_credentials: UserSchema = Depends(JWTBearer())) -> UserSchema:
@@ -28,15 +42,52 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     return current_user
 
 
+async def get_own_email(email: EmailStr, current_user: User = Depends(get_current_user)) -> str:
+    """
+    The ``{email}`` path parameter, which must name the caller: uploads are stored, and jobs owned,
+    under the authenticated user's email, never under one picked by the client.
+    """
+    if email.lower() != current_user.email.lower():
+        raise AuthError("Not enough permissions")
+    return current_user.email
+
+
 async def get_auth_service(client: ClientSession = Depends(get_async_client)) -> AuthService:
     return AuthService(client=client)
 
 
-async def get_save_service(channel: BlockingChannel = Depends(get_rabbit_channel)) -> ConverterService:
-    return ConverterService(async_s3, bucket_name=settings.upload_bucket_name, rabbit_channel=channel)
+async def get_save_service(
+    publisher: RabbitPublisher = Depends(get_rabbit_publisher),
+    outbox: Optional[Outbox] = Depends(get_outbox),
+    content_index: Optional[ContentIndex] = Depends(get_content_index),
+    upload_sessions: UploadSessionStore = Depends(get_upload_session_store),
+    job_index: JobIndex = Depends(get_job_index),
+) -> ConverterService:
+    return ConverterService(
+        async_s3,
+        bucket_name=settings.upload_bucket_name,
+        publisher=publisher,
+        outbox=outbox,
+        content_index=content_index,
+        upload_sessions=upload_sessions,
+        job_index=job_index,
+    )
+
+
+async def get_download_service(
+    download_cache: Optional[DownloadCache] = Depends(get_download_cache),
+) -> ConverterService:
+    return ConverterService(
+        async_s3,
+        bucket_name=settings.upload_bucket_name,
+        url_cache=presigned_url_cache,
+        download_cache=download_cache,
+    )
 
 
 AuthServiceDependency = Annotated[AuthService, Depends(get_auth_service)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
+OwnEmail = Annotated[str, Depends(get_own_email)]
 CurrentActiveUser = Annotated[User, Depends(get_current_active_user)]
 SaveBucket = Annotated[ConverterService, Depends(get_save_service)]
+DownloadBucket = Annotated[ConverterService, Depends(get_download_service)]
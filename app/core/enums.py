@@ -6,3 +6,10 @@ class UserRoles(str, Enum):
     MODERATOR = "MODERATOR"
     BASE_USER = "BASE_USER"
     GUEST = "GUEST"
+
+
+class JobStates(str, Enum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
@@ -31,6 +31,31 @@ class DuplicatedError(HTTPException):
         super().__init__(status.HTTP_409_CONFLICT, detail, headers)
 
 
+class PayloadTooLargeError(HTTPException):
+    def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail, headers)
+
+
+class LengthRequiredError(HTTPException):
+    def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(status.HTTP_411_LENGTH_REQUIRED, detail, headers)
+
+
+class TooManyRequestsError(HTTPException):
+    def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(status.HTTP_429_TOO_MANY_REQUESTS, detail, headers)
+
+
+class ServiceUnavailableError(HTTPException):
+    def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(status.HTTP_503_SERVICE_UNAVAILABLE, detail, headers)
+
+
+class GatewayTimeoutError(HTTPException):
+    def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(status.HTTP_504_GATEWAY_TIMEOUT, detail, headers)
+
+
 class InvalidCredentials(HTTPException):
     def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
         super().__init__(status.HTTP_401_UNAUTHORIZED, detail, headers)
@@ -63,3 +88,15 @@ class ObjectDownloadError(HTTPException):
         super().__init__(
             status.HTTP_500_INTERNAL_SERVER_ERROR, detail or "Failed to download object from storage.", headers
         )
+
+
+class PreconditionFailedError(HTTPException):
+    def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(status.HTTP_412_PRECONDITION_FAILED, detail or "Precondition failed.", headers)
+
+
+class RangeNotSatisfiableError(HTTPException):
+    def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(
+            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, detail or "Requested range not satisfiable.", headers
+        )
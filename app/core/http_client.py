@@ -1,6 +1,56 @@
+from typing import Optional
+
 from aiohttp import ClientSession
+from aiohttp import TCPConnector
+
+from app.core.settings import settings
+
+
+class HttpClientManager:
+    def __init__(self) -> None:
+        """Holds the process-wide aiohttp session shared by every outbound HTTP call."""
+        self.session: Optional[ClientSession] = None
+
+    async def init(
+        self,
+        limit: int = settings.http_connection_limit,
+        limit_per_host: int = settings.http_connection_limit_per_host,
+        keepalive_timeout: float = settings.http_keepalive_timeout,
+        ttl_dns_cache: int = settings.http_dns_cache_ttl,
+    ) -> None:
+        """
+        Opens the shared session if it is not already open.
+
+        Args:
+            limit (int): Total number of simultaneous connections.
+            limit_per_host (int): Simultaneous connections to a single host (0 means no limit).
+            keepalive_timeout (float): Seconds an idle connection is kept alive for reuse.
+            ttl_dns_cache (int): Seconds resolved addresses are cached.
+        """
+        if self.session and not self.session.closed:
+            return
+        connector = TCPConnector(
+            limit=limit,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=ttl_dns_cache,
+        )
+        self.session = ClientSession(connector=connector)
+
+    async def close(self) -> None:
+        """Closes the shared session and its pooled connections."""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def get_session(self) -> ClientSession:
+        if not self.session or self.session.closed:
+            await self.init()
+        return self.session  # type: ignore
+
+
+http_client_manager = HttpClientManager()
 
 
 async def get_async_client() -> ClientSession:
-    async with ClientSession() as session:
-        yield session
+    return await http_client_manager.get_session()
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from aiohttp import ClientError
+from aiohttp import ClientSession
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError
+from jose.exceptions import JWTClaimsError
+from jose.exceptions import JWTError
+from pydantic import ValidationError
+
+from app.core.exceptions import AuthError
+from app.core.settings import settings
+from app.schemas.user_schema import User
+
+USER_CLAIMS = ("email", "username", "is_active", "role", "created_at", "updated_at")
+
+
+class LocalTokenVerifier:
+    def __init__(
+        self,
+        enabled: bool = settings.jwt_local_verification,
+        public_key: Optional[str] = settings.jwt_public_key,
+        jwks_url: Optional[str] = settings.jwt_jwks_url,
+        algorithms: List[str] = settings.jwt_algorithms,
+        audience: Optional[str] = settings.jwt_audience,
+        issuer: Optional[str] = settings.jwt_issuer,
+        refresh_interval: float = settings.jwks_refresh_interval,
+    ) -> None:
+        """
+        Verifies tokens in-process against a static public key or a JWKS document.
+
+        ``verify`` returns None whenever the token cannot be settled locally (unknown key or
+        incomplete claims), so callers can fall back to the auth service ``/me`` endpoint.
+        """
+        self.enabled = enabled
+        self.public_key = public_key
+        self.jwks_url = jwks_url
+        self.algorithms = algorithms
+        self.audience = audience
+        self.issuer = issuer
+        self.refresh_interval = refresh_interval
+        self._jwks: Dict[str, dict] = {}
+        self._jwks_fetched_at = 0.0
+        self._session: Optional[ClientSession] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_requested = asyncio.Event()
+
+    async def start(self, session: ClientSession) -> None:
+        if not self.enabled or not self.jwks_url:
+            return
+        self._session = session
+        await self.refresh_jwks()
+        self._refresh_task = asyncio.create_task(self._refresh_periodically())
+
+    async def close(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+        self._refresh_task = None
+        self._session = None
+
+    async def refresh_jwks(self) -> None:
+        if not self._session or not self.jwks_url:
+            return
+        try:
+            async with self._session.get(self.jwks_url) as response:
+                response.raise_for_status()
+                document = await response.json()
+        except (ClientError, asyncio.TimeoutError, ValueError) as error:
+            print(f"Failed to refresh JWKS from {self.jwks_url}: {error!r}")
+            return
+        self._jwks = {key["kid"]: key for key in document.get("keys", []) if "kid" in key}
+        self._jwks_fetched_at = time.monotonic()
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            try:
+                async with asyncio.timeout(self.refresh_interval):
+                    await self._refresh_requested.wait()
+            except TimeoutError:
+                pass
+            self._refresh_requested.clear()
+            await self.refresh_jwks()
+
+    def _key_for(self, header: dict) -> Optional[object]:
+        if self.jwks_url:
+            key = self._jwks.get(header.get("kid", ""))
+            if key is None and time.monotonic() - self._jwks_fetched_at > 30:
+                # Possibly a rotated key: ask the background task for a fresh JWKS document.
+                self._refresh_requested.set()
+            return key
+        return self.public_key
+
+    def verify(self, token: str) -> Optional[User]:
+        if not self.enabled:
+            return None
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError:
+            raise AuthError(detail="Invalid token")
+
+        key = self._key_for(header)
+        if key is None:
+            return None
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=self.algorithms,
+                audience=self.audience,
+                issuer=self.issuer,
+                options={"verify_aud": self.audience is not None},
+            )
+        except ExpiredSignatureError:
+            raise AuthError(detail="Token has expired")
+        except JWTClaimsError:
+            raise AuthError(detail="Invalid token claims")
+        except JWTError:
+            raise AuthError(detail="Invalid token")
+
+        return self._user_from_claims(claims)
+
+    @staticmethod
+    def _user_from_claims(claims: dict) -> Optional[User]:
+        user_id = claims.get("id", claims.get("sub"))
+        if user_id is None or any(claim not in claims for claim in USER_CLAIMS):
+            return None
+        try:
+            return User(id=user_id, **{claim: claims[claim] for claim in USER_CLAIMS})
+        except ValidationError:
+            return None
+
+
+token_verifier = LocalTokenVerifier()
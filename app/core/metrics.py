@@ -0,0 +1,276 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}", *self._samples()]
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    type_name = "counter"
+    _new_child = _CounterChild
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            yield f"{self.name}_total{_format_labels(self.labelnames, values)} {_format_value(child.value)}"  # type: ignore
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    @contextmanager
+    def track_inprogress(self) -> Iterator[None]:
+        self.value += 1
+        try:
+            yield
+        finally:
+            self.value -= 1
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+    _new_child = _GaugeChild
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None,
+    ) -> None:
+        """``function``, when given, is called at scrape time and returns the value for each label set."""
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def _samples(self) -> Iterator[str]:
+        values = self.function() if self.function else {key: child.value for key, child in self._children.items()}  # type: ignore
+        for labels, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "bucket_counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]) -> None:
+        self.upper_bounds = upper_bounds
+        self.bucket_counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.upper_bounds)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip((*self.upper_bounds, float("inf")), child.bucket_counts):  # type: ignore
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"  # type: ignore
+            yield f"{self.name}_count{labels} {child.count}"  # type: ignore
+
+
+class Registry:
+    def __init__(self) -> None:
+        """
+        Minimal in-process metrics registry rendered in the Prometheus text format.
+
+        Recording is a dict lookup plus a few float operations on the event loop thread, so it
+        is cheap enough for the hot path. Label sets should stay small and bounded (stage names,
+        dependency names, route templates), never user input.
+        """
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))  # type: ignore
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), function=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))  # type: ignore
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))  # type: ignore
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+stage_duration = registry.histogram(
+    "gateway_stage_duration_seconds", "Time spent in each stage of request handling.", ["stage"]
+)
+outbound_duration = registry.histogram(
+    "gateway_outbound_duration_seconds", "Duration of calls to downstream dependencies.", ["dependency", "operation"]
+)
+outbound_requests = registry.counter(
+    "gateway_outbound_requests", "Calls made to downstream dependencies.", ["dependency", "operation"]
+)
+outbound_errors = registry.counter(
+    "gateway_outbound_errors", "Failed calls to downstream dependencies.", ["dependency", "operation"]
+)
+transferred_bytes = registry.counter("gateway_transferred_bytes", "Payload bytes moved, by direction.", ["direction"])
+requests_in_flight = registry.gauge("gateway_requests_in_flight", "Requests currently being handled.")
+request_duration = registry.histogram(
+    "gateway_request_duration_seconds", "Duration of HTTP requests.", ["method", "route", "status"]
+)
+
+
+@contextmanager
+def track_outbound(dependency: str, operation: str) -> Iterator[None]:
+    """Counts and times one call to a downstream dependency, counting it as an error if it raises."""
+    outbound_requests.labels(dependency, operation).inc()
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        outbound_errors.labels(dependency, operation).inc()
+        raise
+    finally:
+        outbound_duration.labels(dependency, operation).observe(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        """Tracks in-flight requests and request duration by route template."""
+        self.app = app
+        self._in_flight = requests_in_flight.labels()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        self._in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self._in_flight.dec()
+            route = scope.get("route")
+            request_duration.labels(
+                scope["method"], route.path if route is not None else "unmatched", str(status)
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,247 @@
+import asyncio
+import math
+import random
+import time
+from functools import partial
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import TypeVar
+
+from aiohttp import ClientError as HTTPClientError
+from botocore.exceptions import ClientError as S3ClientError
+from botocore.exceptions import ConnectionError as S3ConnectionError
+from botocore.exceptions import HTTPClientError as S3HTTPClientError
+
+from app.core.exceptions import GatewayTimeoutError
+from app.core.exceptions import ServiceUnavailableError
+from app.core.metrics import registry
+from app.core.metrics import track_outbound
+from app.core.settings import settings
+
+T = TypeVar("T")
+
+RETRYABLE_S3_CODES = ("SlowDown", "Throttling", "RequestTimeout", "InternalError", "ServiceUnavailable")
+
+outbound_retries = registry.counter(
+    "gateway_outbound_retries", "Calls to downstream dependencies that were retried.", ["dependency", "operation"]
+)
+outbound_hedges = registry.counter(
+    "gateway_outbound_hedges", "Hedged requests sent to downstream dependencies.", ["dependency", "operation"]
+)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = settings.circuit_failure_threshold,
+        reset_timeout: float = settings.circuit_reset_timeout,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Fails calls fast while a dependency is unhealthy.
+
+        After ``failure_threshold`` consecutive failures the circuit opens and calls are rejected
+        with 503 without touching the dependency. Once ``reset_timeout`` has passed, a single probe
+        call is let through: its success closes the circuit, its failure opens it again.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._clock = clock
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return
+        retry_after = max(1, math.ceil(self.opened_at + self.reset_timeout - self._clock()))  # type: ignore
+        raise ServiceUnavailableError(
+            detail=f"{self.name} is temporarily unavailable", headers={"Retry-After": str(retry_after)}
+        )
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = self._clock()
+        self._probing = False
+
+    def release(self) -> None:
+        """Ends a call that was cancelled before its outcome was known."""
+        self._probing = False
+
+
+class OutboundPolicy:
+    def __init__(
+        self,
+        dependency: str,
+        timeout: Optional[float],
+        is_failure: Callable[[BaseException], bool],
+        retries: int = settings.outbound_retries,
+        backoff: float = settings.outbound_retry_backoff,
+        backoff_max: float = settings.outbound_retry_backoff_max,
+        hedge_delay: Optional[float] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        """
+        Deadline, retry, hedging and circuit-breaking rules for calls to one dependency.
+
+        Args:
+            dependency (str): Name used in errors and metrics.
+            timeout (Optional[float]): Deadline for the whole call, retries included; None disables it.
+            is_failure (Callable): Tells dependency failures (retried, counted by the breaker) apart
+                from ordinary error responses such as 404. Timeouts are always failures.
+            retries (int): Extra attempts for idempotent calls, with full-jitter exponential backoff.
+            backoff (float): Base backoff in seconds.
+            backoff_max (float): Cap on a single backoff.
+            hedge_delay (Optional[float]): When set, hedgeable calls still running after this many
+                seconds get a second identical request and the first success wins.
+            breaker (Optional[CircuitBreaker]): Defaults to a breaker with the configured thresholds.
+        """
+        self.dependency = dependency
+        self.timeout = timeout
+        self.is_failure = is_failure
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.hedge_delay = hedge_delay
+        self.breaker = breaker or CircuitBreaker(dependency)
+
+    async def call(
+        self,
+        operation: str,
+        func: Callable[[], Awaitable[T]],
+        idempotent: bool = False,
+        hedge: bool = False,
+        discard: Optional[Callable[[T], Any]] = None,
+    ) -> T:
+        """
+        Runs ``func`` under this policy.
+
+        Only ``idempotent`` calls are retried, and only hedgeable calls are hedged; ``discard``
+        releases the result of a hedged attempt that lost the race (e.g. closes a response body).
+        Raises 503 while the circuit is open and 504 when the deadline passes.
+        """
+        self.breaker.before_call()
+        try:
+            async with asyncio.timeout(self.timeout) as deadline:
+                result = await self._call_with_retries(operation, func, idempotent, hedge, discard)
+        except Exception as error:
+            if self._failed(error):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            if isinstance(error, TimeoutError) and deadline.expired():
+                raise GatewayTimeoutError(detail=f"{self.dependency} did not respond in time") from error
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _failed(self, error: BaseException) -> bool:
+        return isinstance(error, TimeoutError) or self.is_failure(error)
+
+    async def _call_with_retries(
+        self,
+        operation: str,
+        func: Callable[[], Awaitable[T]],
+        idempotent: bool,
+        hedge: bool,
+        discard: Optional[Callable[[T], Any]],
+    ) -> T:
+        attempts = self.retries + 1 if idempotent else 1
+        for attempt in range(attempts):
+            try:
+                if hedge and self.hedge_delay is not None:
+                    return await self._hedged(operation, func, discard)
+                return await self._attempt(operation, func)
+            except Exception as error:
+                if attempt + 1 == attempts or not self._failed(error):
+                    raise
+            outbound_retries.labels(self.dependency, operation).inc()
+            await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff * 2**attempt)))
+        raise AssertionError("unreachable")
+
+    async def _attempt(self, operation: str, func: Callable[[], Awaitable[T]]) -> T:
+        with track_outbound(self.dependency, operation):
+            return await func()
+
+    async def _hedged(
+        self, operation: str, func: Callable[[], Awaitable[T]], discard: Optional[Callable[[T], Any]]
+    ) -> T:
+        tasks: List[asyncio.Future] = [asyncio.ensure_future(self._attempt(operation, func))]
+        winner: Optional[asyncio.Future] = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay)
+            if not done:
+                outbound_hedges.labels(self.dependency, operation).inc()
+                tasks.append(asyncio.ensure_future(self._attempt(operation, func)))
+            pending = set(tasks)
+            failure: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        return task.result()
+                    failure = failure or task.exception()
+            raise failure  # type: ignore
+        finally:
+            for task in tasks:
+                if task is not winner:
+                    task.cancel()
+                    task.add_done_callback(partial(_discard_result, discard))
+
+
+def _discard_result(discard: Optional[Callable[[Any], Any]], task: asyncio.Future) -> None:
+    if task.cancelled() or task.exception() is not None:
+        return
+    if discard is not None:
+        discard(task.result())
+
+
+def _is_auth_failure(error: BaseException) -> bool:
+    return isinstance(error, HTTPClientError)
+
+
+def _is_s3_failure(error: BaseException) -> bool:
+    if isinstance(error, S3ClientError):
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        return status >= 500 or status == 429 or error.response.get("Error", {}).get("Code") in RETRYABLE_S3_CODES
+    return isinstance(error, (S3ConnectionError, S3HTTPClientError, HTTPClientError))
+
+
+auth_policy = OutboundPolicy("auth", settings.auth_timeout, _is_auth_failure, hedge_delay=settings.auth_hedge_delay)
+s3_policy = OutboundPolicy("s3", settings.s3_call_timeout, _is_s3_failure, hedge_delay=settings.s3_hedge_delay)
+
+registry.gauge(
+    "gateway_circuit_open",
+    "1 while calls to a dependency are being failed fast.",
+    ["dependency"],
+    function=lambda: {
+        (policy.dependency,): float(policy.breaker.state == "open") for policy in (auth_policy, s3_policy)
+    },
+)
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import sys
+import threading
+from collections import Counter
+from types import CodeType
+from types import FrameType
+from typing import Dict
+from typing import Optional
+from uuid import uuid4
+
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from app.core.cache import TTLCache
+from app.core.exceptions import DuplicatedError
+from app.core.settings import settings
+
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+class SamplingProfiler:
+    def __init__(
+        self,
+        interval: float = settings.profiler_interval,
+        max_duration: float = settings.profiler_max_seconds,
+        result_cache_size: int = settings.profiler_result_cache_size,
+        result_ttl: float = settings.profiler_result_ttl,
+    ) -> None:
+        """
+        Statistical profiler for a live worker.
+
+        A daemon thread wakes up every ``interval`` seconds and records the Python stack of the
+        event loop thread (or of every thread). Nothing is hooked into the interpreter, so the
+        overhead is one stack walk per sample and the profiled code runs unmodified. Stacks are
+        returned in the collapsed format read by flamegraph.pl, speedscope and similar tools:
+        one ``frame;frame;frame count`` line per distinct stack. Only one profile runs at a time.
+        """
+        self.interval = interval
+        self.max_duration = max_duration
+        self.results: TTLCache[str, str] = TTLCache(result_cache_size)
+        self.result_ttl = result_ttl
+        self._running = False
+        self._frame_names: Dict[CodeType, str] = {}
+        self._path_prefixes = sorted((path for path in sys.path if path), key=len, reverse=True)
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    async def profile(self, seconds: float, interval: Optional[float] = None, all_threads: bool = False) -> str:
+        """Samples the worker for ``seconds`` and returns the collapsed stacks."""
+        sampler = self.start(interval, threads=None if all_threads else {threading.get_ident()})
+        try:
+            await asyncio.sleep(min(seconds, self.max_duration))
+        finally:
+            samples = await sampler.finish()
+        return self.collapse(samples)
+
+    def start(
+        self, interval: Optional[float] = None, threads: Optional[set] = None, task: Optional[asyncio.Task] = None
+    ) -> "_Sampler":
+        """Starts sampling ``threads`` (all when None), keeping only samples taken while ``task`` runs."""
+        if self._running:
+            raise DuplicatedError(detail="A profile is already running")
+        self._running = True
+        sampler = _Sampler(self, interval or self.interval, threads, task)
+        sampler.start()
+        return sampler
+
+    def collapse(self, samples: Counter) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+    def stack_of(self, frame: Optional[FrameType]) -> str:
+        names = []
+        while frame is not None:
+            names.append(self._frame_name(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _frame_name(self, code: CodeType) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            filename = code.co_filename
+            for prefix in self._path_prefixes:
+                if filename.startswith(prefix):
+                    filename = filename[len(prefix) :].lstrip(os.sep)
+                    break
+            name = self._frame_names[code] = f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+        return name
+
+
+class _Sampler(threading.Thread):
+    def __init__(
+        self, profiler: SamplingProfiler, interval: float, threads: Optional[set], task: Optional[asyncio.Task]
+    ) -> None:
+        super().__init__(name="sampling-profiler", daemon=True)
+        self.profiler = profiler
+        self.stop_event = threading.Event()
+        self.interval = interval
+        self.threads = threads
+        self.task = task
+        self.loop = task.get_loop() if task else None
+        self.samples: Counter = Counter()
+
+    def run(self) -> None:
+        own_thread = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            if self.task is not None and asyncio.current_task(self.loop) is not self.task:
+                continue  # the loop is running some other request right now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread or (self.threads is not None and thread_id not in self.threads):
+                    continue
+                self.samples[self.profiler.stack_of(frame)] += 1
+
+    async def finish(self) -> Counter:
+        self.stop_event.set()
+        await asyncio.to_thread(self.join)
+        self.profiler._running = False
+        return self.samples
+
+
+class RequestProfilerMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        profiler: SamplingProfiler,
+        trigger_header: str = settings.profiler_trigger_header,
+        trigger_token: Optional[str] = settings.profiler_trigger_token,
+    ) -> None:
+        """
+        Profiles a single request when it carries ``trigger_header`` set to ``trigger_token``.
+
+        Only samples taken while the loop is running that request's task are kept, so work done
+        for concurrent requests is excluded (as is work in tasks the request spawns). The
+        response gets an ``X-Profile-Id`` header; the stacks are kept for a while and can be
+        fetched by an admin from ``/v1/admin/profile/requests/{profile_id}``.
+        """
+        self.app = app
+        self.profiler = profiler
+        self.trigger_header = trigger_header.lower().encode()
+        self.trigger_token = trigger_token.encode() if trigger_token else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._triggered(scope) or self.profiler.is_running:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (PROFILE_ID_HEADER.encode(), profile_id.encode())]
+            await send(message)
+
+        sampler = self.profiler.start(threads={threading.get_ident()}, task=asyncio.current_task())
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            samples = await sampler.finish()
+            self.profiler.results.set(profile_id, self.profiler.collapse(samples), self.profiler.result_ttl)
+
+    def _triggered(self, scope: Scope) -> bool:
+        if self.trigger_token is None:
+            return False
+        return any(name == self.trigger_header and value == self.trigger_token for name, value in scope["headers"])
+
+
+profiler = SamplingProfiler()
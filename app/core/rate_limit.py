@@ -0,0 +1,178 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Callable
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from app.core.enums import UserRoles
+from app.core.exceptions import TooManyRequestsError
+from app.core.jwt_verifier import token_verifier
+from app.core.metrics import registry
+from app.core.security import VERIFIED_USER_STATE
+from app.core.settings import settings
+from app.core.token_cache import token_cache
+from app.schemas.user_schema import User
+
+rate_limited_requests = registry.counter(
+    "gateway_rate_limited_requests", "Requests rejected with 429, by user role.", ["role"]
+)
+
+
+class RateLimitRule(NamedTuple):
+    rate: float
+    burst: int
+
+
+DEFAULT_RULES = {
+    UserRoles.ADMIN: RateLimitRule(settings.rate_limit_admin_rate, settings.rate_limit_admin_burst),
+    UserRoles.MODERATOR: RateLimitRule(settings.rate_limit_moderator_rate, settings.rate_limit_moderator_burst),
+    UserRoles.BASE_USER: RateLimitRule(settings.rate_limit_base_user_rate, settings.rate_limit_base_user_burst),
+    UserRoles.GUEST: RateLimitRule(settings.rate_limit_guest_rate, settings.rate_limit_guest_burst),
+}
+
+
+class _Bucket:
+    __slots__ = ("rule", "tokens", "updated_at")
+
+    def __init__(self, rule: RateLimitRule, now: float) -> None:
+        self.rule = rule
+        self.tokens = float(rule.burst)
+        self.updated_at = now
+
+    def is_full_at(self, now: float) -> bool:
+        return self.tokens + (now - self.updated_at) * self.rule.rate >= self.rule.burst
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        rules: Dict[UserRoles, RateLimitRule] = DEFAULT_RULES,
+        max_users: int = settings.rate_limit_max_users,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        In-process token buckets, one per user, refilled at the rate of the user's role.
+
+        A user may send ``burst`` requests at once and ``rate`` requests per second after that.
+        Buckets are kept in least-recently-used order: a bucket that has refilled completely
+        holds no state worth keeping, so the idle ones at the front are dropped as new requests
+        arrive, and at most ``max_users`` buckets are kept in any case. Every check is O(1)
+        amortized. Each worker process has its own buckets.
+        """
+        self.rules = rules
+        self.max_users = max_users
+        self._clock = clock
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+
+    def take(self, user_id: str, role: UserRoles) -> Optional[float]:
+        """Spends one request of the user's budget; returns None if allowed, else seconds until the next one."""
+        rule = self.rules.get(role)
+        if rule is None:
+            return None
+        now = self._clock()
+        self._evict_idle(now)
+
+        bucket = self._buckets.get(user_id)
+        if bucket is None or bucket.rule != rule:
+            bucket = self._buckets[user_id] = _Bucket(rule, now)
+            if len(self._buckets) > self.max_users:
+                self._buckets.popitem(last=False)
+        else:
+            bucket.tokens = min(rule.burst, bucket.tokens + (now - bucket.updated_at) * rule.rate)
+            bucket.updated_at = now
+        self._buckets.move_to_end(user_id)
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return None
+        return (1 - bucket.tokens) / rule.rate
+
+    def _evict_idle(self, now: float) -> None:
+        while self._buckets:
+            user_id, oldest = next(iter(self._buckets.items()))
+            if not oldest.is_full_at(now):
+                return
+            del self._buckets[user_id]
+
+    def rejection(self, role: UserRoles, retry_after: float) -> TooManyRequestsError:
+        seconds = str(max(1, math.ceil(retry_after)))
+        return TooManyRequestsError(
+            detail="Too many requests, please retry later",
+            headers={
+                "Retry-After": seconds,
+                "RateLimit-Limit": str(self.rules[role].burst),
+                "RateLimit-Remaining": "0",
+                "RateLimit-Reset": seconds,
+            },
+        )
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def identify_user(token: str) -> Optional[User]:
+    """
+    The user behind an already verified token, or None.
+
+    Only tokens verified locally or found in the token cache are trusted. Unverified claims are
+    never used: a forged token naming someone else would otherwise drain that user's budget.
+    """
+    try:
+        user = token_verifier.verify(token)
+    except HTTPException:
+        return None
+    return user or token_cache.peek(token)
+
+
+class RateLimitMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: RateLimiter,
+        identify: Callable[[str], Optional[User]] = identify_user,
+    ) -> None:
+        """
+        Rejects requests over their user's rate limit with 429 before routing or reading the body.
+
+        Requests without a bearer token, or whose token has not been verified yet, pass through
+        unlimited; authentication still runs for them in the endpoint as usual. An identified user
+        is kept in the request state, so ``JWTBearer`` does not verify the same token again.
+        """
+        self.app = app
+        self.limiter = limiter
+        self.identify = identify
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        token = _bearer_token(scope) if scope["type"] == "http" else None
+        user = self.identify(token) if token else None
+        if user is not None:
+            scope.setdefault("state", {})[VERIFIED_USER_STATE] = user
+        retry_after = self.limiter.take(str(user.id), user.role) if user else None
+        if retry_after is None:
+            await self.app(scope, receive, send)
+            return
+
+        rate_limited_requests.labels(user.role.value).inc()  # type: ignore
+        error = self.limiter.rejection(user.role, retry_after)  # type: ignore
+        response = JSONResponse({"detail": error.detail}, status_code=error.status_code, headers=error.headers)
+        await response(scope, receive, send)
+
+
+def _bearer_token(scope: Scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return (token.strip() or None) if scheme.lower() == "bearer" else None
+    return None
+
+
+rate_limiter = RateLimiter()
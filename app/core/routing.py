@@ -0,0 +1,50 @@
+from contextlib import AsyncExitStack
+from typing import AsyncContextManager
+from typing import Callable
+from typing import Sequence
+
+from fastapi import params
+from fastapi import Request
+from fastapi.routing import APIRoute
+
+from app.core.metrics import stage_duration
+
+RequestGuard = Callable[[Request], AsyncContextManager]
+
+
+def guarded_by(*guards: RequestGuard):
+    """
+    Attaches request guards to an endpoint served by ``GatewayRoute``.
+
+    Guards run before FastAPI reads the request body or resolves dependencies, and stay
+    entered until the endpoint returns, so they can reject a request cheaply or hold a
+    resource for its whole duration.
+    """
+
+    def decorator(func):
+        func.__request_guards__ = (*getattr(func, "__request_guards__", ()), *guards)
+        return func
+
+    return decorator
+
+
+class GatewayRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        guards: Sequence[RequestGuard] = getattr(self.endpoint, "__request_guards__", ())
+        is_body_form = self.body_field is not None and isinstance(self.body_field.field_info, params.Form)
+        if not guards and not is_body_form:
+            return handler
+        body_parse = stage_duration.labels("body_parse")
+
+        async def gateway_handler(request: Request):
+            async with AsyncExitStack() as stack:
+                for guard in guards:
+                    await stack.enter_async_context(guard(request))
+                if is_body_form:
+                    # Parsed forms are cached on the request, so FastAPI reuses this one.
+                    with body_parse.time():
+                        await request.form()
+                return await handler(request)
+
+        return gateway_handler
@@ -2,7 +2,8 @@ from functools import wraps
 from typing import List
 
 from aiohttp import ClientSession
-from aiohttp.client_exceptions import ClientConnectionError
+from aiohttp.client_exceptions import ClientError
+from fastapi import Depends
 from fastapi import Request
 from fastapi.security import HTTPAuthorizationCredentials
 from fastapi.security import HTTPBearer
@@ -10,10 +11,16 @@ from fastapi.security import HTTPBearer
 from app.core.exceptions import AuthError
 from app.core.exceptions import BadRequestError
 from app.core.http_client import get_async_client
-from app.core.settings import Settings
+from app.core.jwt_verifier import token_verifier
+from app.core.metrics import stage_duration
+from app.core.outbound import auth_policy
+from app.core.settings import settings
+from app.core.token_cache import token_cache
 from app.schemas.user_schema import User as UserSchema
 
-settings = Settings()
+
+# Request state attribute holding a user the rate limiter already identified from this request's token.
+VERIFIED_USER_STATE = "verified_user"
 
 
 def authorize(role: List[str], allow_same_id: bool = False):
@@ -40,8 +47,14 @@ class JWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
         super().__init__(auto_error=auto_error)
 
-    async def __call__(self, request: Request) -> UserSchema | None:  # type: ignore
-        credentials: HTTPAuthorizationCredentials = await super().__call__(request)
+    async def __call__(  # type: ignore
+        self, request: Request, client: ClientSession = Depends(get_async_client)
+    ) -> UserSchema | None:
+        with stage_duration.labels("auth").time():
+            return await self._authenticate(request, client)
+
+    async def _authenticate(self, request: Request, client: ClientSession) -> UserSchema:
+        credentials: HTTPAuthorizationCredentials = await super().__call__(request)  # type: ignore
 
         if not credentials:
             raise AuthError(detail="Invalid authorization code")
@@ -49,22 +62,30 @@ class JWTBearer(HTTPBearer):
         if credentials.scheme != "Bearer":
             raise AuthError(detail="Invalid authentication scheme")
 
-        async for client in get_async_client():
-            status_code, data = await self.get_data_from_token(credentials.credentials, client)
-            if status_code != 200:
-                raise AuthError(detail=data["detail"])
-            return data
+        user = getattr(request.state, VERIFIED_USER_STATE, None) or token_verifier.verify(credentials.credentials)
+        if user is not None:
+            return user
+
+        async def load_user() -> UserSchema:
+            _, user = await self.get_data_from_token(credentials.credentials, client)
+            return user
+
+        return await token_cache.get_or_load(credentials.credentials, load_user)
 
     async def get_data_from_token(self, token: str, client: ClientSession) -> tuple[int, UserSchema]:
         token = f"Bearer {token}"
 
-        try:
+        async def fetch_user() -> tuple[int, dict]:
             async with client.get(f"{settings.AUTH_SERVICE_URL}/me", headers={"Authorization": token}) as response:
-                status_code = response.status
-                data = await response.json()
-                if status_code != 200:
-                    raise AuthError(detail=data["detail"])
+                if response.status >= 500:
+                    response.raise_for_status()
+                return response.status, await response.json()
 
-                return status_code, UserSchema(**data)
-        except ClientConnectionError as _:
+        try:
+            status_code, data = await auth_policy.call("me", fetch_user, idempotent=True, hedge=True)
+        except ClientError as _:
             raise BadRequestError(detail="Auth Service not available")
+        if status_code != 200:
+            raise AuthError(detail=data["detail"])
+
+        return status_code, UserSchema(**data)
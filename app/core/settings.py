@@ -1,32 +1,132 @@
 from os import getenv
+from typing import List
 from typing import Optional
 
-from dotenv import load_dotenv
+from pydantic import Field
 from pydantic_settings import BaseSettings
 from pydantic_settings import SettingsConfigDict
 
-load_dotenv()
-
-env_path = None if bool(getenv("is_prod", default=False)) else "dev.env"
+# A local .env overrides the development defaults in dev.env; real environment variables win over both.
+env_path = ".env" if bool(getenv("is_prod", default=False)) else ("dev.env", ".env")
 
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=env_path, env_file_encoding="utf-8")
 
+    server_host: str = "0.0.0.0"
+    server_port: int = 5555
+    server_workers: int = Field(default=1, ge=1)
+    server_graceful_shutdown_timeout: float = Field(default=60.0, gt=0)
+
     AUTH_SERVICE_URL: str
+    http_connection_limit: int = Field(default=100, ge=0)
+    http_connection_limit_per_host: int = Field(default=50, ge=0)
+    http_keepalive_timeout: float = 30.0
+    http_dns_cache_ttl: int = 300
+    auth_timeout: Optional[float] = Field(default=5.0, gt=0)
+    auth_hedge_delay: Optional[float] = Field(default=None, gt=0)
+    outbound_retries: int = Field(default=2, ge=0)
+    outbound_retry_backoff: float = Field(default=0.05, gt=0)
+    outbound_retry_backoff_max: float = Field(default=1.0, gt=0)
+    circuit_failure_threshold: int = Field(default=5, ge=1)
+    circuit_reset_timeout: float = Field(default=30.0, gt=0)
+    token_cache_max_entries: int = Field(default=10_000, ge=0)
+    token_cache_ttl: float = 60.0
+    token_cache_shared_path: Optional[str] = None
+    token_cache_shared_slots: int = Field(default=8192, ge=1)
+    token_cache_shared_slot_size: int = Field(default=1024, ge=128)
+
+    rate_limit_enabled: bool = False
+    rate_limit_max_users: int = Field(default=100_000, ge=1)
+    rate_limit_admin_rate: float = Field(default=50.0, gt=0)
+    rate_limit_admin_burst: int = Field(default=100, ge=1)
+    rate_limit_moderator_rate: float = Field(default=20.0, gt=0)
+    rate_limit_moderator_burst: int = Field(default=40, ge=1)
+    rate_limit_base_user_rate: float = Field(default=10.0, gt=0)
+    rate_limit_base_user_burst: int = Field(default=20, ge=1)
+    rate_limit_guest_rate: float = Field(default=1.0, gt=0)
+    rate_limit_guest_burst: int = Field(default=5, ge=1)
+
+    jwt_local_verification: bool = False
+    jwt_public_key: Optional[str] = None
+    jwt_jwks_url: Optional[str] = None
+    jwt_algorithms: List[str] = ["RS256"]
+    jwt_audience: Optional[str] = None
+    jwt_issuer: Optional[str] = None
+    jwks_refresh_interval: float = 300.0
     is_prod: bool
+    metrics_enabled: bool = True
+    profiler_interval: float = Field(default=0.005, gt=0)
+    profiler_max_seconds: float = Field(default=60.0, gt=0)
+    profiler_result_cache_size: int = Field(default=32, ge=0)
+    profiler_result_ttl: float = Field(default=600.0, gt=0)
+    profiler_trigger_header: str = "X-Profile-Request"
+    profiler_trigger_token: Optional[str] = None
     upload_bucket_name: str
 
     s3_endpoint: str
     s3_access_key: str
     s3_secret_key: str
+    s3_max_pool_connections: int = Field(default=50, ge=1)
+    s3_connect_timeout: float = 5.0
+    s3_read_timeout: float = 60.0
+    s3_keepalive_timeout: float = 30.0
+    s3_tcp_keepalive: bool = True
+    s3_call_timeout: Optional[float] = Field(default=60.0, gt=0)
+    s3_hedge_delay: Optional[float] = Field(default=None, gt=0)
+    s3_multipart_part_size: int = Field(default=8 * 1024 * 1024, ge=5 * 1024 * 1024)
+    s3_multipart_concurrency: int = Field(default=4, ge=1)
+    upload_batch_max_files: int = Field(default=50, ge=1)
+    upload_batch_concurrency: int = Field(default=4, ge=1)
+    upload_read_chunk_size: int = Field(default=1024 * 1024, ge=1)
+    download_chunk_size: int = Field(default=256 * 1024, ge=1)
+    presigned_url_expiration: int = Field(default=3600, ge=1)
+    presigned_url_cache_size: int = Field(default=10_000, ge=0)
+    presigned_url_refresh_margin: int = Field(default=300, ge=0)
+    download_redirect: bool = False
+    user_files_prefix: str = "{email}/"
+    file_list_page_size: int = Field(default=100, ge=1, le=1000)
+    download_cache_dir: Optional[str] = None
+    download_cache_max_bytes: int = Field(default=2 * 1024 * 1024 * 1024, ge=1)
+    download_cache_max_object_size: int = Field(default=256 * 1024 * 1024, ge=1)
+    download_cache_revalidate_after: float = Field(default=5.0, ge=0)
+    upload_session_path: str = "upload_sessions.sqlite3"
+    upload_session_max_chunk_size: int = Field(default=32 * 1024 * 1024, ge=5 * 1024 * 1024)
+    upload_session_ttl: float = Field(default=24 * 60 * 60, gt=0)
+    upload_session_janitor_interval: float = Field(default=300.0, gt=0)
+    admission_max_concurrent_uploads: int = Field(default=64, ge=1)
+    admission_max_inflight_bytes: int = Field(default=2 * 1024 * 1024 * 1024, ge=1)
+    admission_max_queue_depth: Optional[int] = Field(default=None, ge=0)
+    admission_queue_name: Optional[str] = None
+    admission_queue_poll_interval: float = Field(default=5.0, gt=0)
+    admission_retry_after: int = Field(default=5, ge=1)
+    content_dedup_enabled: bool = True
+    content_index_max_entries: int = Field(default=50_000, ge=0)
+    content_index_rebuild_concurrency: int = Field(default=16, ge=1)
+    job_status_exchange: Optional[str] = None
+    job_index_max_entries: int = Field(default=100_000, ge=0)
+    job_index_ttl: float = Field(default=24 * 60 * 60, gt=0)
+    job_events_heartbeat: float = Field(default=15.0, gt=0)
 
     RABBIT_URL: str
+    RABBIT_PORT: int = 5672
     RABBITMQ_USER: str
     RABBITMQ_PASS: str
+    rabbit_heartbeat: int = 30
+    rabbit_channel_pool_size: int = Field(default=4, ge=1)
+    rabbit_confirm_timeout: float = 10.0
+    rabbit_reconnect_delay: float = 5.0
 
     UPLOAD_ROUTING_KEY: str
     UPLOAD_EXCHANGE: Optional[str] = ""
 
+    outbox_enabled: bool = True
+    outbox_path: str = "outbox.sqlite3"
+    outbox_batch_size: int = Field(default=100, ge=1)
+    outbox_poll_interval: float = 1.0
+    outbox_retry_delay: float = 5.0
+    outbox_claim_lease: float = 60.0
+    outbox_retention: float = 24 * 60 * 60
+
 
 settings = Settings()
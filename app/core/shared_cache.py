@@ -0,0 +1,89 @@
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+MAGIC = b"GWTC"
+LAYOUT_VERSION = 1
+HEADER = struct.Struct("<4sIII")
+SLOT_HEADER = struct.Struct("<IId32s")
+
+
+class SharedTokenStore:
+    def __init__(self, path: str, slots: int, slot_size: int) -> None:
+        """
+        Fixed-size cache shared by every worker process through a memory-mapped file.
+
+        Keys are SHA-256 digests; each key maps to exactly one slot (a direct-mapped cache), so
+        a colliding write simply evicts the previous entry. There is no cross-process lock:
+        every slot carries a CRC of its contents and a torn or half-written slot reads as a
+        miss. Values larger than a slot are not stored. Put the file on a tmpfs such as
+        ``/dev/shm`` so it never touches the disk. Where ``fcntl`` is missing (Windows) the store
+        never opens and every lookup misses, so each worker keeps only its own cache.
+        """
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.capacity = slot_size - SLOT_HEADER.size
+        self._map: Optional[mmap.mmap] = None
+
+    def open(self) -> None:
+        if self._map is not None or fcntl is None:
+            return
+        size = HEADER.size + self.slots * self.slot_size
+        header = HEADER.pack(MAGIC, LAYOUT_VERSION, self.slots, self.slot_size)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size != size or os.pread(fd, HEADER.size, 0) != header:
+                # First worker to start, or a layout from another configuration: start empty.
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, header, 0)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            # mmap keeps a duplicate of the descriptor, which would otherwise keep the lock held.
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _offset(self, digest: bytes) -> int:
+        return HEADER.size + int.from_bytes(digest[:8], "little") % self.slots * self.slot_size
+
+    def get(self, digest: bytes) -> Optional[bytes]:
+        if self._map is None:
+            return None
+        offset = self._offset(digest)
+        slot = self._map[offset : offset + self.slot_size]
+        checksum, length, expires_at, key = SLOT_HEADER.unpack_from(slot)
+        if key != digest or length > self.capacity or expires_at <= time.time():
+            return None
+        if zlib.crc32(slot[4 : SLOT_HEADER.size + length]) != checksum:
+            return None
+        return slot[SLOT_HEADER.size : SLOT_HEADER.size + length]
+
+    def set(self, digest: bytes, value: bytes, ttl: float) -> bool:
+        if self._map is None or len(value) > self.capacity or ttl <= 0:
+            return False
+        body = SLOT_HEADER.pack(0, len(value), time.time() + ttl, digest)[4:] + value
+        offset = self._offset(digest)
+        self._map[offset : offset + 4 + len(body)] = struct.pack("<I", zlib.crc32(body)) + body
+        return True
+
+    def delete(self, digest: bytes) -> None:
+        if self._map is None:
+            return
+        offset = self._offset(digest)
+        if self._map[offset + 16 : offset + SLOT_HEADER.size] == digest:
+            self._map[offset : offset + SLOT_HEADER.size] = bytes(SLOT_HEADER.size)
@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import time
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+from jose import jwt
+from jose.exceptions import JOSEError
+from pydantic import ValidationError
+
+from app.core.cache import TTLCache
+from app.core.shared_cache import SharedTokenStore
+from app.core.settings import settings
+from app.schemas.user_schema import User
+
+
+def _token_expiry(token: str) -> Optional[float]:
+    try:
+        expiry = jwt.get_unverified_claims(token).get("exp")
+    except JOSEError:
+        return None
+    return float(expiry) if isinstance(expiry, (int, float)) else None
+
+
+class TokenCache:
+    def __init__(
+        self,
+        max_entries: int = settings.token_cache_max_entries,
+        ttl: float = settings.token_cache_ttl,
+        shared: Optional[SharedTokenStore] = None,
+    ) -> None:
+        """
+        In-process cache of validated tokens keyed by the token's SHA-256.
+
+        Entries expire at the token's own ``exp`` claim or after ``ttl`` seconds, whichever comes
+        first. Concurrent lookups of the same uncached token share one loader call. With a
+        ``shared`` store, a token validated by one worker process is found by the others too.
+        """
+        self.ttl = ttl
+        self.shared = shared
+        self._users: TTLCache[str, User] = TTLCache(max_entries)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def start(self) -> None:
+        if self.shared is not None:
+            self.shared.open()
+
+    def close(self) -> None:
+        if self.shared is not None:
+            self.shared.close()
+
+    @staticmethod
+    def key_for(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _ttl_for(self, token: str) -> float:
+        expiry = _token_expiry(token)
+        if expiry is None:
+            return self.ttl
+        return min(self.ttl, expiry - time.time())
+
+    def peek(self, token: str) -> Optional[User]:
+        """Returns the cached user for ``token`` without loading it or counting a lookup."""
+        key = self.key_for(token)
+        return self._users.get(key) or self._get_shared(key, token)
+
+    async def get_or_load(self, token: str, loader: Callable[[], Awaitable[User]]) -> User:
+        key = self.key_for(token)
+        user = self._users.get(key)
+        if user is not None:
+            self.hits += 1
+            return user
+
+        user = self._get_shared(key, token)
+        if user is not None:
+            self.shared_hits += 1
+            return user
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, token, loader))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, token: str, loader: Callable[[], Awaitable[User]]) -> User:
+        user = await loader()
+        ttl = self._ttl_for(token)
+        self._users.set(key, user, ttl)
+        if self.shared is not None:
+            self.shared.set(bytes.fromhex(key), user.model_dump_json().encode(), ttl)
+        return user
+
+    def _get_shared(self, key: str, token: str) -> Optional[User]:
+        if self.shared is None:
+            return None
+        value = self.shared.get(bytes.fromhex(key))
+        if value is None:
+            return None
+        try:
+            user = User.model_validate_json(value)
+        except ValidationError:
+            return None
+        self._users.set(key, user, self._ttl_for(token))
+        return user
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()
+
+    def invalidate(self, token: str) -> None:
+        key = self.key_for(token)
+        self._users.pop(key)
+        if self.shared is not None:
+            self.shared.delete(bytes.fromhex(key))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.shared_hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self._users),
+            "max_entries": self._users.max_entries,
+            "hit_ratio": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+        }
+
+
+token_cache = TokenCache(
+    shared=SharedTokenStore(
+        settings.token_cache_shared_path, settings.token_cache_shared_slots, settings.token_cache_shared_slot_size
+    )
+    if settings.token_cache_shared_path
+    else None
+)
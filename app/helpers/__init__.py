@@ -1,4 +1,5 @@
 from .object_storage import AsyncS3Manager
-from .rabbit_manager import RabbitMQManager
+from .outbox import Outbox
+from .rabbit_publisher import RabbitPublisher
 
-__all__ = ["AsyncS3Manager", "RabbitMQManager"]
+__all__ = ["AsyncS3Manager", "Outbox", "RabbitPublisher"]
@@ -0,0 +1,74 @@
+from typing import Optional
+
+from app.core.exceptions import ValidationError
+from app.schemas.file_schema import ALLOWED_VIDEO_TYPES
+
+SNIFF_SIZE = 4096
+
+EBML_MAGIC = b"\x1a\x45\xdf\xa3"
+EBML_DOCTYPE_ID = b"\x42\x82"
+OGG_VIDEO_CODECS = (b"\x80theora", b"OVP80", b"\x80daala")
+
+# Declared types that describe the same container family as the detected one.
+COMPATIBLE_TYPES = {
+    "video/webm": {"video/webm", "video/x-matroska"},
+    "video/x-matroska": {"video/webm", "video/x-matroska"},
+}
+
+
+def _ebml_doctype(head: bytes) -> Optional[bytes]:
+    position = head.find(EBML_DOCTYPE_ID, len(EBML_MAGIC))
+    if position < 0 or position + 2 >= len(head):
+        return None
+    position += len(EBML_DOCTYPE_ID)
+    first = head[position]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8 or position + length > len(head):
+        return None
+    size = first & (0xFF >> length)
+    for byte in head[position + 1 : position + length]:
+        size = (size << 8) | byte
+    start = position + length
+    return head[start : start + size]
+
+
+def sniff_container(head: bytes) -> Optional[str]:
+    """Identifies the container format from the first bytes of a file; None when unrecognised."""
+    if head[4:8] == b"ftyp":
+        return "video/quicktime" if head[8:12] == b"qt  " else "video/mp4"
+    if head[4:8] in (b"moov", b"mdat", b"free", b"wide"):
+        return "video/mp4"
+    if head.startswith(EBML_MAGIC):
+        doctype = _ebml_doctype(head)
+        if doctype == b"webm":
+            return "video/webm"
+        if doctype == b"matroska":
+            return "video/x-matroska"
+        return None
+    if head.startswith(b"RIFF"):
+        form_type = head[8:12]
+        if form_type == b"AVI ":
+            return "video/avi"
+        if form_type == b"WAVE":
+            return "audio/wav"
+        return None
+    if head.startswith(b"OggS"):
+        return "video/ogg" if any(codec in head for codec in OGG_VIDEO_CODECS) else "audio/ogg"
+    return None
+
+
+def resolve_content_type(declared: Optional[str], head: bytes) -> str:
+    """
+    Returns the content type detected from ``head``.
+
+    Raises ValidationError when the container is unknown, not an allowed video type, or does
+    not match the type the client declared.
+    """
+    detected = sniff_container(head)
+    if detected is None or detected not in ALLOWED_VIDEO_TYPES:
+        raise ValidationError(detail="File Type not allowed, please send a video file")
+    if declared and declared not in COMPATIBLE_TYPES.get(detected, {detected}):
+        raise ValidationError(detail=f"File content is {detected} but was sent as {declared}")
+    return detected
@@ -0,0 +1,172 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+
+from app.core.exceptions import ObjectNotFoundError
+from app.core.settings import settings
+from app.helpers.object_storage import AsyncS3Manager
+
+DIGEST_METADATA_KEY = "sha256"
+JOB_METADATA_KEY = "job-id"
+REQUESTER_METADATA_KEY = "requester"
+
+
+@dataclass
+class ContentRecord:
+    key: str
+    job_id: Optional[str] = None
+    requester: Optional[str] = None
+
+
+class ContentIndex:
+    def __init__(self, max_entries: int = settings.content_index_max_entries) -> None:
+        """
+        Bounded LRU index from content digest to the stored object that holds that content.
+
+        The index is only a hint: every object written through the upload path carries its
+        digest, conversion job id and requester in its S3 metadata, so a lost or evicted entry
+        costs one extra upload at worst, and ``rebuild`` can repopulate the index from the bucket.
+        """
+        self.max_entries = max_entries
+        self._records: "OrderedDict[str, ContentRecord]" = OrderedDict()
+        self._digests_by_key: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self._rebuild_task: Optional[asyncio.Task] = None
+
+    async def start(self, async_s3: AsyncS3Manager, bucket_name: str) -> None:
+        """Repopulates the index from object metadata in the background."""
+        self._rebuild_task = asyncio.create_task(self._rebuild_in_background(async_s3, bucket_name))
+
+    async def close(self) -> None:
+        if self._rebuild_task:
+            self._rebuild_task.cancel()
+            await asyncio.gather(self._rebuild_task, return_exceptions=True)
+            self._rebuild_task = None
+
+    async def _rebuild_in_background(self, async_s3: AsyncS3Manager, bucket_name: str) -> None:
+        try:
+            indexed = await self.rebuild(async_s3, bucket_name)
+        except Exception as error:
+            print(f"Content index rebuild failed: {error!r}")
+            return
+        print(f"Content index rebuilt with {indexed} objects.")
+
+    def get(self, digest: str) -> Optional[ContentRecord]:
+        record = self._records.get(digest)
+        if record is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._records.move_to_end(digest)
+        return record
+
+    def add(self, digest: str, key: str, job_id: Optional[str] = None, requester: Optional[str] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        # The key now holds new content, so whatever digest pointed at it before is stale.
+        previous_digest = self._digests_by_key.get(key)
+        if previous_digest is not None and previous_digest != digest:
+            self.discard(previous_digest)
+
+        record = self._records.get(digest)
+        if record is None or record.key != key:
+            record = ContentRecord(key=key, job_id=job_id, requester=requester)
+            self._records[digest] = record
+        elif job_id:
+            record.job_id = job_id
+            record.requester = requester
+        self._records.move_to_end(digest)
+        self._digests_by_key[key] = digest
+
+        while len(self._records) > self.max_entries:
+            _, evicted = self._records.popitem(last=False)
+            self._digests_by_key.pop(evicted.key, None)
+
+    def discard(self, digest: str) -> None:
+        record = self._records.pop(digest, None)
+        if record is not None and self._digests_by_key.get(record.key) == digest:
+            del self._digests_by_key[record.key]
+
+    def discard_key(self, key: str) -> None:
+        digest = self._digests_by_key.get(key)
+        if digest is not None:
+            self.discard(digest)
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._digests_by_key.clear()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    async def rebuild(
+        self,
+        async_s3: AsyncS3Manager,
+        bucket_name: str,
+        concurrency: int = settings.content_index_rebuild_concurrency,
+    ) -> int:
+        """
+        Reads the digest metadata of the bucket's objects; returns how many were indexed.
+
+        At most ``max_entries`` objects are looked at, since the index could not hold more.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        pending: Set[asyncio.Task] = set()
+        failures: List[BaseException] = []
+        indexed = 0
+
+        def finish(task: asyncio.Task) -> None:
+            pending.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                failures.append(task.exception())  # type: ignore
+
+        async def index_object(key: str) -> None:
+            nonlocal indexed
+            try:
+                head = await async_s3.head_object(bucket_name, key)
+            except ObjectNotFoundError:
+                return
+            finally:
+                semaphore.release()
+            metadata = head.get("Metadata") or {}
+            digest = metadata.get(DIGEST_METADATA_KEY)
+            if digest and digest not in self._records:
+                self.add(
+                    digest, key, job_id=metadata.get(JOB_METADATA_KEY), requester=metadata.get(REQUESTER_METADATA_KEY)
+                )
+                indexed += 1
+
+        if self.max_entries <= 0:
+            return 0
+        listed = 0
+        try:
+            async for obj in async_s3.iter_objects(bucket_name):
+                if listed == self.max_entries:
+                    break
+                listed += 1
+                # Listing pauses while ``concurrency`` HEADs are running, so the keys are never all in memory.
+                await semaphore.acquire()
+                if failures:
+                    raise failures[0]
+                task = asyncio.create_task(index_object(obj["Key"]))
+                pending.add(task)
+                task.add_done_callback(finish)
+            await asyncio.gather(*pending)
+            if failures:
+                raise failures[0]
+        finally:
+            for task in pending:
+                task.cancel()
+        return indexed
+
+
+content_index = ContentIndex()
+
+
+def get_content_index() -> Optional[ContentIndex]:
+    return content_index if settings.content_dedup_enabled else None
@@ -0,0 +1,326 @@
+import asyncio
+import hashlib
+import os
+import shutil
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable
+from typing import Callable
+from typing import AsyncIterator
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from uuid import uuid4
+
+import anyio
+from starlette.responses import FileResponse
+from starlette.responses import StreamingResponse
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from app.core.cache import TTLCache
+from app.core.metrics import registry
+from app.core.settings import settings
+
+CacheKey = Tuple[str, str, str]
+WORKER_DIRECTORY_PREFIX = "worker-"
+VERSION_CACHE_SIZE = 10_000
+
+
+class ObjectVersion(NamedTuple):
+    etag: Optional[str]
+    size: Optional[int]
+    last_modified: Optional[datetime]
+
+
+@dataclass
+class CachedObject:
+    path: str
+    size: int
+    content_type: str
+    etag: str
+    last_modified: Optional[datetime]
+    readers: int = 0
+    evicted: bool = False
+
+
+class DownloadCache:
+    def __init__(
+        self,
+        directory: Optional[str] = settings.download_cache_dir,
+        max_bytes: int = settings.download_cache_max_bytes,
+        max_object_size: int = settings.download_cache_max_object_size,
+        revalidate_after: float = settings.download_cache_revalidate_after,
+    ) -> None:
+        """
+        Size-bounded LRU cache of downloaded objects on the local disk.
+
+        Entries are keyed by bucket, key and ETag, so an overwritten object is simply a miss and
+        its old copy ages out. The current version of an object (its HEAD) is remembered for
+        ``revalidate_after`` seconds, so an overwrite can go unnoticed for that long. Concurrent
+        misses for the same entry share one S3 download. Files being served are pinned: evicting
+        one only unlinks it once its last reader is done. Each worker process keeps its own
+        subdirectory and index, so ``max_bytes`` is per worker.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_object_size = max_object_size
+        self.revalidate_after = revalidate_after
+        self._versions: TTLCache[Tuple[str, str], ObjectVersion] = TTLCache(VERSION_CACHE_SIZE)
+        self.path: Optional[str] = None
+        self.size = 0
+        self._entries: "OrderedDict[CacheKey, CachedObject]" = OrderedDict()
+        self._fills: Dict[CacheKey, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.bytes_saved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def start(self) -> None:
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._remove_orphans()
+        self.path = os.path.join(self.directory, f"{WORKER_DIRECTORY_PREFIX}{os.getpid()}")
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+
+    def close(self) -> None:
+        for task in self._fills.values():
+            task.cancel()
+        if self.path is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path = None
+        self._entries.clear()
+        self._versions.clear()
+        self.size = 0
+
+    def _remove_orphans(self) -> None:
+        """Removes the directories left behind by worker processes that are gone."""
+        for name in os.listdir(self.directory):
+            pid = name[len(WORKER_DIRECTORY_PREFIX) :]
+            if not name.startswith(WORKER_DIRECTORY_PREFIX) or not pid.isdigit():
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)  # type: ignore
+            except PermissionError:
+                pass
+
+    def cacheable(self, size: Optional[int]) -> bool:
+        return self.enabled and size is not None and size <= min(self.max_object_size, self.max_bytes)
+
+    def version(self, bucket: str, key: str) -> Optional[ObjectVersion]:
+        """The object's version as last seen by a HEAD, if that was less than ``revalidate_after`` ago."""
+        return self._versions.get((bucket, key))
+
+    def remember_version(self, bucket: str, key: str, version: ObjectVersion) -> None:
+        self._versions.set((bucket, key), version, self.revalidate_after)
+
+    def forget_version(self, bucket: str, key: str) -> None:
+        self._versions.pop((bucket, key))
+
+    def acquire(self, bucket: str, key: str, etag: str, served: Optional[int] = None) -> Optional[CachedObject]:
+        """Returns the cached copy pinned for reading, or None on a miss; ``served`` bytes of it count as saved."""
+        entry = self._entries.get((bucket, key, etag))
+        if entry is None:
+            return None
+        self._entries.move_to_end((bucket, key, etag))
+        self.hits += 1
+        self.bytes_saved += entry.size if served is None else served
+        return self._pin(entry)
+
+    def prefetch(self, bucket: str, key: str, etag: str, open_object: Callable[[], Awaitable[dict]]) -> None:
+        """Starts filling the entry in the background, unless it is cached or being filled already."""
+        cache_key = (bucket, key, etag)
+        if cache_key in self._entries or cache_key in self._fills:
+            return
+        self.misses += 1
+        self._start_fill(cache_key, open_object)
+
+    async def fill(
+        self, bucket: str, key: str, etag: str, open_object: Callable[[], Awaitable[dict]]
+    ) -> Optional[CachedObject]:
+        """
+        Downloads the object with ``open_object`` (a ``stream_object`` call) and returns it pinned.
+
+        Concurrent calls for the same entry wait for the same download. Returns None in the rare
+        case the entry was already evicted again before this caller got to read it.
+        """
+        cache_key = (bucket, key, etag)
+        task = self._fills.get(cache_key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self._start_fill(cache_key, open_object)
+        entry = await asyncio.shield(task)  # type: ignore
+        if entry.evicted:
+            return None
+        if shared:
+            self.bytes_saved += entry.size
+        return self._pin(entry)
+
+    def _start_fill(self, cache_key: CacheKey, open_object: Callable[[], Awaitable[dict]]) -> asyncio.Task:
+        task = asyncio.ensure_future(self._fill(cache_key, open_object))
+        self._fills[cache_key] = task
+        task.add_done_callback(lambda done: self._finish(cache_key, done))
+        return task
+
+    async def _fill(self, cache_key: CacheKey, open_object: Callable[[], Awaitable[dict]]) -> CachedObject:
+        response = await open_object()
+        name = hashlib.sha256("\0".join(cache_key).encode()).hexdigest()
+        path = os.path.join(self.path, name)  # type: ignore
+        partial = f"{path}.{uuid4().hex}.part"
+        size = 0
+        try:
+            with open(partial, "wb") as file:
+                async for chunk in response["Body"]:
+                    await asyncio.to_thread(file.write, chunk)
+                    size += len(chunk)
+            os.replace(partial, path)
+        except BaseException:
+            await response["Body"].aclose()
+            if os.path.exists(partial):
+                os.unlink(partial)
+            raise
+        entry = CachedObject(
+            path=path,
+            size=size,
+            content_type=response["ContentType"],
+            etag=cache_key[2],
+            last_modified=response["LastModified"],
+        )
+        self._add(cache_key, entry)
+        return entry
+
+    def _finish(self, cache_key: CacheKey, task: asyncio.Task) -> None:
+        self._fills.pop(cache_key, None)
+        if not task.cancelled():
+            task.exception()
+
+    def _add(self, cache_key: CacheKey, entry: CachedObject) -> None:
+        self._entries[cache_key] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            _, oldest = self._entries.popitem(last=False)
+            self._evict(oldest)
+
+    def _evict(self, entry: CachedObject) -> None:
+        self.size -= entry.size
+        entry.evicted = True
+        if entry.readers == 0:
+            self._unlink(entry)
+
+    @staticmethod
+    def _pin(entry: CachedObject) -> CachedObject:
+        entry.readers += 1
+        return entry
+
+    def release(self, entry: CachedObject) -> None:
+        entry.readers -= 1
+        if entry.evicted and entry.readers == 0:
+            self._unlink(entry)
+
+    @staticmethod
+    def _unlink(entry: CachedObject) -> None:
+        try:
+            os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._entries),
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "bytes_saved": self.bytes_saved,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+class CachedFileResponse(FileResponse):
+    def __init__(self, cache: DownloadCache, entry: CachedObject, headers: Optional[Dict[str, str]] = None) -> None:
+        """Serves a pinned cache entry and unpins it once the response is sent or the client goes away."""
+        super().__init__(entry.path, headers=headers, media_type=entry.content_type)
+        self.cache = cache
+        self.entry = entry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.cache.release(self.entry)
+
+
+class CachedRangeResponse(StreamingResponse):
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self, cache: DownloadCache, entry: CachedObject, start: int, end: int, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Serves bytes ``start`` to ``end`` (inclusive) of a pinned cache entry as a 206, then unpins it."""
+        length = end - start + 1
+        headers = {
+            **(headers or {}),
+            "Content-Range": f"bytes {start}-{end}/{entry.size}",
+            "Content-Length": str(length),
+        }
+        super().__init__(
+            self._read(entry.path, start, length), status_code=206, headers=headers, media_type=entry.content_type
+        )
+        self.cache = cache
+        self.entry = entry
+
+    async def _read(self, path: str, start: int, length: int) -> AsyncIterator[bytes]:
+        async with await anyio.open_file(path, "rb") as file:
+            await file.seek(start)
+            while length > 0:
+                chunk = await file.read(min(self.chunk_size, length))
+                if not chunk:
+                    return
+                length -= len(chunk)
+                yield chunk
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.cache.release(self.entry)
+
+
+download_cache = DownloadCache()
+
+
+def get_download_cache() -> Optional[DownloadCache]:
+    return download_cache if download_cache.enabled else None
+
+
+registry.gauge(
+    "gateway_download_cache_bytes",
+    "Bytes held by the local download cache.",
+    function=lambda: {(): download_cache.size},
+)
+registry.gauge(
+    "gateway_download_cache_bytes_saved",
+    "Object bytes served from the local download cache instead of S3.",
+    function=lambda: {(): download_cache.bytes_saved},
+)
+registry.gauge(
+    "gateway_download_cache_hit_ratio",
+    "Share of cacheable downloads that did not need their own S3 transfer.",
+    function=lambda: {(): download_cache.stats()["hit_ratio"]},
+)
@@ -0,0 +1,176 @@
+import asyncio
+from typing import AsyncIterator
+from typing import Dict
+from typing import Optional
+from typing import Set
+
+import pika
+from pydantic import ValidationError
+
+from app.core.cache import TTLCache
+from app.core.enums import JobStates
+from app.core.settings import settings
+from app.helpers.rabbit_publisher import persistent_json
+from app.helpers.rabbit_publisher import RabbitPublisher
+from app.schemas.job_schema import JobStatus
+from app.schemas.job_schema import JobStatusMessage
+
+FINAL_JOB_STATES = (JobStates.COMPLETED, JobStates.FAILED)
+
+
+class JobIndex:
+    def __init__(
+        self,
+        max_entries: int = settings.job_index_max_entries,
+        ttl: float = settings.job_index_ttl,
+        watcher_buffer: int = 16,
+    ) -> None:
+        """
+        Bounded in-memory view of conversion jobs, fed by the converter's status messages.
+
+        Entries expire ``ttl`` seconds after their last change and the least recently used
+        ones are evicted beyond ``max_entries``, so an unknown job id means "never seen or
+        forgotten". Watchers get every change pushed to their own small queue; a watcher that
+        falls behind loses its oldest updates, never the latest one.
+        """
+        self.ttl = ttl
+        self.watcher_buffer = watcher_buffer
+        self._jobs: TTLCache[str, JobStatus] = TTLCache(max_entries)
+        self._watchers: Dict[str, Set[asyncio.Queue]] = {}
+        self._publisher: Optional[RabbitPublisher] = None
+        self._exchange: Optional[str] = None
+        self._announcements: Set[asyncio.Task] = set()
+
+    def start(self, publisher: RabbitPublisher, exchange: str) -> None:
+        """Subscribes to the status exchange, and announces newly tracked jobs on it to the other workers."""
+        self._publisher = publisher
+        self._exchange = exchange
+        publisher.subscribe(exchange, self.handle_message)
+
+    def close(self) -> None:
+        """Ends every open watch."""
+        for task in self._announcements:
+            task.cancel()
+        self._publisher = None
+        for watchers in self._watchers.values():
+            for updates in watchers:
+                self._push(updates, None)
+
+    def get(self, job_id: str) -> Optional[JobStatus]:
+        return self._jobs.get(job_id)
+
+    def track(self, job_id: str, file_name: Optional[str] = None, client_email: Optional[str] = None) -> None:
+        """
+        Records a freshly queued job and announces it on the status exchange, so every worker
+        knows the job and its owner before the converter first reports on it.
+        """
+        message = JobStatusMessage(
+            job_id=job_id, state=JobStates.QUEUED, file_name=file_name, client_email=client_email
+        )
+        self.update(message)
+        if self._publisher is not None:
+            task = asyncio.ensure_future(self._announce(self._publisher, message))
+            self._announcements.add(task)
+            task.add_done_callback(self._announcements.discard)
+
+    async def _announce(self, publisher: RabbitPublisher, message: JobStatusMessage) -> None:
+        try:
+            await publisher.publish(
+                message.model_dump_json().encode(),
+                routing_key="",
+                exchange=self._exchange,  # type: ignore
+                properties=persistent_json(message.job_id),
+            )
+        except Exception as error:
+            print(f"Could not announce job {message.job_id}: {error!r}")
+
+    def update(self, message: JobStatusMessage) -> None:
+        current = self._jobs.get(message.job_id)  # type: ignore
+        if current is not None and message.state == JobStates.QUEUED:
+            # A queued announcement never reverts a known job; it only fills in what is missing.
+            if current.file_name is None or current.client_email is None:
+                self._set(
+                    current.model_copy(
+                        update={
+                            "file_name": current.file_name or message.file_name,
+                            "client_email": current.client_email or message.client_email,
+                        }
+                    )
+                )
+            return
+        if current is not None and current.state in FINAL_JOB_STATES and message.state not in FINAL_JOB_STATES:
+            return  # a late progress message must not reopen a finished job
+        self._set(
+            JobStatus(
+                job_id=message.job_id,  # type: ignore
+                state=message.state,
+                file_name=message.file_name or (current.file_name if current else None),
+                client_email=message.client_email or (current.client_email if current else None),
+                download_link=message.download_link or (current.download_link if current else None),
+                detail=message.detail,
+            )
+        )
+
+    def handle_message(self, properties: pika.BasicProperties, body: bytes) -> None:
+        try:
+            message = JobStatusMessage.model_validate_json(body)
+        except ValidationError as error:
+            print(f"Ignoring invalid job status message: {error!r}")
+            return
+        message.job_id = message.job_id or properties.correlation_id or properties.message_id
+        if not message.job_id:
+            print("Ignoring job status message without a job id")
+            return
+        self.update(message)
+
+    async def watch(self, job_id: str, heartbeat: float) -> AsyncIterator[Optional[JobStatus]]:
+        """
+        Yields the job's current status and then every change until it reaches a final state.
+
+        None is yielded after ``heartbeat`` seconds without a change so the caller can keep its
+        connection alive. Nothing is yielded for an unknown job.
+        """
+        updates: asyncio.Queue = asyncio.Queue(maxsize=self.watcher_buffer)
+        watchers = self._watchers.setdefault(job_id, set())
+        watchers.add(updates)
+        try:
+            status = self._jobs.get(job_id)
+            if status is None:
+                return
+            yield status
+            while status.state not in FINAL_JOB_STATES:
+                try:
+                    async with asyncio.timeout(heartbeat):
+                        update = await updates.get()
+                except TimeoutError:
+                    yield None
+                    continue
+                if update is None:
+                    return
+                status = update
+                yield status
+        finally:
+            watchers.discard(updates)
+            if not watchers:
+                self._watchers.pop(job_id, None)
+
+    def _set(self, status: JobStatus) -> None:
+        self._jobs.set(status.job_id, status, self.ttl)
+        for updates in self._watchers.get(status.job_id, ()):
+            self._push(updates, status)
+
+    @staticmethod
+    def _push(updates: asyncio.Queue, status: Optional[JobStatus]) -> None:
+        if updates.full():
+            updates.get_nowait()
+        updates.put_nowait(status)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+
+job_index = JobIndex()
+
+
+def get_job_index() -> JobIndex:
+    return job_index
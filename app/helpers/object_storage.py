@@ -1,7 +1,86 @@
-import aiobotocore.session
+import asyncio
+import importlib
+from contextlib import AsyncExitStack
+from contextlib import suppress
+from datetime import datetime
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+from typing import TYPE_CHECKING
+from typing import Optional
 
+from botocore.exceptions import ClientError
+
+from app.core.exceptions import ObjectDownloadError
+from app.core.exceptions import ObjectNotFoundError
+from app.core.exceptions import ObjectStorageError
+from app.core.exceptions import ObjectUploadError
+from app.core.exceptions import PreconditionFailedError
+from app.core.exceptions import RangeNotSatisfiableError
+from app.core.exceptions import ValidationError
+from app.core.outbound import OutboundPolicy
+from app.core.outbound import s3_policy
 from app.core.settings import settings
 
+if TYPE_CHECKING:
+    from aiobotocore.config import AioConfig
+
+
+async def _iter_parts(stream: AsyncIterator[bytes], part_size: int) -> AsyncIterator[bytearray]:
+    buffer = bytearray()
+    async for chunk in stream:
+        buffer.extend(chunk)
+        while len(buffer) >= part_size:
+            # The full buffer becomes the part and only the overflow is copied, so no part is duplicated.
+            part, buffer = buffer, buffer[part_size:]
+            del part[part_size:]
+            yield part
+    if buffer:
+        yield buffer
+
+
+def _object_args(content_type: Optional[str] = None, metadata: Optional[Dict[str, str]] = None) -> dict:
+    object_args: dict = {}
+    if content_type:
+        object_args["ContentType"] = content_type
+    if metadata:
+        object_args["Metadata"] = metadata
+    return object_args
+
+
+# Retried by the outbound policy when they fail; everything else runs at most once.
+IDEMPOTENT_OPERATIONS = frozenset(
+    (
+        "list_buckets",
+        "head_object",
+        "get_object",
+        "put_object",
+        "upload_part",
+        "delete_object",
+        "abort_multipart_upload",
+        "list_objects_v2",
+    )
+)
+HEDGED_OPERATIONS = frozenset(("head_object", "get_object"))
+
+
+def _close_body(response: dict) -> None:
+    if "Body" in response:
+        response["Body"].close()
+
+
+def _default_client_config() -> "AioConfig":
+    from aiobotocore.config import AioConfig
+
+    return AioConfig(
+        max_pool_connections=settings.s3_max_pool_connections,
+        connect_timeout=settings.s3_connect_timeout,
+        read_timeout=settings.s3_read_timeout,
+        tcp_keepalive=settings.s3_tcp_keepalive,
+        connector_args={"keepalive_timeout": settings.s3_keepalive_timeout},
+        retries={"total_max_attempts": 1},
+    )
+
 
 class AsyncS3Manager:
     def __init__(
@@ -10,53 +89,311 @@ class AsyncS3Manager:
         s3_secret_access_key: str = settings.s3_secret_key,
         region_name: str = "auto",
         endpoint_url: str = settings.s3_endpoint,
+        config: Optional["AioConfig"] = None,
+        policy: OutboundPolicy = s3_policy,
     ):
         self.s3_access_key_id = s3_access_key_id
         self.s3_secret_access_key = s3_secret_access_key
         self.region_name = region_name
         self.endpoint_url = endpoint_url
-        self.session = aiobotocore.session.get_session()
-
-    async def _create_client(self):
-        return self.session.create_client(
-            service_name="s3",
-            endpoint_url=self.endpoint_url,
-            aws_access_key_id=self.s3_access_key_id,
-            aws_secret_access_key=self.s3_secret_access_key,
-            region_name=self.region_name,
+        self.config = config
+        self.policy = policy
+        self._client = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._client_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        """
+        Opens the long-lived S3 client whose connection pool is shared by every call.
+
+        aiobotocore is imported here, in a worker thread, rather than with this module: it is the
+        slowest import of the app and the event loop keeps serving while it loads.
+        """
+        async with self._client_lock:
+            if self._client is not None:
+                return
+            session_module = await asyncio.to_thread(importlib.import_module, "aiobotocore.session")
+            if self.config is None:
+                self.config = _default_client_config()
+            exit_stack = AsyncExitStack()
+            self._client = await exit_stack.enter_async_context(
+                session_module.get_session().create_client(
+                    service_name="s3",
+                    endpoint_url=self.endpoint_url,
+                    aws_access_key_id=self.s3_access_key_id,
+                    aws_secret_access_key=self.s3_secret_access_key,
+                    region_name=self.region_name,
+                    config=self.config,
+                )
+            )
+            self._exit_stack = exit_stack
+
+    async def close(self) -> None:
+        """Closes the S3 client and its pooled connections."""
+        async with self._client_lock:
+            if self._exit_stack is not None:
+                await self._exit_stack.aclose()
+            self._client = None
+            self._exit_stack = None
+
+    async def _get_client(self):
+        if self._client is None:
+            await self.start()
+        return self._client
+
+    async def _call(self, operation: str, **kwargs) -> dict:
+        client = await self._get_client()
+        return await self.policy.call(
+            operation,
+            lambda: getattr(client, operation)(**kwargs),
+            idempotent=operation in IDEMPOTENT_OPERATIONS,
+            hedge=operation in HEDGED_OPERATIONS,
+            discard=_close_body,
         )
 
     async def bucket_exists(self, bucket_name: str) -> bool:
-        async with await self._create_client() as client:
-            response = await client.list_buckets()
-            buckets = [bucket["Name"] for bucket in response["Buckets"]]
-            return bucket_name in buckets
+        response = await self._call("list_buckets")
+        buckets = [bucket["Name"] for bucket in response["Buckets"]]
+        return bucket_name in buckets
+
+    async def put_object(
+        self,
+        bucket_name: str,
+        key: str,
+        data: bytes,
+        content_type: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> dict:
+        return await self._call(
+            "put_object", Bucket=bucket_name, Key=key, Body=data, **_object_args(content_type, metadata)
+        )
+
+    async def upload_stream(
+        self,
+        bucket_name: str,
+        key: str,
+        stream: AsyncIterator[bytes],
+        content_type: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None,
+        part_size: int = settings.s3_multipart_part_size,
+        max_concurrency: int = settings.s3_multipart_concurrency,
+    ) -> dict:
+        """
+        Uploads an async stream of bytes without buffering the whole object.
 
-    async def put_object(self, bucket_name: str, key: str, data: bytes) -> dict:
-        async with await self._create_client() as client:
-            resp = await client.put_object(Bucket=bucket_name, Key=key, Body=data)
-            return resp
+        Streams that fit in a single part are sent with ``put_object``; anything bigger goes through
+        a multipart upload with at most ``max_concurrency`` parts in flight, so peak memory stays
+        around ``part_size * (max_concurrency + 1)``. The multipart upload is aborted on any failure.
+        """
+        parts = _iter_parts(stream, part_size)
+        first_part = await anext(parts, bytearray())
+        second_part = await anext(parts, None)
+        if second_part is None:
+            return await self.put_object(bucket_name, key, first_part, content_type=content_type, metadata=metadata)
+        # Handed to ``all_parts`` so that nothing else keeps them alive once they are sent.
+        read_ahead = [first_part, second_part]
+        del first_part, second_part
+
+        upload_id = await self.create_multipart_upload(bucket_name, key, content_type=content_type, metadata=metadata)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        completed_parts = []
+
+        async def send_part(part_number: int, body: bytes) -> None:
+            try:
+                etag = await self.upload_part(bucket_name, key, upload_id, part_number, body)
+                completed_parts.append({"PartNumber": part_number, "ETag": etag})
+            finally:
+                semaphore.release()
+
+        async def all_parts() -> AsyncIterator[bytearray]:
+            while read_ahead:
+                yield read_ahead.pop(0)
+            async for part in parts:
+                yield part
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                part_number = 0
+                async for body in all_parts():
+                    await semaphore.acquire()
+                    part_number += 1
+                    group.create_task(send_part(part_number, body))
+
+            completed_parts.sort(key=lambda part: part["PartNumber"])
+            return await self._call(
+                "complete_multipart_upload",
+                Bucket=bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": completed_parts},
+            )
+        except BaseException as error:
+            with suppress(Exception):
+                await self._call("abort_multipart_upload", Bucket=bucket_name, Key=key, UploadId=upload_id)
+            if isinstance(error, Exception):
+                raise ObjectUploadError() from error
+            raise
+
+    async def create_multipart_upload(
+        self,
+        bucket_name: str,
+        key: str,
+        content_type: Optional[str] = None,
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> str:
+        upload = await self._call(
+            "create_multipart_upload", Bucket=bucket_name, Key=key, **_object_args(content_type, metadata)
+        )
+        return upload["UploadId"]
+
+    async def upload_part(self, bucket_name: str, key: str, upload_id: str, part_number: int, body: bytes) -> str:
+        """Uploads one part of a multipart upload and returns its ETag."""
+        try:
+            response = await self._call(
+                "upload_part", Bucket=bucket_name, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body
+            )
+        except ClientError as error:
+            raise ObjectUploadError(detail=error.response.get("Error", {}).get("Message")) from error
+        return response["ETag"]
+
+    async def complete_multipart_upload(self, bucket_name: str, key: str, upload_id: str, parts: List[dict]) -> dict:
+        try:
+            return await self._call(
+                "complete_multipart_upload",
+                Bucket=bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except ClientError as error:
+            raise ObjectUploadError(detail=error.response.get("Error", {}).get("Message")) from error
+
+    async def abort_multipart_upload(self, bucket_name: str, key: str, upload_id: str) -> dict:
+        try:
+            return await self._call("abort_multipart_upload", Bucket=bucket_name, Key=key, UploadId=upload_id)
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") == "NoSuchUpload":
+                return {}
+            raise
+
+    async def generate_presigned_url(
+        self, client_method: str, params: dict, expires_in: int = settings.presigned_url_expiration
+    ) -> str:
+        client = await self._get_client()
+        return await client.generate_presigned_url(ClientMethod=client_method, Params=params, ExpiresIn=expires_in)
+
+    async def head_object(self, bucket_name: str, key: str) -> dict:
+        try:
+            return await self._call("head_object", Bucket=bucket_name, Key=key)
+        except ClientError as error:
+            raise self._download_error(error) from error
 
     async def get_object(self, bucket_name: str, key: str) -> dict:
-        async with await self._create_client() as client:
-            response = await client.get_object(Bucket=bucket_name, Key=key)
-            async with response["Body"] as stream:
-                data = await stream.read()
-            return {
-                "Content": data,
-                "ContentType": response.get("ContentType", "application/octet-stream"),
-            }
+        response = await self._call("get_object", Bucket=bucket_name, Key=key)
+        async with response["Body"] as stream:
+            data = await stream.read()
+        return {
+            "Content": data,
+            "ContentType": response.get("ContentType", "application/octet-stream"),
+        }
+
+    async def stream_object(
+        self,
+        bucket_name: str,
+        key: str,
+        byte_range: Optional[str] = None,
+        if_match: Optional[str] = None,
+        if_unmodified_since: Optional[datetime] = None,
+        chunk_size: int = settings.download_chunk_size,
+    ) -> dict:
+        """
+        Starts a (possibly ranged) GET and returns the object metadata along with an async iterator
+        that passes the S3 body chunks through as they arrive. The underlying connection goes back
+        to the pool once the iterator is exhausted or closed.
+        """
+        request_args = {
+            "Range": byte_range,
+            "IfMatch": if_match,
+            "IfUnmodifiedSince": if_unmodified_since,
+        }
+        try:
+            response = await self._call(
+                "get_object",
+                Bucket=bucket_name,
+                Key=key,
+                **{name: value for name, value in request_args.items() if value},
+            )
+        except ClientError as error:
+            raise self._download_error(error) from error
+
+        async def body() -> AsyncIterator[bytes]:
+            async with response["Body"]:
+                async for chunk in response["Body"].iter_chunks(chunk_size):
+                    yield chunk
+
+        return {
+            "Body": body(),
+            "ContentType": response.get("ContentType", "application/octet-stream"),
+            "ContentLength": response.get("ContentLength"),
+            "ContentRange": response.get("ContentRange"),
+            "ETag": response.get("ETag"),
+            "LastModified": response.get("LastModified"),
+        }
+
+    @staticmethod
+    def _download_error(error: ClientError) -> Exception:
+        details = error.response.get("Error", {})
+        code = details.get("Code")
+        if code in ("NoSuchKey", "404"):
+            return ObjectNotFoundError()
+        if code in ("PreconditionFailed", "412"):
+            return PreconditionFailedError()
+        if code in ("InvalidRange", "416"):
+            object_size = details.get("ActualObjectSize")
+            headers = {"Content-Range": f"bytes */{object_size}"} if object_size else None
+            return RangeNotSatisfiableError(headers=headers)
+        return ObjectDownloadError()
 
     async def delete_object(self, bucket_name: str, key: str) -> dict:
-        async with await self._create_client() as client:
-            resp = await client.delete_object(Bucket=bucket_name, Key=key)
-            return resp
+        return await self._call("delete_object", Bucket=bucket_name, Key=key)
+
+    async def list_objects_page(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        max_keys: int = 1000,
+        continuation_token: Optional[str] = None,
+    ) -> dict:
+        """One ListObjectsV2 call: up to ``max_keys`` objects and the token of the next page, if any."""
+        request_args: dict = {"Prefix": prefix, "MaxKeys": max_keys}
+        if continuation_token:
+            request_args["ContinuationToken"] = continuation_token
+        try:
+            response = await self._call("list_objects_v2", Bucket=bucket_name, **request_args)
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") == "InvalidArgument":
+                raise ValidationError(detail="Invalid continuation token") from error
+            raise ObjectStorageError(detail="Failed to list objects in storage.") from error
+        return {
+            "Contents": response.get("Contents", []),
+            "NextContinuationToken": response.get("NextContinuationToken") if response.get("IsTruncated") else None,
+        }
+
+    async def iter_objects(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        page_size: int = 1000,
+        continuation_token: Optional[str] = None,
+    ) -> AsyncIterator[dict]:
+        """Yields the objects under ``prefix`` as they are listed, holding one page in memory at a time."""
+        while True:
+            page = await self.list_objects_page(bucket_name, prefix, page_size, continuation_token)
+            for obj in page["Contents"]:
+                yield obj
+            continuation_token = page["NextContinuationToken"]
+            if not continuation_token:
+                return
 
     async def list_objects(self, bucket_name: str, prefix: str) -> list:
-        async with await self._create_client() as client:
-            paginator = client.get_paginator("list_objects")
-            objects = []
-            async for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
-                for obj in page.get("Contents", []):
-                    objects.append(obj)
-            return objects
+        return [obj async for obj in self.iter_objects(bucket_name, prefix)]
@@ -0,0 +1,160 @@
+import asyncio
+import time
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+from app.core.metrics import track_outbound
+from app.core.settings import settings
+from app.helpers.rabbit_publisher import OutgoingMessage
+from app.helpers.rabbit_publisher import persistent_json
+from app.helpers.rabbit_publisher import RabbitPublisher
+from app.helpers.sqlite_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    message_id TEXT NOT NULL UNIQUE,
+    exchange TEXT NOT NULL,
+    routing_key TEXT NOT NULL,
+    body BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    published_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (published_at, id);
+"""
+
+
+class OutboxRecord(NamedTuple):
+    message_id: str
+    body: bytes
+    routing_key: str
+    exchange: str = ""
+
+
+class Outbox(SQLiteStore):
+    def __init__(
+        self,
+        path: str = settings.outbox_path,
+        batch_size: int = settings.outbox_batch_size,
+        poll_interval: float = settings.outbox_poll_interval,
+        retry_delay: float = settings.outbox_retry_delay,
+        claim_lease: float = settings.outbox_claim_lease,
+        retention: float = settings.outbox_retention,
+    ) -> None:
+        """
+        Durable SQLite journal of messages waiting to be published to RabbitMQ.
+
+        ``enqueue`` commits the record before returning, and a background relay drains pending
+        records to the broker in batches with publisher confirms. Records are keyed by
+        ``message_id``: enqueueing the same id twice is a no-op, and the id travels as the AMQP
+        ``message_id`` property so consumers can drop duplicates after a crash-and-replay. Rows
+        are claimed with a lease, so several workers can share one journal file.
+        """
+        super().__init__(path, SCHEMA, thread_name_prefix="outbox")
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.claim_lease = claim_lease
+        self.retention = retention
+        self._publisher: Optional[RabbitPublisher] = None
+        self._relay_task: Optional[asyncio.Task] = None
+        self._wake_up = asyncio.Event()
+
+    async def start(self, publisher: RabbitPublisher) -> None:
+        self._publisher = publisher
+        await self._open_store()
+        self._relay_task = asyncio.create_task(self._relay())
+
+    async def close(self) -> None:
+        if self._relay_task:
+            self._relay_task.cancel()
+            await asyncio.gather(self._relay_task, return_exceptions=True)
+            self._relay_task = None
+        await self._close_store()
+
+    async def enqueue(self, record: OutboxRecord) -> None:
+        await self.enqueue_many([record])
+
+    async def enqueue_many(self, records: Iterable[OutboxRecord]) -> None:
+        rows = [(r.message_id, r.exchange, r.routing_key, r.body, time.time()) for r in records]
+        with track_outbound("outbox", "enqueue"):
+            await self._run(lambda: self._insert(rows))
+        self._wake_up.set()
+
+    async def pending_count(self) -> int:
+        return await self._run(
+            lambda: self._db.execute("SELECT COUNT(*) FROM outbox WHERE published_at IS NULL").fetchone()[0]  # type: ignore
+        )
+
+    def _insert(self, rows: List[tuple]) -> None:
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT OR IGNORE INTO outbox (message_id, exchange, routing_key, body, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def _claim(self) -> List[tuple]:
+        now = time.time()
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT id, message_id, exchange, routing_key, body FROM outbox "
+                "WHERE published_at IS NULL AND claimed_until < ? ORDER BY id LIMIT ?",
+                (now, self.batch_size),
+            ).fetchall()
+            db.executemany(
+                "UPDATE outbox SET claimed_until = ?, attempts = attempts + 1 WHERE id = ?",
+                [(now + self.claim_lease, row[0]) for row in rows],
+            )
+        return rows
+
+    def _settle(self, published_ids: List[int], failed_ids: List[int]) -> None:
+        now = time.time()
+        with self._transaction() as db:
+            db.executemany("UPDATE outbox SET published_at = ? WHERE id = ?", [(now, id_) for id_ in published_ids])
+            db.executemany("UPDATE outbox SET claimed_until = 0 WHERE id = ?", [(id_,) for id_ in failed_ids])
+            db.execute("DELETE FROM outbox WHERE published_at < ?", (now - self.retention,))
+
+    async def _relay(self) -> None:
+        while True:
+            self._wake_up.clear()
+            try:
+                delay = await self._relay_batch()
+            except Exception as error:
+                print(f"Outbox relay failed: {error!r}")
+                delay = self.retry_delay
+            if delay:
+                try:
+                    async with asyncio.timeout(delay):
+                        await self._wake_up.wait()
+                except TimeoutError:
+                    pass
+
+    async def _relay_batch(self) -> float:
+        if not self._publisher.is_ready:  # type: ignore
+            return self.retry_delay
+        rows = await self._run(self._claim)
+        if not rows:
+            return self.poll_interval
+
+        results = await self._publisher.publish_batch(  # type: ignore
+            OutgoingMessage(body, routing_key, exchange, persistent_json(message_id))
+            for _, message_id, exchange, routing_key, body in rows
+        )
+        published_ids = [row[0] for row, error in zip(rows, results) if error is None]
+        failed_ids = [row[0] for row, error in zip(rows, results) if error is not None]
+        await self._run(lambda: self._settle(published_ids, failed_ids))
+        if failed_ids:
+            return self.retry_delay
+        return 0 if len(rows) == self.batch_size else self.poll_interval
+
+
+outbox = Outbox()
+
+
+def get_outbox() -> Optional[Outbox]:
+    return outbox if settings.outbox_enabled else None
@@ -0,0 +1,41 @@
+from app.core.cache import TTLCache
+from app.core.settings import settings
+from app.helpers.object_storage import AsyncS3Manager
+
+
+class PresignedUrlCache:
+    def __init__(
+        self,
+        async_s3: AsyncS3Manager,
+        max_entries: int = settings.presigned_url_cache_size,
+        expires_in: int = settings.presigned_url_expiration,
+        refresh_margin: int = settings.presigned_url_refresh_margin,
+    ) -> None:
+        """
+        Bounded cache of presigned GET URLs keyed by bucket and object key.
+
+        A URL is handed out until ``refresh_margin`` seconds before it expires, so clients
+        that follow it always have at least that long to start the download.
+        """
+        self.async_s3 = async_s3
+        self.expires_in = expires_in
+        self.refresh_margin = refresh_margin
+        self._urls: TTLCache[tuple, str] = TTLCache(max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    async def get_download_url(self, bucket_name: str, key: str) -> str:
+        url = self._urls.get((bucket_name, key))
+        if url is not None:
+            self.hits += 1
+            return url
+
+        self.misses += 1
+        url = await self.async_s3.generate_presigned_url(
+            "get_object", {"Bucket": bucket_name, "Key": key}, expires_in=self.expires_in
+        )
+        self._urls.set((bucket_name, key), url, ttl=self.expires_in - self.refresh_margin)
+        return url
+
+    def invalidate(self, bucket_name: str, key: str) -> None:
+        self._urls.pop((bucket_name, key))
@@ -0,0 +1,397 @@
+import asyncio
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+import pika
+from pika.adapters.asyncio_connection import AsyncioConnection
+from pika.channel import Channel
+from pika.exceptions import AMQPConnectionError
+from pika.exceptions import AMQPError
+
+from app.core.metrics import outbound_errors
+from app.core.metrics import outbound_requests
+from app.core.metrics import track_outbound
+from app.core.settings import settings
+
+PERSISTENT_JSON = pika.BasicProperties(
+    content_type="application/json", delivery_mode=pika.spec.PERSISTENT_DELIVERY_MODE
+)
+
+
+def persistent_json(message_id: Optional[str] = None) -> pika.BasicProperties:
+    return pika.BasicProperties(
+        content_type="application/json", delivery_mode=pika.spec.PERSISTENT_DELIVERY_MODE, message_id=message_id
+    )
+
+
+class OutgoingMessage(NamedTuple):
+    body: bytes
+    routing_key: str
+    exchange: str = ""
+    properties: pika.BasicProperties = PERSISTENT_JSON
+
+
+MessageHandler = Callable[[pika.BasicProperties, bytes], None]
+
+
+class PublishError(Exception):
+    """Raised when the broker does not confirm a published message."""
+
+
+class _ConfirmChannel:
+    def __init__(self, channel: Channel) -> None:
+        """Wraps a channel in confirm mode and tracks one future per unconfirmed delivery tag."""
+        self.channel = channel
+        self.delivery_tag = 0
+        self.pending: Dict[int, asyncio.Future] = {}
+
+    @property
+    def is_open(self) -> bool:
+        return self.channel.is_open
+
+    def publish(self, exchange: str, routing_key: str, body: bytes, properties: pika.BasicProperties) -> asyncio.Future:
+        self.channel.basic_publish(exchange=exchange, routing_key=routing_key, body=body, properties=properties)
+        self.delivery_tag += 1
+        confirmation = asyncio.get_running_loop().create_future()
+        self.pending[self.delivery_tag] = confirmation
+        return confirmation
+
+    def on_ack_nack(self, frame) -> None:
+        method = frame.method
+        acked = isinstance(method, pika.spec.Basic.Ack)
+        if method.multiple:
+            tags = [tag for tag in self.pending if tag <= method.delivery_tag]
+        else:
+            tags = [method.delivery_tag]
+        for tag in tags:
+            confirmation = self.pending.pop(tag, None)
+            if confirmation is None or confirmation.done():
+                continue
+            if acked:
+                confirmation.set_result(None)
+            else:
+                confirmation.set_exception(PublishError("Message was rejected by the broker"))
+
+    def fail_pending(self, error: Exception) -> None:
+        for confirmation in self.pending.values():
+            if not confirmation.done():
+                confirmation.set_exception(error)
+        self.pending.clear()
+
+
+class RabbitPublisher:
+    def __init__(
+        self,
+        host: str = settings.RABBIT_URL,
+        port: int = settings.RABBIT_PORT,
+        username: str = settings.RABBITMQ_USER,
+        password: str = settings.RABBITMQ_PASS,
+        pool_size: int = settings.rabbit_channel_pool_size,
+        confirm_timeout: float = settings.rabbit_confirm_timeout,
+        reconnect_delay: float = settings.rabbit_reconnect_delay,
+    ) -> None:
+        """
+        asyncio-native publisher built on pika's AsyncioConnection.
+
+        Keeps a pool of long-lived channels in publisher-confirm mode. ``publish`` hands the
+        message to the broker without blocking the event loop and resolves once the broker
+        confirms it. Lost connections and channels are re-established in the background.
+
+        Args:
+            host (str): RabbitMQ host URL.
+            port (int): RabbitMQ port.
+            username (str): RabbitMQ username.
+            password (str): RabbitMQ password.
+            pool_size (int): Number of channels kept open.
+            confirm_timeout (float): Seconds to wait for the connection and for each confirm.
+            reconnect_delay (float): Seconds between reconnection attempts.
+        """
+        self.parameters = pika.ConnectionParameters(
+            host=host,
+            port=port,
+            credentials=pika.PlainCredentials(username, password),
+            heartbeat=settings.rabbit_heartbeat,
+        )
+        self.pool_size = pool_size
+        self.confirm_timeout = confirm_timeout
+        self.reconnect_delay = reconnect_delay
+        self._connection: Optional[AsyncioConnection] = None
+        self._channels: List[_ConfirmChannel] = []
+        self._next_channel = 0
+        self._ready = asyncio.Event()
+        self._closing = False
+        self._closed: Optional[asyncio.Future] = None
+        self._background_tasks: set = set()
+        self._subscriptions: List[Tuple[str, MessageHandler]] = []
+        self._declare_channel: Optional[Channel] = None
+        self._declare_lock = asyncio.Lock()
+        self._pending_declare: Optional[asyncio.Future] = None
+
+    async def start(self) -> None:
+        """Connects to the broker; if it is unreachable, keeps retrying in the background."""
+        self._closing = False
+        try:
+            await self._connect()
+        except (AMQPError, asyncio.TimeoutError) as error:
+            print(f"RabbitMQ unavailable ({error!r}), retrying in background.")
+            self._spawn(self._reconnect())
+
+    async def close(self) -> None:
+        """Stops reconnecting, fails unconfirmed publishes and closes the connection."""
+        self._closing = True
+        for task in list(self._background_tasks):
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        connection = self._connection
+        if connection and not connection.is_closed and not connection.is_closing:
+            self._closed = asyncio.get_running_loop().create_future()
+            connection.close()
+            await asyncio.wait([self._closed], timeout=self.confirm_timeout)
+        self._connection = None
+        print("RabbitMQ connection closed.")
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    async def publish(
+        self,
+        body: bytes,
+        routing_key: str,
+        exchange: str = "",
+        properties: pika.BasicProperties = PERSISTENT_JSON,
+    ) -> None:
+        with track_outbound("rabbitmq", "publish"):
+            confirmation = await self._send(exchange, routing_key, body, properties)
+            await asyncio.wait_for(confirmation, timeout=self.confirm_timeout)
+
+    async def publish_batch(self, messages: Iterable[OutgoingMessage]) -> List[Optional[BaseException]]:
+        """
+        Publishes the messages back to back and then waits for all of their confirms.
+
+        Returns one entry per message: None when the broker confirmed it, or the error otherwise.
+        """
+        confirmations = []
+        for message in messages:
+            try:
+                confirmations.append(
+                    await self._send(message.exchange, message.routing_key, message.body, message.properties)
+                )
+            except Exception as error:
+                failed = asyncio.get_running_loop().create_future()
+                failed.set_exception(error)
+                confirmations.append(failed)
+
+        async def wait(confirmation: asyncio.Future) -> None:
+            await asyncio.wait_for(confirmation, timeout=self.confirm_timeout)
+
+        results = await asyncio.gather(*(wait(confirmation) for confirmation in confirmations), return_exceptions=True)
+        outbound_requests.labels("rabbitmq", "publish").inc(len(results))
+        failed = sum(result is not None for result in results)
+        if failed:
+            outbound_errors.labels("rabbitmq", "publish").inc(failed)
+        return results
+
+    async def queue_depth(self, queue: str) -> int:
+        """
+        Returns the number of ready messages in ``queue`` using a passive declare.
+
+        The declare runs on a channel of its own: the broker closes the channel when the queue
+        does not exist, which must not fail the publishes waiting for confirms on the pool.
+        """
+        if not self._ready.is_set():
+            raise PublishError("RabbitMQ connection is not available")
+        async with self._declare_lock:
+            with track_outbound("rabbitmq", "queue_declare"):
+                channel = await self._passive_declare_channel()
+                declared: asyncio.Future = asyncio.get_running_loop().create_future()
+                self._pending_declare = declared
+                try:
+                    channel.queue_declare(queue, passive=True, callback=declared.set_result)
+                    frame = await asyncio.wait_for(declared, timeout=self.confirm_timeout)
+                finally:
+                    self._pending_declare = None
+        return frame.method.message_count
+
+    async def _passive_declare_channel(self) -> Channel:
+        channel = self._declare_channel
+        if channel is not None and channel.is_open:
+            return channel
+        if self._connection is None:
+            raise PublishError("RabbitMQ connection is not available")
+        opened: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._connection.channel(on_open_callback=opened.set_result)
+        channel = await asyncio.wait_for(opened, timeout=self.confirm_timeout)
+        channel.add_on_close_callback(self._on_declare_channel_closed)
+        self._declare_channel = channel
+        return channel
+
+    def _on_declare_channel_closed(self, channel: Channel, reason: BaseException) -> None:
+        if self._declare_channel is channel:
+            self._declare_channel = None
+        declared = self._pending_declare
+        if declared is not None and not declared.done():
+            declared.set_exception(PublishError(f"RabbitMQ channel closed: {reason!r}"))
+
+    def subscribe(self, exchange: str, on_message: MessageHandler) -> None:
+        """
+        Passes every message published to the fanout ``exchange`` to ``on_message``.
+
+        Each process binds its own exclusive, auto-deleted queue, so every worker sees every
+        message. Messages are auto-acked, and the subscription is restored after reconnects.
+        """
+        self._subscriptions.append((exchange, on_message))
+        if self._connection is not None and self._ready.is_set():
+            self._spawn(self._open_subscription(self._connection, exchange, on_message))
+
+    async def _open_subscription(
+        self, connection: AsyncioConnection, exchange: str, on_message: MessageHandler
+    ) -> None:
+        loop = asyncio.get_running_loop()
+
+        async def call(method, *args, **kwargs):
+            done: asyncio.Future = loop.create_future()
+            method(*args, callback=done.set_result, **kwargs)
+            return await asyncio.wait_for(done, timeout=self.confirm_timeout)
+
+        try:
+            opened: asyncio.Future = loop.create_future()
+            connection.channel(on_open_callback=opened.set_result)
+            channel: Channel = await asyncio.wait_for(opened, timeout=self.confirm_timeout)
+            await call(channel.exchange_declare, exchange, exchange_type="fanout", durable=True)
+            declared = await call(channel.queue_declare, "", exclusive=True, auto_delete=True)
+            await call(channel.queue_bind, declared.method.queue, exchange)
+            channel.basic_consume(
+                declared.method.queue, lambda _, __, properties, body: on_message(properties, body), auto_ack=True
+            )
+        except (AMQPError, asyncio.TimeoutError) as error:
+            print(f"Could not subscribe to {exchange}: {error!r}")
+            return
+        channel.add_on_close_callback(lambda _, reason: self._on_subscription_closed(exchange, on_message))
+
+    def _on_subscription_closed(self, exchange: str, on_message: MessageHandler) -> None:
+        connection = self._connection
+        if self._closing or not connection or not connection.is_open:
+            return  # resubscribed by the next _connect
+        self._spawn(self._open_subscription(connection, exchange, on_message))
+
+    async def _send(
+        self, exchange: str, routing_key: str, body: bytes, properties: pika.BasicProperties
+    ) -> asyncio.Future:
+        if not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=self.confirm_timeout)
+            except asyncio.TimeoutError:
+                raise PublishError("RabbitMQ connection is not available")
+        channel = self._acquire_channel()
+        return channel.publish(exchange, routing_key, body, properties)
+
+    def _acquire_channel(self) -> _ConfirmChannel:
+        open_channels = [channel for channel in self._channels if channel.is_open]
+        if not open_channels:
+            raise PublishError("No open RabbitMQ channel available")
+        self._next_channel = (self._next_channel + 1) % len(open_channels)
+        return open_channels[self._next_channel]
+
+    async def _connect(self) -> None:
+        loop = asyncio.get_running_loop()
+        opened: asyncio.Future = loop.create_future()
+
+        def on_open(connection: AsyncioConnection) -> None:
+            if not opened.done():
+                opened.set_result(connection)
+
+        def on_open_error(connection: AsyncioConnection, error: BaseException) -> None:
+            if not opened.done():
+                opened.set_exception(AMQPConnectionError(error))
+
+        connection = AsyncioConnection(
+            self.parameters,
+            on_open_callback=on_open,
+            on_open_error_callback=on_open_error,
+            on_close_callback=self._on_connection_closed,
+            custom_ioloop=loop,
+        )
+        try:
+            await asyncio.wait_for(opened, timeout=self.confirm_timeout)
+            channels = await asyncio.gather(*(self._open_channel(connection) for _ in range(self.pool_size)))
+        except BaseException:
+            if not connection.is_closed and not connection.is_closing:
+                connection.close()
+            raise
+        self._connection = connection
+        self._channels = list(channels)
+        self._ready.set()
+        for exchange, on_message in self._subscriptions:
+            self._spawn(self._open_subscription(connection, exchange, on_message))
+        print("RabbitMQ connection established.")
+
+    async def _open_channel(self, connection: AsyncioConnection) -> _ConfirmChannel:
+        loop = asyncio.get_running_loop()
+        opened: asyncio.Future = loop.create_future()
+        connection.channel(on_open_callback=opened.set_result)
+        channel: Channel = await asyncio.wait_for(opened, timeout=self.confirm_timeout)
+
+        confirm_channel = _ConfirmChannel(channel)
+        confirm_selected: asyncio.Future = loop.create_future()
+        channel.confirm_delivery(
+            ack_nack_callback=confirm_channel.on_ack_nack, callback=lambda _: confirm_selected.set_result(None)
+        )
+        await asyncio.wait_for(confirm_selected, timeout=self.confirm_timeout)
+        channel.add_on_close_callback(lambda _, reason: self._on_channel_closed(confirm_channel, reason))
+        return confirm_channel
+
+    def _on_channel_closed(self, confirm_channel: _ConfirmChannel, reason: BaseException) -> None:
+        confirm_channel.fail_pending(PublishError(f"RabbitMQ channel closed: {reason!r}"))
+        connection = self._connection
+        if self._closing or not connection or not connection.is_open:
+            return
+        self._spawn(self._replace_channel(confirm_channel, connection))
+
+    async def _replace_channel(self, closed_channel: _ConfirmChannel, connection: AsyncioConnection) -> None:
+        try:
+            new_channel = await self._open_channel(connection)
+        except (AMQPError, asyncio.TimeoutError) as error:
+            print(f"Could not reopen RabbitMQ channel: {error!r}")
+            return
+        self._channels = [channel for channel in self._channels if channel is not closed_channel] + [new_channel]
+
+    def _on_connection_closed(self, connection: AsyncioConnection, reason: BaseException) -> None:
+        if connection is not self._connection:
+            return
+        self._ready.clear()
+        self._connection = None
+        for channel in self._channels:
+            channel.fail_pending(PublishError(f"RabbitMQ connection closed: {reason!r}"))
+        self._channels = []
+        if self._closed and not self._closed.done():
+            self._closed.set_result(None)
+        if not self._closing:
+            print(f"RabbitMQ connection lost ({reason!r}), reconnecting...")
+            self._spawn(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        while not self._closing:
+            await asyncio.sleep(self.reconnect_delay)
+            try:
+                await self._connect()
+                return
+            except (AMQPError, asyncio.TimeoutError) as error:
+                print(f"RabbitMQ reconnection failed: {error!r}")
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+
+rabbit_publisher = RabbitPublisher()
+
+
+def get_rabbit_publisher() -> RabbitPublisher:
+    return rabbit_publisher
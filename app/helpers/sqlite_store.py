@@ -0,0 +1,59 @@
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable
+from typing import Iterator
+from typing import Optional
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class SQLiteStore:
+    def __init__(self, path: str, schema: str, thread_name_prefix: str) -> None:
+        """
+        Base for small SQLite-backed journals used from the event loop.
+
+        Every statement runs on one dedicated thread, so the connection is never shared between
+        threads and the loop never blocks on disk I/O. The database uses WAL so several worker
+        processes can share the file.
+        """
+        self.path = path
+        self.schema = schema
+        self.thread_name_prefix = thread_name_prefix
+        self._db: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def _open_store(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.thread_name_prefix)
+        await self._run(self._open)
+
+    async def _close_store(self) -> None:
+        if self._db is not None:
+            await self._run(self._db.close)
+            self._db = None
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _run(self, function: Callable[[], T]) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function)
+
+    def _open(self) -> None:
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.executescript(self.schema)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        db: sqlite3.Connection = self._db  # type: ignore
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
@@ -0,0 +1,271 @@
+import asyncio
+import time
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+from app.core.settings import settings
+from app.helpers.object_storage import AsyncS3Manager
+from app.helpers.sqlite_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS upload_sessions (
+    session_id TEXT PRIMARY KEY,
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    upload_id TEXT NOT NULL,
+    content_type TEXT,
+    client_email TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS upload_sessions_expiry ON upload_sessions (expires_at);
+CREATE TABLE IF NOT EXISTS upload_session_parts (
+    session_id TEXT NOT NULL REFERENCES upload_sessions (session_id) ON DELETE CASCADE,
+    part_number INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT NOT NULL,
+    PRIMARY KEY (session_id, part_number)
+);
+CREATE TABLE IF NOT EXISTS presigned_uploads (
+    upload_token TEXT PRIMARY KEY,
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    upload_id TEXT,
+    client_email TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS presigned_uploads_expiry ON presigned_uploads (expires_at);
+"""
+
+SESSION_COLUMNS = "session_id, bucket, key, upload_id, content_type, client_email, size, chunk_size, expires_at"
+PRESIGNED_COLUMNS = "upload_token, bucket, key, upload_id, client_email, expires_at"
+
+
+class UploadSession(NamedTuple):
+    session_id: str
+    bucket: str
+    key: str
+    upload_id: str
+    content_type: Optional[str]
+    client_email: str
+    size: int
+    chunk_size: int
+    expires_at: float
+
+    @property
+    def part_count(self) -> int:
+        return max(1, -(-self.size // self.chunk_size))
+
+    def part_size(self, part_number: int) -> int:
+        if part_number < self.part_count:
+            return self.chunk_size
+        return self.size - self.chunk_size * (self.part_count - 1)
+
+
+class UploadedPart(NamedTuple):
+    part_number: int
+    size: int
+    etag: str
+
+
+class PresignedUpload(NamedTuple):
+    upload_token: str
+    bucket: str
+    key: str
+    upload_id: Optional[str]
+    client_email: str
+    expires_at: float
+
+
+class UploadSessionStore(SQLiteStore):
+    def __init__(
+        self,
+        path: str = settings.upload_session_path,
+        ttl: float = settings.upload_session_ttl,
+        janitor_interval: float = settings.upload_session_janitor_interval,
+    ) -> None:
+        """
+        Persistent table of resumable upload sessions and the parts received for each.
+
+        A session maps onto one S3 multipart upload. Its expiry is pushed back every time a part
+        arrives; once a session has been idle for ``ttl`` seconds the janitor aborts the multipart
+        upload, so S3 discards the stored parts, and forgets the session.
+
+        Presigned uploads handed out to clients are recorded here too, so only the user they were
+        issued to can complete them, and the janitor aborts the multipart ones nobody completed.
+        """
+        super().__init__(path, SCHEMA, thread_name_prefix="upload-sessions")
+        self.ttl = ttl
+        self.janitor_interval = janitor_interval
+        self._async_s3: Optional[AsyncS3Manager] = None
+        self._janitor_task: Optional[asyncio.Task] = None
+
+    async def start(self, async_s3: AsyncS3Manager) -> None:
+        self._async_s3 = async_s3
+        await self._open_store()
+        self._janitor_task = asyncio.create_task(self._janitor())
+
+    async def close(self) -> None:
+        if self._janitor_task:
+            self._janitor_task.cancel()
+            await asyncio.gather(self._janitor_task, return_exceptions=True)
+            self._janitor_task = None
+        await self._close_store()
+
+    def _open(self) -> None:
+        super()._open()
+        self._db.execute("PRAGMA foreign_keys=ON")  # type: ignore
+
+    async def create(
+        self,
+        session_id: str,
+        bucket: str,
+        key: str,
+        upload_id: str,
+        content_type: Optional[str],
+        client_email: str,
+        size: int,
+        chunk_size: int,
+    ) -> UploadSession:
+        session = UploadSession(
+            session_id, bucket, key, upload_id, content_type, client_email, size, chunk_size, time.time() + self.ttl
+        )
+
+        def insert() -> None:
+            with self._transaction() as db:
+                db.execute(
+                    f"INSERT INTO upload_sessions ({SESSION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", session
+                )
+
+        await self._run(insert)
+        return session
+
+    async def get(self, session_id: str) -> Optional[UploadSession]:
+        def select() -> Optional[tuple]:
+            return self._db.execute(  # type: ignore
+                f"SELECT {SESSION_COLUMNS} FROM upload_sessions WHERE session_id = ? AND expires_at > ?",
+                (session_id, time.time()),
+            ).fetchone()
+
+        row = await self._run(select)
+        return UploadSession(*row) if row else None
+
+    async def record_part(self, session_id: str, part: UploadedPart) -> None:
+        def upsert() -> None:
+            with self._transaction() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO upload_session_parts (session_id, part_number, size, etag) "
+                    "VALUES (?, ?, ?, ?)",
+                    (session_id, *part),
+                )
+                db.execute(
+                    "UPDATE upload_sessions SET expires_at = ? WHERE session_id = ?",
+                    (time.time() + self.ttl, session_id),
+                )
+
+        await self._run(upsert)
+
+    async def set_content_type(self, session_id: str, content_type: str) -> None:
+        def update() -> None:
+            with self._transaction() as db:
+                db.execute(
+                    "UPDATE upload_sessions SET content_type = ? WHERE session_id = ?", (content_type, session_id)
+                )
+
+        await self._run(update)
+
+    async def parts(self, session_id: str) -> List[UploadedPart]:
+        def select() -> List[tuple]:
+            return self._db.execute(  # type: ignore
+                "SELECT part_number, size, etag FROM upload_session_parts WHERE session_id = ? ORDER BY part_number",
+                (session_id,),
+            ).fetchall()
+
+        return [UploadedPart(*row) for row in await self._run(select)]
+
+    async def delete(self, session_id: str) -> None:
+        def delete() -> None:
+            with self._transaction() as db:
+                db.execute("DELETE FROM upload_sessions WHERE session_id = ?", (session_id,))
+
+        await self._run(delete)
+
+    async def create_presigned(
+        self, upload_token: str, bucket: str, key: str, upload_id: Optional[str], client_email: str
+    ) -> PresignedUpload:
+        upload = PresignedUpload(upload_token, bucket, key, upload_id, client_email, time.time() + self.ttl)
+
+        def insert() -> None:
+            with self._transaction() as db:
+                db.execute(f"INSERT INTO presigned_uploads ({PRESIGNED_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", upload)
+
+        await self._run(insert)
+        return upload
+
+    async def get_presigned(self, upload_token: str) -> Optional[PresignedUpload]:
+        def select() -> Optional[tuple]:
+            return self._db.execute(  # type: ignore
+                f"SELECT {PRESIGNED_COLUMNS} FROM presigned_uploads WHERE upload_token = ? AND expires_at > ?",
+                (upload_token, time.time()),
+            ).fetchone()
+
+        row = await self._run(select)
+        return PresignedUpload(*row) if row else None
+
+    async def delete_presigned(self, upload_token: str) -> None:
+        def delete() -> None:
+            with self._transaction() as db:
+                db.execute("DELETE FROM presigned_uploads WHERE upload_token = ?", (upload_token,))
+
+        await self._run(delete)
+
+    async def expire(self) -> int:
+        """Aborts the multipart uploads of idle sessions and removes them; returns how many were removed."""
+        sessions = await self._run(
+            lambda: self._db.execute(  # type: ignore
+                f"SELECT {SESSION_COLUMNS} FROM upload_sessions WHERE expires_at <= ? LIMIT 100", (time.time(),)
+            ).fetchall()
+        )
+        removed = 0
+        for session in map(UploadSession._make, sessions):
+            if await self._abort(session.bucket, session.key, session.upload_id, session.session_id):
+                await self.delete(session.session_id)
+                removed += 1
+
+        uploads = await self._run(
+            lambda: self._db.execute(  # type: ignore
+                f"SELECT {PRESIGNED_COLUMNS} FROM presigned_uploads WHERE expires_at <= ? LIMIT 100", (time.time(),)
+            ).fetchall()
+        )
+        for upload in map(PresignedUpload._make, uploads):
+            if upload.upload_id is None or await self._abort(
+                upload.bucket, upload.key, upload.upload_id, upload.upload_token
+            ):
+                await self.delete_presigned(upload.upload_token)
+                removed += 1
+        return removed
+
+    async def _abort(self, bucket: str, key: str, upload_id: str, name: str) -> bool:
+        try:
+            await self._async_s3.abort_multipart_upload(bucket, key, upload_id)  # type: ignore
+        except Exception as error:
+            print(f"Could not abort upload {name}: {error!r}")
+            return False
+        return True
+
+    async def _janitor(self) -> None:
+        while True:
+            await asyncio.sleep(self.janitor_interval)
+            try:
+                await self.expire()
+            except Exception as error:
+                print(f"Upload session janitor failed: {error!r}")
+
+
+upload_session_store = UploadSessionStore()
+
+
+def get_upload_session_store() -> UploadSessionStore:
+    return upload_session_store
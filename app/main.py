@@ -1,9 +1,26 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-import uvicorn
 from fastapi import FastAPI
 
-from app.helpers.rabbit_manager import rabbit_manager
+from app.core.admission import admission_controller
+from app.core.dependencies import async_s3
+from app.core.http_client import http_client_manager
+from app.core.jwt_verifier import token_verifier
+from app.core.metrics import MetricsMiddleware
+from app.core.profiler import RequestProfilerMiddleware
+from app.core.profiler import profiler
+from app.core.rate_limit import rate_limiter
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.settings import settings
+from app.core.token_cache import token_cache
+from app.helpers.content_index import content_index
+from app.helpers.download_cache import download_cache
+from app.helpers.job_index import job_index
+from app.helpers.outbox import outbox
+from app.helpers.rabbit_publisher import rabbit_publisher
+from app.helpers.upload_sessions import upload_session_store
+from app.routes.metrics_route import router as metrics_router
 from app.routes.v1 import routers
 
 # http://localhost:5555/v1/converter/download?file_name=240925173542ee04_2024-07-08%2019-14-29.mp3
@@ -14,9 +31,35 @@ def init_app():
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
-        rabbit_manager.init()
+        # The S3 client opens in the background (aiobotocore is the slowest import), so requests that
+        # do not touch S3 are served at once; the first S3 call waits for it on the client's lock.
+        s3_started = asyncio.create_task(async_s3.start())
+        await rabbit_publisher.start()
+        if settings.outbox_enabled:
+            await outbox.start(rabbit_publisher)
+        await admission_controller.start(rabbit_publisher)
+        if settings.content_dedup_enabled:
+            await content_index.start(async_s3, settings.upload_bucket_name)
+        await upload_session_store.start(async_s3)
+        if settings.job_status_exchange:
+            job_index.start(rabbit_publisher, settings.job_status_exchange)
+        await http_client_manager.init()
+        await token_verifier.start(await http_client_manager.get_session())
+        token_cache.start()
+        download_cache.start()
         yield
-        rabbit_manager.close_connection()
+        download_cache.close()
+        token_cache.close()
+        job_index.close()
+        await token_verifier.close()
+        await http_client_manager.close()
+        await upload_session_store.close()
+        await content_index.close()
+        await asyncio.gather(s3_started, return_exceptions=True)
+        await async_s3.close()
+        await admission_controller.close()
+        await outbox.close()
+        await rabbit_publisher.close()
 
     app = FastAPI(
         title="CV-Api",
@@ -30,6 +73,13 @@ def init_app():
         lifespan=lifespan,
     )
     app.include_router(routers)
+    if settings.rate_limit_enabled:
+        app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics_router)
+    if settings.profiler_trigger_token:
+        app.add_middleware(RequestProfilerMiddleware, profiler=profiler)
 
     return app
 
@@ -37,5 +87,26 @@ def init_app():
 app = init_app()
 
 
+def run() -> None:
+    """
+    Serves the gateway with ``server_workers`` processes.
+
+    Uvicorn spawns each worker as a fresh interpreter that imports this module on its own, so the
+    module-level singletons are per worker and their connections are opened in the worker's
+    lifespan. On SIGTERM the workers stop accepting connections and let in-flight requests
+    (uploads included) finish for up to ``server_graceful_shutdown_timeout`` seconds before the
+    lifespan shutdown closes their connections.
+    """
+    import uvicorn
+
+    uvicorn.run(
+        "app.main:app",
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=settings.server_workers,
+        timeout_graceful_shutdown=settings.server_graceful_shutdown_timeout,
+    )
+
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=5555)
+    run()
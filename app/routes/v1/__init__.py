@@ -1,11 +1,13 @@
 from fastapi import APIRouter
 
+from app.routes.v1.admin_routes import router as admin_router
 from app.routes.v1.auth_routes import router as auth_router
 from app.routes.v1.converter_routes import router as converter_router
+from app.routes.v1.job_routes import router as job_router
 from app.routes.v1.ping_route import router as ping_router
 
 routers = APIRouter(prefix="/v1")
-router_list = [auth_router, converter_router, ping_router]
+router_list = [admin_router, auth_router, converter_router, job_router, ping_router]
 
 for router in router_list:
     routers.include_router(router)
@@ -0,0 +1,51 @@
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi import Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.dependencies import CurrentUser
+from app.core.enums import UserRoles
+from app.core.exceptions import NotFoundError
+from app.core.profiler import profiler
+from app.core.security import authorize
+from app.core.settings import settings
+from app.core.token_cache import token_cache
+from app.helpers.download_cache import download_cache
+from app.schemas.admin_schema import CacheStats
+from app.schemas.admin_schema import DownloadCacheStats
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/token-cache", response_model=CacheStats)
+@authorize(role=[UserRoles.ADMIN])
+async def token_cache_stats(current_user: CurrentUser):
+    return CacheStats(**token_cache.stats())
+
+
+@router.get("/download-cache", response_model=DownloadCacheStats)
+@authorize(role=[UserRoles.ADMIN])
+async def download_cache_stats(current_user: CurrentUser):
+    return DownloadCacheStats(**download_cache.stats())
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+@authorize(role=[UserRoles.ADMIN])
+async def profile(
+    current_user: CurrentUser,
+    seconds: float = Query(default=10.0, gt=0, le=settings.profiler_max_seconds),
+    interval_ms: Optional[float] = Query(default=None, gt=0),
+    all_threads: bool = False,
+):
+    interval = interval_ms / 1000 if interval_ms else None
+    return PlainTextResponse(await profiler.profile(seconds, interval=interval, all_threads=all_threads))
+
+
+@router.get("/profile/requests/{profile_id}", response_class=PlainTextResponse)
+@authorize(role=[UserRoles.ADMIN])
+async def request_profile(profile_id: str, current_user: CurrentUser):
+    stacks = profiler.results.get(profile_id)
+    if stacks is None:
+        raise NotFoundError(detail="Profile not found or expired")
+    return PlainTextResponse(stacks)
@@ -1,21 +1,146 @@
 from typing import Annotated
+from typing import List
+from typing import Optional
 
 from fastapi import APIRouter
 from fastapi import File
+from fastapi import Header
+from fastapi import Path
+from fastapi import Query
+from fastapi import Request
 from fastapi import status
 from fastapi import UploadFile
-from pydantic import EmailStr
 
+from app.core.admission import admit_upload
 from app.core.dependencies import CurrentUser
+from app.core.dependencies import DownloadBucket
+from app.core.dependencies import OwnEmail
 from app.core.dependencies import SaveBucket
 from app.core.enums import UserRoles
+from app.core.routing import GatewayRoute
+from app.core.routing import guarded_by
 from app.core.security import authorize
+from app.core.settings import settings
+from app.services.converter_service import NDJSON_MEDIA_TYPE
+from app.schemas.file_schema import BatchUploadResponse
+from app.schemas.file_schema import CompleteUploadRequest
+from app.schemas.file_schema import FileListPage
+from app.schemas.file_schema import PresignedUploadRequest
+from app.schemas.file_schema import PresignedUploadResponse
+from app.schemas.file_schema import UploadSessionPart
+from app.schemas.file_schema import UploadSessionRequest
+from app.schemas.file_schema import UploadSessionResponse
+from app.schemas.job_schema import JobAccepted
 
-router = APIRouter(prefix="/converter", tags=["Converter"])
+router = APIRouter(prefix="/converter", tags=["Converter"], route_class=GatewayRoute)
 fileUpload = Annotated[UploadFile, File(description="A file read as UploadFile")]
 
 
-@router.post("/upload/{email}", status_code=status.HTTP_204_NO_CONTENT)
+@router.post("/upload/{email}", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
+@guarded_by(admit_upload)
 @authorize(role=[UserRoles.MODERATOR, UserRoles.BASE_USER])
-async def upload(email: EmailStr, file: fileUpload, service: SaveBucket, current_user: CurrentUser):
-    await service.upload_video_file(file, client_email=email)
+async def upload(email: OwnEmail, file: fileUpload, service: SaveBucket, current_user: CurrentUser):
+    return JobAccepted(job_id=await service.upload_video_file(file, client_email=email))
+
+
+@router.post("/upload/{email}/batch", response_model=BatchUploadResponse)
+@guarded_by(admit_upload)
+@authorize(role=[UserRoles.MODERATOR, UserRoles.BASE_USER])
+async def upload_batch(
+    email: OwnEmail,
+    files: Annotated[List[UploadFile], File(description="Video files read as UploadFile")],
+    service: SaveBucket,
+    current_user: CurrentUser,
+):
+    return BatchUploadResponse(results=await service.upload_video_files(files, client_email=email))
+
+
+@router.post("/presigned-upload/{email}", response_model=PresignedUploadResponse)
+@authorize(role=[UserRoles.MODERATOR, UserRoles.BASE_USER])
+async def create_presigned_upload(
+    email: OwnEmail, metadata: PresignedUploadRequest, service: SaveBucket, current_user: CurrentUser
+):
+    return await service.create_presigned_upload(metadata, client_email=email)
+
+
+@router.post("/presigned-upload/{email}/complete", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
+@authorize(role=[UserRoles.MODERATOR, UserRoles.BASE_USER])
+async def complete_presigned_upload(
+    email: OwnEmail, upload: CompleteUploadRequest, service: SaveBucket, current_user: CurrentUser
+):
+    return JobAccepted(job_id=await service.complete_presigned_upload(upload, client_email=email))
+
+
+@router.post("/uploads/{email}", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+@authorize(role=[UserRoles.MODERATOR, UserRoles.BASE_USER])
+async def create_upload_session(
+    email: OwnEmail, upload: UploadSessionRequest, service: SaveBucket, current_user: CurrentUser
+):
+    return await service.create_upload_session(upload, client_email=email)
+
+
+@router.get("/uploads/{email}/{session_id}", response_model=UploadSessionResponse)
+@authorize(role=[UserRoles.MODERATOR, UserRoles.BASE_USER])
+async def get_upload_session(email: OwnEmail, session_id: str, service: SaveBucket, current_user: CurrentUser):
+    return await service.get_upload_session(session_id, client_email=email)
+
+
+@router.put("/uploads/{email}/{session_id}/parts/{part_number}", response_model=UploadSessionPart)
+@guarded_by(admit_upload)
+@authorize(role=[UserRoles.MODERATOR, UserRoles.BASE_USER])
+async def upload_session_part(
+    email: OwnEmail,
+    session_id: str,
+    part_number: Annotated[int, Path(ge=1)],
+    request: Request,
+    service: SaveBucket,
+    current_user: CurrentUser,
+):
+    return await service.upload_session_part(session_id, email, part_number, request.stream())
+
+
+@router.post("/uploads/{email}/{session_id}/complete", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
+@authorize(role=[UserRoles.MODERATOR, UserRoles.BASE_USER])
+async def complete_upload_session(email: OwnEmail, session_id: str, service: SaveBucket, current_user: CurrentUser):
+    return JobAccepted(job_id=await service.complete_upload_session(session_id, client_email=email))
+
+
+@router.delete("/uploads/{email}/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+@authorize(role=[UserRoles.MODERATOR, UserRoles.BASE_USER])
+async def abort_upload_session(email: OwnEmail, session_id: str, service: SaveBucket, current_user: CurrentUser):
+    await service.abort_upload_session(session_id, client_email=email)
+
+
+@router.get("/files", response_model=FileListPage)
+@authorize(role=[UserRoles.MODERATOR, UserRoles.BASE_USER])
+async def list_files(
+    service: DownloadBucket,
+    current_user: CurrentUser,
+    limit: Annotated[int, Query(ge=1, le=1000)] = settings.file_list_page_size,
+    cursor: Optional[str] = None,
+    accept: Annotated[Optional[str], Header()] = None,
+):
+    """
+    Lists the caller's files one page at a time; pass ``next_cursor`` back as ``cursor`` for the next page.
+    With ``Accept: application/x-ndjson`` every file from ``cursor`` on is streamed, one JSON object per line.
+    """
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return await service.stream_files(current_user.email, cursor=cursor)
+    return await service.list_files(current_user.email, limit=limit, cursor=cursor)
+
+
+@router.get("/download")
+@authorize(role=[UserRoles.MODERATOR, UserRoles.BASE_USER])
+async def download(
+    file_name: str,
+    service: DownloadBucket,
+    current_user: CurrentUser,
+    redirect: Optional[bool] = None,
+    range_header: Annotated[Optional[str], Header(alias="Range")] = None,
+    if_range: Annotated[Optional[str], Header()] = None,
+):
+    if settings.download_redirect if redirect is None else redirect:
+        return await service.redirect_to_video_file(file_name, client_email=current_user.email)
+    return await service.download_video_file(
+        file_name, client_email=current_user.email, range_header=range_header, if_range=if_range
+    )
@@ -0,0 +1,47 @@
+from typing import Annotated
+from typing import AsyncIterator
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi.responses import StreamingResponse
+
+from app.core.dependencies import CurrentUser
+from app.core.exceptions import NotFoundError
+from app.core.settings import settings
+from app.helpers.job_index import get_job_index
+from app.helpers.job_index import JobIndex
+from app.schemas.job_schema import JobStatus
+from app.schemas.user_schema import User
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+Jobs = Annotated[JobIndex, Depends(get_job_index)]
+
+
+def _get_job(jobs: JobIndex, job_id: str, current_user: User) -> JobStatus:
+    """The job if it belongs to the caller; other users' jobs and jobs of unknown owner are not found."""
+    status = jobs.get(job_id)
+    if status is None or status.client_email is None or status.client_email != current_user.email:
+        raise NotFoundError(detail="Job not found")
+    return status
+
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str, jobs: Jobs, current_user: CurrentUser):
+    return _get_job(jobs, job_id, current_user)
+
+
+@router.get("/{job_id}/events", response_class=StreamingResponse)
+async def job_events(job_id: str, jobs: Jobs, current_user: CurrentUser):
+    """Server-sent events: one ``status`` event per change, ending once the job completes or fails."""
+    _get_job(jobs, job_id, current_user)
+
+    async def events() -> AsyncIterator[str]:
+        async for status in jobs.watch(job_id, heartbeat=settings.job_events_heartbeat):
+            if status is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: status\ndata: {status.model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
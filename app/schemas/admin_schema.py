@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    hits: int
+    shared_hits: int
+    misses: int
+    coalesced: int
+    size: int
+    max_entries: int
+    hit_ratio: float
+
+
+class DownloadCacheStats(BaseModel):
+    hits: int
+    misses: int
+    coalesced: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+    bytes_saved: int
+    hit_ratio: float
@@ -1,10 +1,23 @@
+from datetime import datetime
+from typing import Any
+from typing import List
+from typing import Literal
 from typing import Optional
 
 from pydantic import BaseModel
 from pydantic import constr
 from pydantic import EmailStr
+from pydantic import Field
 from pydantic import field_validator
 
+ALLOWED_VIDEO_TYPES = [
+    "video/mp4",
+    "video/x-matroska",  # .mkv
+    "video/avi",
+    "video/webm",
+    "video/ogg",
+]
+
 
 class FileMetadata(BaseModel):
     file_name: constr(min_length=1)  # type: ignore
@@ -12,14 +25,7 @@ class FileMetadata(BaseModel):
 
     @field_validator("content_type")
     def check_content_type(cls, extension):
-        allowed_video_types = [
-            "video/mp4",
-            "video/x-matroska",  # .mkv
-            "video/avi",
-            "video/webm",
-            "video/ogg",
-        ]
-        if extension not in allowed_video_types:
+        if extension not in ALLOWED_VIDEO_TYPES:
             raise ValueError("File Type not allowed, please send a video file")
         return extension
 
@@ -27,3 +33,80 @@ class FileMetadata(BaseModel):
 class QueueMessage(FileMetadata):
     client_email: EmailStr
     download_link: Optional[str]
+
+
+class UploadResult(BaseModel):
+    file_name: Optional[str]
+    status: Literal["queued", "duplicate", "failed"]
+    job_id: Optional[str] = None
+    detail: Optional[Any] = None
+
+
+class BatchUploadResponse(BaseModel):
+    results: List[UploadResult]
+
+
+class StoredFile(BaseModel):
+    key: str
+    size: int
+    last_modified: datetime
+    etag: Optional[str] = None
+
+
+class FileListPage(BaseModel):
+    files: List[StoredFile]
+    next_cursor: Optional[str] = None
+
+
+class PresignedUploadRequest(FileMetadata):
+    size: Optional[int] = Field(default=None, ge=0)
+
+
+class PresignedPart(BaseModel):
+    part_number: int
+    url: str
+
+
+class PresignedUploadResponse(BaseModel):
+    upload_token: str
+    key: str
+    expires_in: int
+    url: Optional[str] = None
+    upload_id: Optional[str] = None
+    part_size: Optional[int] = None
+    parts: List[PresignedPart] = []
+
+
+class CompletedPart(BaseModel):
+    part_number: int = Field(ge=1, le=10_000)
+    etag: str
+
+
+class CompleteUploadRequest(BaseModel):
+    upload_token: constr(min_length=1)  # type: ignore
+    key: constr(min_length=1)  # type: ignore
+    upload_id: Optional[str] = None
+    parts: List[CompletedPart] = []
+
+
+class UploadSessionRequest(FileMetadata):
+    size: int = Field(ge=1)
+    chunk_size: Optional[int] = Field(default=None, ge=5 * 1024 * 1024)
+
+
+class UploadSessionPart(BaseModel):
+    part_number: int
+    offset: int
+    size: int
+
+
+class UploadSessionResponse(BaseModel):
+    session_id: str
+    key: str
+    size: int
+    chunk_size: int
+    part_count: int
+    expires_at: datetime
+    received_bytes: int
+    parts: List[UploadSessionPart] = []
+    missing_parts: List[int] = []
@@ -0,0 +1,37 @@
+from datetime import datetime
+from datetime import timezone
+from typing import Optional
+
+from pydantic import BaseModel
+from pydantic import Field
+
+from app.core.enums import JobStates
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    state: JobStates
+    file_name: Optional[str] = None
+    client_email: Optional[str] = None
+    download_link: Optional[str] = None
+    detail: Optional[str] = None
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class JobStatusMessage(BaseModel):
+    """
+    Status update published by the converter; ``job_id`` falls back to the AMQP correlation/message id.
+
+    The gateway announces queued jobs on the same exchange with their file name and owner.
+    """
+
+    job_id: Optional[str] = None
+    state: JobStates
+    file_name: Optional[str] = None
+    client_email: Optional[str] = None
+    download_link: Optional[str] = None
+    detail: Optional[str] = None
@@ -1,8 +1,9 @@
 from aiohttp import ClientSession
-from aiohttp.client_exceptions import ClientConnectionError
+from aiohttp.client_exceptions import ClientError
 
 from app.core.exceptions import AuthError
 from app.core.exceptions import BadRequestError
+from app.core.outbound import auth_policy
 from app.core.settings import settings
 from app.schemas.auth_schema import SignIn
 
@@ -13,11 +14,17 @@ class AuthService:
 
     async def sign_in(self, schema: SignIn):
         url = settings.AUTH_SERVICE_URL
-        try:
+
+        async def post_sign_in() -> tuple[int, dict]:
             async with self.client.post(f"{url}/sign-in", json=schema.model_dump()) as response:
-                data = await response.json()
-                if response.status != 200:
-                    raise AuthError(detail=data["detail"])
-                return data
-        except ClientConnectionError as _:
+                if response.status >= 500:
+                    response.raise_for_status()
+                return response.status, await response.json()
+
+        try:
+            status_code, data = await auth_policy.call("sign_in", post_sign_in)
+        except ClientError as _:
             raise BadRequestError(detail="Auth Service not available")
+        if status_code != 200:
+            raise AuthError(detail=data["detail"])
+        return data
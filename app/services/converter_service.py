@@ -1,61 +1,738 @@
+import asyncio
+import hashlib
+import math
 import os
+import re
+from datetime import datetime
+from datetime import timezone
+from email.utils import format_datetime
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from uuid import uuid4
 
-import pika
+from fastapi import HTTPException
 from fastapi import UploadFile
+from fastapi.responses import RedirectResponse
+from fastapi.responses import Response
 from fastapi.responses import StreamingResponse
-from pika.adapters.blocking_connection import BlockingChannel
 from pydantic import EmailStr
+from pydantic import ValidationError as PydanticValidationError
 
+from app.core.enums import JobStates
 from app.core.exceptions import BadRequestError
+from app.core.exceptions import NotFoundError
+from app.core.exceptions import ObjectNotFoundError
+from app.core.exceptions import PayloadTooLargeError
+from app.core.exceptions import PreconditionFailedError
+from app.core.exceptions import RangeNotSatisfiableError
+from app.core.exceptions import ValidationError
+from app.core.metrics import stage_duration
+from app.core.metrics import transferred_bytes
 from app.core.settings import settings
 from app.helpers import AsyncS3Manager
+from app.helpers import Outbox
+from app.helpers import RabbitPublisher
+from app.helpers.container_sniffer import resolve_content_type
+from app.helpers.container_sniffer import SNIFF_SIZE
+from app.helpers.content_index import ContentIndex
+from app.helpers.content_index import DIGEST_METADATA_KEY
+from app.helpers.content_index import JOB_METADATA_KEY
+from app.helpers.content_index import REQUESTER_METADATA_KEY
+from app.helpers.download_cache import CachedFileResponse
+from app.helpers.download_cache import CachedRangeResponse
+from app.helpers.download_cache import DownloadCache
+from app.helpers.download_cache import ObjectVersion
+from app.helpers.job_index import JobIndex
+from app.helpers.outbox import OutboxRecord
+from app.helpers.presigned_url_cache import PresignedUrlCache
+from app.helpers.rabbit_publisher import OutgoingMessage
+from app.helpers.rabbit_publisher import persistent_json
+from app.helpers.upload_sessions import UploadedPart
+from app.helpers.upload_sessions import UploadSession
+from app.helpers.upload_sessions import UploadSessionStore
+from app.schemas.file_schema import CompleteUploadRequest
+from app.schemas.file_schema import FileListPage
+from app.schemas.file_schema import PresignedPart
+from app.schemas.file_schema import PresignedUploadRequest
+from app.schemas.file_schema import PresignedUploadResponse
 from app.schemas.file_schema import QueueMessage
+from app.schemas.file_schema import StoredFile
+from app.schemas.file_schema import UploadResult
+from app.schemas.file_schema import UploadSessionPart
+from app.schemas.file_schema import UploadSessionRequest
+from app.schemas.file_schema import UploadSessionResponse
+
+MAX_MULTIPART_PARTS = 10_000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+_BYTE_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _StoredUpload(NamedTuple):
+    key: str
+    job_id: str
+    digest: Optional[str]
+    queue_message: Optional[QueueMessage]
+
+
+def parse_byte_range(range_header: Optional[str]) -> Optional[str]:
+    """Returns a single ``bytes=`` range S3 can serve, or None when the header should be ignored."""
+    if not range_header:
+        return None
+    match = _BYTE_RANGE_PATTERN.match(range_header.replace(" ", ""))
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if start and end and int(end) < int(start):
+        return None
+    return f"bytes={start}-{end}"
 
 
 class ConverterService:
-    def __init__(self, async_s3: AsyncS3Manager, bucket_name: str, rabbit_channel: BlockingChannel) -> None:
+    def __init__(
+        self,
+        async_s3: AsyncS3Manager,
+        bucket_name: str,
+        publisher: Optional[RabbitPublisher] = None,
+        outbox: Optional[Outbox] = None,
+        url_cache: Optional[PresignedUrlCache] = None,
+        content_index: Optional[ContentIndex] = None,
+        upload_sessions: Optional[UploadSessionStore] = None,
+        job_index: Optional[JobIndex] = None,
+        download_cache: Optional[DownloadCache] = None,
+    ) -> None:
         self.async_s3 = async_s3
         self.bucket_name = bucket_name
-        self.rabbit_channel = rabbit_channel
+        self.publisher = publisher
+        self.outbox = outbox
+        self.url_cache = url_cache
+        self.content_index = content_index
+        self.upload_sessions = upload_sessions
+        self.job_index = job_index
+        self.download_cache = download_cache
 
-    async def upload_video_file(self, file: UploadFile, client_email: EmailStr) -> None:
-        queue_message = QueueMessage(
-            file_name=file.filename, content_type=file.content_type, client_email=client_email, download_link=None
+    async def upload_video_file(self, file: UploadFile, client_email: EmailStr) -> Optional[str]:
+        """Stores the file and queues its conversion; returns the conversion job id."""
+        stored = await self._store_video_file(file, client_email)
+        if stored.queue_message is None:
+            return stored.job_id
+        await self.publish_message(stored.key, stored.queue_message, message_id=stored.job_id)
+        self._index_content(stored, client_email)
+        return stored.job_id
+
+    async def upload_video_files(self, files: List[UploadFile], client_email: EmailStr) -> List[UploadResult]:
+        """
+        Stores several files, at most ``upload_batch_concurrency`` at a time, and queues all of their
+        conversions in one batch. Every file gets its own result, so a bad file does not fail the rest.
+        """
+        if len(files) > settings.upload_batch_max_files:
+            raise ValidationError(detail=f"At most {settings.upload_batch_max_files} files can be sent at once")
+
+        semaphore = asyncio.Semaphore(settings.upload_batch_concurrency)
+        keys = [os.path.basename(file.filename or "") for file in files]
+
+        async def store(index: int, file: UploadFile) -> _StoredUpload:
+            if keys.index(keys[index]) != index:
+                raise ValidationError(detail="Another file in this batch has the same name")
+            async with semaphore:
+                return await self._store_video_file(file, client_email)
+
+        outcomes = await asyncio.gather(
+            *(store(index, file) for index, file in enumerate(files)), return_exceptions=True
         )
-        data = await file.read()
-        key = os.path.basename(queue_message.file_name)
+        results = [self._upload_result(file, outcome) for file, outcome in zip(files, outcomes)]
+
+        to_publish = [
+            (index, outcome)
+            for index, outcome in enumerate(outcomes)
+            if isinstance(outcome, _StoredUpload) and outcome.queue_message is not None
+        ]
+        records = [self._outbox_record(stored.queue_message, stored.job_id) for _, stored in to_publish]  # type: ignore
+        with stage_duration.labels("publish").time():
+            errors = await self._publish_many(records)
+        for (index, stored), error in zip(to_publish, errors):
+            if error is None:
+                self._index_content(stored, client_email)
+                self._track_job(stored.job_id, stored.key, client_email)
+                continue
+            await self.remove_video_file(stored.key)
+            results[index] = UploadResult(
+                file_name=files[index].filename, status="failed", detail="Error while trying to convert the file"
+            )
+        return results
 
+    async def _store_video_file(self, file: UploadFile, client_email: EmailStr) -> _StoredUpload:
+        """Validates and uploads the file; ``queue_message`` is None when the same content is already stored."""
+        # The container sniffed from the first bytes decides the type; the declared one only has to agree.
+        content_type = resolve_content_type(file.content_type, await file.read(SNIFF_SIZE))
+        await file.seek(0)
         try:
-            await self.async_s3.put_object(
+            queue_message = QueueMessage(
+                file_name=file.filename, content_type=content_type, client_email=client_email, download_link=None
+            )
+        except PydanticValidationError as error:
+            raise ValidationError(detail=error.errors(include_url=False, include_context=False, include_input=False))
+        key = self._user_key(client_email, queue_message.file_name)
+        # The converter fetches the object by the message's file name.
+        queue_message.file_name = key
+
+        metadata = None
+        digest = None
+        if self.content_index is not None:
+            with stage_duration.labels("content_hash").time():
+                digest = await self._hash_file(file)
+            existing_job = await self._find_duplicate(digest, client_email)
+            if existing_job is not None:
+                return _StoredUpload(key, existing_job, digest, None)
+            await file.seek(0)
+
+        job_id = uuid4().hex
+        if digest is not None:
+            metadata = {DIGEST_METADATA_KEY: digest, JOB_METADATA_KEY: job_id, REQUESTER_METADATA_KEY: client_email}
+        with stage_duration.labels("s3_upload").time():
+            await self.async_s3.upload_stream(
                 bucket_name=self.bucket_name,
                 key=key,  # type: ignore
-                data=bytes(data),
+                stream=self._read_chunks(file),
+                content_type=queue_message.content_type,
+                metadata=metadata,
+            )
+        transferred_bytes.labels("upload").inc(file.size or 0)
+        return _StoredUpload(key, job_id, digest, queue_message)
+
+    def _index_content(self, stored: _StoredUpload, client_email: EmailStr) -> None:
+        if stored.digest is not None:
+            self.content_index.add(stored.digest, stored.key, job_id=stored.job_id, requester=client_email)  # type: ignore
+
+    @staticmethod
+    def _upload_result(file: UploadFile, outcome) -> UploadResult:
+        if isinstance(outcome, _StoredUpload):
+            status = "queued" if outcome.queue_message is not None else "duplicate"
+            return UploadResult(file_name=file.filename, status=status, job_id=outcome.job_id)
+        if isinstance(outcome, HTTPException):
+            return UploadResult(file_name=file.filename, status="failed", detail=outcome.detail)
+        if isinstance(outcome, Exception):
+            return UploadResult(file_name=file.filename, status="failed", detail="Failed to store the file")
+        raise outcome
+
+    async def _hash_file(self, file: UploadFile) -> str:
+        digest = hashlib.sha256()
+        async for chunk in self._read_chunks(file):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    async def _find_duplicate(self, digest: str, client_email: EmailStr) -> Optional[str]:
+        """
+        Returns the job id of an already stored copy of this content, if that job serves this upload too.
+
+        Only the job's own requester is notified by the converter, and a failed job produces nothing,
+        so in those cases the content is stored and converted again. A job the job index does not
+        know (it finished before a restart, or was evicted) has produced its result already.
+        """
+        record = self.content_index.get(digest)  # type: ignore
+        if record is None or record.requester != client_email or not self._job_is_usable(record.job_id):
+            return None
+        try:
+            head = await self.async_s3.head_object(self.bucket_name, record.key)
+        except ObjectNotFoundError:
+            head = {}
+        if (head.get("Metadata") or {}).get(DIGEST_METADATA_KEY) != digest:
+            # The object was removed or overwritten since it was indexed.
+            self.content_index.discard(digest)  # type: ignore
+            return None
+        return record.job_id
+
+    def _job_is_usable(self, job_id: Optional[str]) -> bool:
+        if not job_id:
+            return False
+        status = self.job_index.get(job_id) if self.job_index is not None else None
+        return status is None or status.state != JobStates.FAILED
+
+    async def create_presigned_upload(
+        self, metadata: PresignedUploadRequest, client_email: EmailStr
+    ) -> PresignedUploadResponse:
+        """
+        Issues presigned URLs for a direct upload to the bucket.
+
+        The upload is recorded under a random ``upload_token``; only the same user can complete it,
+        and only for the key and multipart upload issued here.
+        """
+        key = self._user_key(client_email, metadata.file_name)
+        expires_in = settings.presigned_url_expiration
+        part_size = settings.s3_multipart_part_size
+
+        if metadata.size is None or metadata.size <= part_size:
+            url = await self.async_s3.generate_presigned_url(
+                "put_object",
+                {"Bucket": self.bucket_name, "Key": key, "ContentType": metadata.content_type},
+                expires_in=expires_in,
+            )
+            upload = await self.upload_sessions.create_presigned(  # type: ignore
+                uuid4().hex, self.bucket_name, key, None, client_email
+            )
+            return PresignedUploadResponse(upload_token=upload.upload_token, key=key, url=url, expires_in=expires_in)
+
+        part_size = max(part_size, math.ceil(metadata.size / MAX_MULTIPART_PARTS))
+        part_count = math.ceil(metadata.size / part_size)
+        upload_id = await self.async_s3.create_multipart_upload(
+            self.bucket_name, key, content_type=metadata.content_type
+        )
+        urls = await asyncio.gather(
+            *(
+                self.async_s3.generate_presigned_url(
+                    "upload_part",
+                    {"Bucket": self.bucket_name, "Key": key, "UploadId": upload_id, "PartNumber": part_number},
+                    expires_in=expires_in,
+                )
+                for part_number in range(1, part_count + 1)
+            )
+        )
+        upload = await self.upload_sessions.create_presigned(  # type: ignore
+            uuid4().hex, self.bucket_name, key, upload_id, client_email
+        )
+        return PresignedUploadResponse(
+            upload_token=upload.upload_token,
+            key=key,
+            expires_in=expires_in,
+            upload_id=upload_id,
+            part_size=part_size,
+            parts=[PresignedPart(part_number=number, url=url) for number, url in enumerate(urls, start=1)],
+        )
+
+    async def complete_presigned_upload(self, upload: CompleteUploadRequest, client_email: EmailStr) -> str:
+        issued = await self.upload_sessions.get_presigned(upload.upload_token)  # type: ignore
+        if (
+            issued is None
+            or issued.client_email != client_email
+            or issued.bucket != self.bucket_name
+            or issued.key != upload.key
+            or issued.upload_id != (upload.upload_id or None)
+        ):
+            raise NotFoundError(detail="Upload not found")
+
+        key = issued.key
+        if issued.upload_id:
+            parts = sorted(upload.parts, key=lambda part: part.part_number)
+            await self.async_s3.complete_multipart_upload(
+                self.bucket_name,
+                key,
+                issued.upload_id,
+                [{"PartNumber": part.part_number, "ETag": part.etag} for part in parts],
+            )
+
+        head = await self.async_s3.head_object(self.bucket_name, key)
+        await self.upload_sessions.delete_presigned(issued.upload_token)  # type: ignore
+        try:
+            queue_message = QueueMessage(
+                file_name=key, content_type=head.get("ContentType"), client_email=client_email, download_link=None
             )
-        except Exception as error:
-            raise error
-        await self.publish_message(queue_message.file_name, queue_message)
-        # se for retornar, vai ser por que preciso retornar o id desse arqruivo
-        # mas como o id e o proprio nome do arquivo, entao podemos usar ele e nao
-        # precisamos retornar o id, ----- VOU CHECKAR COM SENIOR PARA VER QUAL A ACAO MAIS LOGICA
+        except PydanticValidationError:
+            await self.remove_video_file(key)
+            raise ValidationError(detail="File Type not allowed, please send a video file")
+        try:
+            queue_message.content_type = resolve_content_type(queue_message.content_type, await self._read_head(key))
+        except ValidationError:
+            await self.remove_video_file(key)
+            raise
+        return await self.publish_message(key, queue_message)
+
+    async def _read_head(self, key: str) -> bytes:
+        try:
+            response = await self.async_s3.stream_object(self.bucket_name, key, byte_range=f"bytes=0-{SNIFF_SIZE - 1}")
+        except RangeNotSatisfiableError:
+            return b""
+        return b"".join([chunk async for chunk in response["Body"]])
 
-    async def download_video_file(self, object_name: str):
-        response = await self.async_s3.get_object(self.bucket_name, key=object_name)
-        content = response["Content"]
-        content_type = response.get("ContentType", "application/octet-stream")
+    async def create_upload_session(
+        self, request: UploadSessionRequest, client_email: EmailStr
+    ) -> UploadSessionResponse:
+        key = self._user_key(client_email, request.file_name)
+        max_chunk_size = settings.upload_session_max_chunk_size
+        if request.chunk_size is not None and request.chunk_size > max_chunk_size:
+            raise ValidationError(detail=f"chunk_size must be at most {max_chunk_size} bytes")
+        chunk_size = max(
+            request.chunk_size or min(settings.s3_multipart_part_size, max_chunk_size),
+            math.ceil(request.size / MAX_MULTIPART_PARTS),
+        )
+        if chunk_size > max_chunk_size:
+            raise PayloadTooLargeError(detail=f"Uploads are limited to {max_chunk_size * MAX_MULTIPART_PARTS} bytes")
+        upload_id = await self.async_s3.create_multipart_upload(
+            self.bucket_name, key, content_type=request.content_type
+        )
+        session = await self.upload_sessions.create(  # type: ignore
+            session_id=uuid4().hex,
+            bucket=self.bucket_name,
+            key=key,
+            upload_id=upload_id,
+            content_type=request.content_type,
+            client_email=client_email,
+            size=request.size,
+            chunk_size=chunk_size,
+        )
+        return self._upload_session_response(session, [])
 
-        return StreamingResponse(bytes(content), media_type=content_type)
+    async def get_upload_session(self, session_id: str, client_email: EmailStr) -> UploadSessionResponse:
+        session = await self._get_upload_session(session_id, client_email)
+        return self._upload_session_response(session, await self.upload_sessions.parts(session_id))  # type: ignore
+
+    async def upload_session_part(
+        self, session_id: str, client_email: EmailStr, part_number: int, stream: AsyncIterator[bytes]
+    ) -> UploadSessionPart:
+        session = await self._get_upload_session(session_id, client_email)
+        if not 1 <= part_number <= session.part_count:
+            raise ValidationError(detail=f"Part number must be between 1 and {session.part_count}")
+
+        expected_size = session.part_size(part_number)
+        if expected_size > settings.upload_session_max_chunk_size:
+            raise PayloadTooLargeError(detail=f"Part {part_number} is larger than the gateway accepts")
+        # The first part carries the container header: sniff it as soon as enough bytes arrived.
+        content_type = None if part_number == 1 else session.content_type
+        body = bytearray()
+        async for chunk in stream:
+            body.extend(chunk)
+            if len(body) > expected_size:
+                raise PayloadTooLargeError(detail=f"Part {part_number} must be exactly {expected_size} bytes")
+            if content_type is None and len(body) >= min(SNIFF_SIZE, expected_size):
+                content_type = resolve_content_type(session.content_type, body[:SNIFF_SIZE])
+        if len(body) != expected_size:
+            raise ValidationError(detail=f"Part {part_number} must be exactly {expected_size} bytes")
+        if content_type != session.content_type:
+            await self.upload_sessions.set_content_type(session_id, content_type)  # type: ignore
+
+        with stage_duration.labels("s3_upload").time():
+            # The part is sent straight from the receive buffer: ``chunk_size`` bounds it, and no copy is made.
+            etag = await self.async_s3.upload_part(session.bucket, session.key, session.upload_id, part_number, body)
+        transferred_bytes.labels("upload").inc(len(body))
+        await self.upload_sessions.record_part(session_id, UploadedPart(part_number, expected_size, etag))  # type: ignore
+        return UploadSessionPart(
+            part_number=part_number, offset=(part_number - 1) * session.chunk_size, size=expected_size
+        )
+
+    async def complete_upload_session(self, session_id: str, client_email: EmailStr) -> str:
+        session = await self._get_upload_session(session_id, client_email)
+        parts = await self.upload_sessions.parts(session_id)  # type: ignore
+        missing_parts = self._missing_parts(session, parts)
+        if missing_parts:
+            raise ValidationError(detail={"message": "Upload is incomplete", "missing_parts": missing_parts})
+
+        await self.async_s3.complete_multipart_upload(
+            session.bucket,
+            session.key,
+            session.upload_id,
+            [{"PartNumber": part.part_number, "ETag": part.etag} for part in parts],
+        )
+        await self.upload_sessions.delete(session_id)  # type: ignore
+        queue_message = QueueMessage(
+            file_name=session.key, content_type=session.content_type, client_email=client_email, download_link=None
+        )
+        return await self.publish_message(session.key, queue_message)
+
+    async def abort_upload_session(self, session_id: str, client_email: EmailStr) -> None:
+        session = await self._get_upload_session(session_id, client_email)
+        await self.async_s3.abort_multipart_upload(session.bucket, session.key, session.upload_id)
+        await self.upload_sessions.delete(session_id)  # type: ignore
+
+    async def _get_upload_session(self, session_id: str, client_email: EmailStr) -> UploadSession:
+        session = await self.upload_sessions.get(session_id)  # type: ignore
+        if session is None or session.client_email != client_email or session.bucket != self.bucket_name:
+            raise NotFoundError(detail="Upload session not found")
+        return session
+
+    @staticmethod
+    def _missing_parts(session: UploadSession, parts: List[UploadedPart]) -> List[int]:
+        received = {part.part_number for part in parts}
+        return [number for number in range(1, session.part_count + 1) if number not in received]
+
+    def _upload_session_response(self, session: UploadSession, parts: List[UploadedPart]) -> UploadSessionResponse:
+        return UploadSessionResponse(
+            session_id=session.session_id,
+            key=session.key,
+            size=session.size,
+            chunk_size=session.chunk_size,
+            part_count=session.part_count,
+            expires_at=datetime.fromtimestamp(session.expires_at, tz=timezone.utc),
+            received_bytes=sum(part.size for part in parts),
+            parts=[
+                UploadSessionPart(
+                    part_number=part.part_number, offset=(part.part_number - 1) * session.chunk_size, size=part.size
+                )
+                for part in parts
+            ],
+            missing_parts=self._missing_parts(session, parts),
+        )
+
+    @staticmethod
+    async def _read_chunks(file: UploadFile, chunk_size: int = settings.upload_read_chunk_size) -> AsyncIterator[bytes]:
+        while chunk := await file.read(chunk_size):
+            yield chunk
+
+    async def list_files(self, client_email: EmailStr, limit: int, cursor: Optional[str] = None) -> FileListPage:
+        """One page of the user's files; ``next_cursor`` is S3's continuation token for the next one."""
+        page = await self.async_s3.list_objects_page(
+            self.bucket_name, self._files_prefix(client_email), max_keys=limit, continuation_token=cursor
+        )
+        return FileListPage(
+            files=[self._stored_file(obj) for obj in page["Contents"]], next_cursor=page["NextContinuationToken"]
+        )
+
+    async def stream_files(self, client_email: EmailStr, cursor: Optional[str] = None) -> StreamingResponse:
+        """Every file of the user from ``cursor`` on as NDJSON, listed one page at a time while it is sent."""
+        objects = self.async_s3.iter_objects(
+            self.bucket_name,
+            self._files_prefix(client_email),
+            page_size=settings.file_list_page_size,
+            continuation_token=cursor,
+        )
+        # Fetched before the response starts, so a bad cursor is still reported as a 400.
+        first = await anext(objects, None)
+
+        async def lines() -> AsyncIterator[str]:
+            if first is None:
+                return
+            yield self._stored_file(first).model_dump_json() + "\n"
+            async for obj in objects:
+                yield self._stored_file(obj).model_dump_json() + "\n"
+
+        return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+    @staticmethod
+    def _files_prefix(client_email: EmailStr) -> str:
+        return settings.user_files_prefix.format(email=client_email)
+
+    @classmethod
+    def _user_key(cls, client_email: EmailStr, file_name: str) -> str:
+        """Every upload is stored under its user's prefix, where ``list_files`` finds it."""
+        return cls._files_prefix(client_email) + os.path.basename(file_name)
+
+    @classmethod
+    def _check_owner(cls, object_name: str, client_email: EmailStr) -> None:
+        """Only keys under the user's own prefix can be downloaded; any other key is reported as not found."""
+        if not object_name.startswith(cls._files_prefix(client_email)):
+            raise NotFoundError(detail="File not found")
+
+    @staticmethod
+    def _stored_file(obj: dict) -> StoredFile:
+        return StoredFile(key=obj["Key"], size=obj["Size"], last_modified=obj["LastModified"], etag=obj.get("ETag"))
+
+    async def download_video_file(
+        self,
+        object_name: str,
+        client_email: EmailStr,
+        range_header: Optional[str] = None,
+        if_range: Optional[str] = None,
+    ) -> Response:
+        self._check_owner(object_name, client_email)
+        byte_range = parse_byte_range(range_header)
+        if self.download_cache is not None:
+            cached = await self._download_from_cache(object_name, byte_range, if_range)
+            if cached is not None:
+                return cached
+
+        conditions = self._if_range_conditions(if_range) if byte_range else {}
+        if conditions is None:
+            byte_range, conditions = None, {}
+
+        try:
+            response = await self.async_s3.stream_object(
+                self.bucket_name, key=object_name, byte_range=byte_range, **conditions
+            )
+        except PreconditionFailedError:
+            # If-Range did not match the current representation: send the whole object instead.
+            response = await self.async_s3.stream_object(self.bucket_name, key=object_name)
+
+        headers = {"Accept-Ranges": "bytes"}
+        if response["ContentLength"] is not None:
+            headers["Content-Length"] = str(response["ContentLength"])
+        if response["ContentRange"]:
+            headers["Content-Range"] = response["ContentRange"]
+        if response["ETag"]:
+            headers["ETag"] = response["ETag"]
+        if response["LastModified"]:
+            headers["Last-Modified"] = format_datetime(response["LastModified"].astimezone(timezone.utc), usegmt=True)
+
+        return StreamingResponse(
+            self._count_download(response["Body"]),
+            status_code=206 if response["ContentRange"] else 200,
+            media_type=response["ContentType"],
+            headers=headers,
+        )
+
+    async def _download_from_cache(
+        self, object_name: str, byte_range: Optional[str], if_range: Optional[str]
+    ) -> Optional[Response]:
+        """
+        Serves an object, or the requested range of it, from the local disk cache.
+
+        A whole-object request that misses downloads the object into the cache first; a range
+        request that misses starts that download in the background and is answered from S3.
+        Returns None whenever the caller should stream from S3 as usual: the object is not
+        cacheable (too large, no ETag), is not cached yet for a range, or was replaced in S3
+        since its version was read.
+        """
+        cache: DownloadCache = self.download_cache  # type: ignore
+        version = cache.version(self.bucket_name, object_name)
+        if version is None:
+            head = await self.async_s3.head_object(self.bucket_name, object_name)
+            version = ObjectVersion(head.get("ETag"), head.get("ContentLength"), head.get("LastModified"))
+            cache.remember_version(self.bucket_name, object_name, version)
+        if not version.etag or not cache.cacheable(version.size):
+            return None
+
+        span = None
+        if byte_range is not None and self._if_range_matches(if_range, version):
+            span = self._resolve_range(byte_range, version.size)  # type: ignore
+
+        etag = version.etag
+
+        def open_object():
+            return self.async_s3.stream_object(self.bucket_name, key=object_name, if_match=etag)
+
+        served = None if span is None else span[1] - span[0] + 1
+        entry = cache.acquire(self.bucket_name, object_name, etag, served=served)
+        if entry is None and span is not None:
+            cache.prefetch(self.bucket_name, object_name, etag, open_object)
+            return None
+        if entry is None:
+            try:
+                with stage_duration.labels("download_cache_fill").time():
+                    entry = await cache.fill(self.bucket_name, object_name, etag, open_object)
+            except PreconditionFailedError:
+                cache.forget_version(self.bucket_name, object_name)
+                return None
+            if entry is None:
+                return None
+
+        headers = {"Accept-Ranges": "bytes", "ETag": etag}
+        if entry.last_modified:
+            headers["Last-Modified"] = format_datetime(entry.last_modified.astimezone(timezone.utc), usegmt=True)
+        if span is not None:
+            transferred_bytes.labels("download").inc(served)  # type: ignore
+            return CachedRangeResponse(cache, entry, span[0], span[1], headers=headers)
+        transferred_bytes.labels("download").inc(entry.size)
+        return CachedFileResponse(cache, entry, headers=headers)
+
+    @classmethod
+    def _if_range_matches(cls, if_range: Optional[str], version: ObjectVersion) -> bool:
+        """Whether a Range request applies to ``version``; otherwise the whole object is sent."""
+        conditions = cls._if_range_conditions(if_range)
+        if conditions is None:
+            return False
+        if "if_match" in conditions:
+            return conditions["if_match"] == version.etag
+        if "if_unmodified_since" in conditions:
+            return version.last_modified is not None and version.last_modified <= conditions["if_unmodified_since"]
+        return True
+
+    @staticmethod
+    def _resolve_range(byte_range: str, size: int) -> Tuple[int, int]:
+        """The first and last byte a ``bytes=`` range selects from ``size`` bytes, as S3 would serve them."""
+        start, end = byte_range[len("bytes=") :].split("-")
+        if not start:
+            first, last = max(0, size - int(end)), size - 1
+        else:
+            first, last = int(start), min(int(end), size - 1) if end else size - 1
+        if first > last:
+            raise RangeNotSatisfiableError(headers={"Content-Range": f"bytes */{size}"})
+        return first, last
+
+    @staticmethod
+    async def _count_download(body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        counter = transferred_bytes.labels("download")
+        async for chunk in body:
+            counter.inc(len(chunk))
+            yield chunk
+
+    async def redirect_to_video_file(self, object_name: str, client_email: EmailStr) -> RedirectResponse:
+        self._check_owner(object_name, client_email)
+        if self.url_cache is not None:
+            url = await self.url_cache.get_download_url(self.bucket_name, object_name)
+        else:
+            url = await self.async_s3.generate_presigned_url(
+                "get_object", {"Bucket": self.bucket_name, "Key": object_name}
+            )
+        return RedirectResponse(url, status_code=302)
+
+    @staticmethod
+    def _if_range_conditions(if_range: Optional[str]) -> Optional[dict]:
+        """Maps If-Range onto S3 conditional GET arguments; None means the Range header must be ignored."""
+        if not if_range:
+            return {}
+        if_range = if_range.strip()
+        if if_range.startswith("W/"):
+            return None
+        if if_range.startswith('"'):
+            return {"if_match": if_range}
+        try:
+            return {"if_unmodified_since": parsedate_to_datetime(if_range)}
+        except (TypeError, ValueError):
+            return None
 
     async def remove_video_file(self, object_name: str):
         await self.async_s3.delete_object(self.bucket_name, object_name)
+        if self.url_cache is not None:
+            self.url_cache.invalidate(self.bucket_name, object_name)
+        if self.content_index is not None:
+            self.content_index.discard_key(object_name)
 
-    async def publish_message(self, object_name: str, queue_message: QueueMessage):
+    async def publish_message(
+        self, object_name: str, queue_message: QueueMessage, message_id: Optional[str] = None
+    ) -> str:
+        record = self._outbox_record(queue_message, message_id)
         try:
-            self.rabbit_channel.basic_publish(
-                exchange=settings.UPLOAD_EXCHANGE,
-                routing_key=settings.UPLOAD_ROUTING_KEY,
-                body=queue_message.model_dump_json(),
-                properties=pika.BasicProperties(delivery_mode=pika.spec.PERSISTENT_DELIVERY_MODE),
-            )
+            with stage_duration.labels("publish").time():
+                await self._publish(record)
         except Exception as _:
             await self.remove_video_file(object_name)
             raise BadRequestError(detail="Error while trying to convert the file")
+        self._track_job(record.message_id, object_name, queue_message.client_email)
+        return record.message_id
+
+    def _track_job(self, job_id: str, object_name: str, client_email: EmailStr) -> None:
+        if self.job_index is not None:
+            self.job_index.track(job_id, file_name=object_name, client_email=client_email)
+
+    @staticmethod
+    def _outbox_record(queue_message: QueueMessage, message_id: Optional[str] = None) -> OutboxRecord:
+        return OutboxRecord(
+            message_id=message_id or uuid4().hex,
+            body=queue_message.model_dump_json().encode(),
+            routing_key=settings.UPLOAD_ROUTING_KEY,
+            exchange=settings.UPLOAD_EXCHANGE or "",
+        )
+
+    async def _publish_many(self, records: List[OutboxRecord]) -> List[Optional[BaseException]]:
+        """Publishes the records as one batch; returns None or the error for each of them."""
+        if not records:
+            return []
+        if self.outbox is not None:
+            try:
+                await self.outbox.enqueue_many(records)
+            except Exception as error:
+                return [error] * len(records)
+            return [None] * len(records)
+        return await self.publisher.publish_batch(  # type: ignore
+            OutgoingMessage(
+                record.body,
+                routing_key=record.routing_key,
+                exchange=record.exchange,
+                properties=persistent_json(record.message_id),
+            )
+            for record in records
+        )
+
+    async def _publish(self, record: OutboxRecord) -> None:
+        if self.outbox is not None:
+            await self.outbox.enqueue(record)
+        else:
+            await self.publisher.publish(  # type: ignore
+                record.body,
+                routing_key=record.routing_key,
+                exchange=record.exchange,
+                properties=persistent_json(record.message_id),
+            )
@@ -0,0 +1,346 @@
+"""In-process stand-ins for the gateway's dependencies: an S3-compatible stub, the auth service and a RabbitMQ broker."""
+
+import asyncio
+import hashlib
+import re
+import uuid
+from datetime import datetime
+from datetime import timezone
+from email.utils import format_datetime
+from typing import Dict
+from typing import Optional
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+from pika import frame
+from pika.spec import Basic
+from pika.spec import Channel
+from pika.spec import Confirm
+from pika.spec import Connection
+from pika.spec import Queue
+
+S3_NAMESPACE = "http://s3.amazonaws.com/doc/2006-03-01/"
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+async def _start_site(app: web.Application, host: str, port: int) -> web.AppRunner:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner
+
+
+def _bound_port(runner: web.AppRunner) -> int:
+    return runner.addresses[0][1]
+
+
+class StoredObject:
+    def __init__(self, body: bytes, content_type: Optional[str], metadata: Dict[str, str]) -> None:
+        self.body = body
+        self.content_type = content_type or "binary/octet-stream"
+        self.metadata = metadata
+        self.etag = f'"{hashlib.md5(body).hexdigest()}"'
+        self.last_modified = datetime.now(timezone.utc)
+
+
+class FakeS3:
+    """Keeps objects in memory and answers the subset of the S3 REST API the gateway uses (path-style)."""
+
+    def __init__(self) -> None:
+        self.objects: Dict[tuple, StoredObject] = {}
+        self.uploads: Dict[str, dict] = {}
+        self.requests = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application(client_max_size=1024**4)
+        app.router.add_route("*", "/{bucket}", self._bucket)
+        app.router.add_route("*", "/{bucket}/{key:.+}", self._object)
+        self._runner = await _start_site(app, host, port)
+        return f"http://{host}:{_bound_port(self._runner)}"
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+    def put(self, bucket: str, key: str, body: bytes, content_type: Optional[str] = None) -> None:
+        self.objects[(bucket, key)] = StoredObject(body, content_type, {})
+
+    async def _bucket(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        bucket = request.match_info["bucket"]
+        if request.method == "HEAD":
+            return web.Response()
+        prefix = request.query.get("prefix", "")
+        matching = [
+            (key, obj) for (name, key), obj in sorted(self.objects.items()) if name == bucket and key.startswith(prefix)
+        ]
+        # ListObjectsV2 paging; the continuation token is simply the offset of the next page.
+        start = int(request.query.get("continuation-token", 0))
+        end = start + int(request.query.get("max-keys", 1000))
+        contents = "".join(
+            f"<Contents><Key>{escape(key)}</Key><Size>{len(obj.body)}</Size><ETag>{escape(obj.etag)}</ETag>"
+            f"<LastModified>{obj.last_modified.isoformat()}</LastModified></Contents>"
+            for key, obj in matching[start:end]
+        )
+        truncated = end < len(matching)
+        next_token = f"<NextContinuationToken>{end}</NextContinuationToken>" if truncated else ""
+        return self._xml(
+            f'<ListBucketResult xmlns="{S3_NAMESPACE}"><Name>{bucket}</Name><Prefix>{escape(prefix)}</Prefix>'
+            f"<IsTruncated>{str(truncated).lower()}</IsTruncated>{next_token}{contents}</ListBucketResult>"
+        )
+
+    async def _object(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        bucket, key = request.match_info["bucket"], request.match_info["key"]
+        query = request.query
+        if request.method == "POST" and "uploads" in query:
+            upload_id = uuid.uuid4().hex
+            self.uploads[upload_id] = {
+                "content_type": request.headers.get("Content-Type"),
+                "metadata": self._metadata(request),
+                "parts": {},
+            }
+            return self._xml(
+                f'<InitiateMultipartUploadResult xmlns="{S3_NAMESPACE}"><Bucket>{bucket}</Bucket>'
+                f"<Key>{escape(key)}</Key><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+            )
+        if "uploadId" in query:
+            return await self._multipart(request, bucket, key, query["uploadId"])
+        if request.method == "PUT":
+            body = await self._read_body(request)
+            stored = StoredObject(body, request.headers.get("Content-Type"), self._metadata(request))
+            self.objects[(bucket, key)] = stored
+            return web.Response(headers={"ETag": stored.etag})
+        if request.method == "DELETE":
+            self.objects.pop((bucket, key), None)
+            return web.Response(status=204)
+
+        stored = self.objects.get((bucket, key))
+        if stored is None:
+            if request.method == "HEAD":
+                return web.Response(status=404)
+            return self._error(404, "NoSuchKey", "The specified key does not exist.")
+        headers = {
+            "ETag": stored.etag,
+            "Last-Modified": format_datetime(stored.last_modified, usegmt=True),
+            "Content-Type": stored.content_type,
+            "Accept-Ranges": "bytes",
+            **{f"x-amz-meta-{name}": value for name, value in stored.metadata.items()},
+        }
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(stored.body))
+            return web.Response(headers=headers)
+        return self._get(request, stored, headers)
+
+    def _get(self, request: web.Request, stored: StoredObject, headers: dict) -> web.Response:
+        size = len(stored.body)
+        match = _RANGE_PATTERN.match(request.headers.get("Range", ""))
+        if not match:
+            return web.Response(body=stored.body, headers=headers)
+        start, end = match.groups()
+        if not start:
+            first, last = max(0, size - int(end)), size - 1
+        else:
+            first, last = int(start), min(int(end) if end else size - 1, size - 1)
+        if first >= size or first > last:
+            return self._error(416, "InvalidRange", "The requested range is not satisfiable", ActualObjectSize=size)
+        headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+        return web.Response(status=206, body=stored.body[first : last + 1], headers=headers)
+
+    async def _multipart(self, request: web.Request, bucket: str, key: str, upload_id: str) -> web.Response:
+        upload = self.uploads.get(upload_id)
+        if upload is None:
+            return self._error(404, "NoSuchUpload", "The specified upload does not exist.")
+        if request.method == "PUT":
+            body = await self._read_body(request)
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            upload["parts"][int(request.query["partNumber"])] = (etag, body)
+            return web.Response(headers={"ETag": etag})
+        if request.method == "DELETE":
+            del self.uploads[upload_id]
+            return web.Response(status=204)
+
+        document = ElementTree.fromstring(await request.read())
+        numbers = [int(element.text) for element in document.iter() if element.tag.endswith("PartNumber")]
+        if any(number not in upload["parts"] for number in numbers):
+            return self._error(400, "InvalidPart", "One or more of the specified parts could not be found.")
+        body = b"".join(upload["parts"][number][1] for number in numbers)
+        self.objects[(bucket, key)] = stored = StoredObject(body, upload["content_type"], upload["metadata"])
+        del self.uploads[upload_id]
+        return self._xml(
+            f'<CompleteMultipartUploadResult xmlns="{S3_NAMESPACE}"><Bucket>{bucket}</Bucket>'
+            f"<Key>{escape(key)}</Key><ETag>{escape(stored.etag)}</ETag></CompleteMultipartUploadResult>"
+        )
+
+    @staticmethod
+    async def _read_body(request: web.Request) -> bytes:
+        body = await request.read()
+        if "aws-chunked" not in request.headers.get("Content-Encoding", "") and not request.headers.get(
+            "x-amz-content-sha256", ""
+        ).startswith("STREAMING-"):
+            return body
+        # aws-chunked: "<hex size>[;chunk-signature=...]\r\n<data>\r\n" repeated, ending with a zero-size chunk.
+        decoded, position = bytearray(), 0
+        while True:
+            line_end = body.index(b"\r\n", position)
+            size = int(body[position:line_end].split(b";")[0], 16)
+            if size == 0:
+                return bytes(decoded)
+            decoded += body[line_end + 2 : line_end + 2 + size]
+            position = line_end + 2 + size + 2
+
+    @staticmethod
+    def _metadata(request: web.Request) -> Dict[str, str]:
+        return {
+            name[len("x-amz-meta-") :].lower(): value
+            for name, value in request.headers.items()
+            if name.lower().startswith("x-amz-meta-")
+        }
+
+    @staticmethod
+    def _xml(document: str) -> web.Response:
+        return web.Response(text='<?xml version="1.0" encoding="UTF-8"?>' + document, content_type="application/xml")
+
+    @classmethod
+    def _error(cls, status: int, code: str, message: str, **extra) -> web.Response:
+        fields = "".join(f"<{name}>{value}</{name}>" for name, value in extra.items())
+        response = cls._xml(f"<Error><Code>{code}</Code><Message>{message}</Message>{fields}</Error>")
+        response.set_status(status)
+        return response
+
+
+class FakeAuthService:
+    """Answers ``/me`` and ``/sign-in`` like the auth service, for a single active user."""
+
+    def __init__(self, token: str = "bench-token", email: str = "bench@example.com", latency: float = 0.0) -> None:
+        self.token = token
+        self.email = email
+        self.latency = latency
+        self.calls = {"me": 0, "sign-in": 0}
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_get("/v1/auth/me", self._me)
+        app.router.add_post("/v1/auth/sign-in", self._sign_in)
+        self._runner = await _start_site(app, host, port)
+        return f"http://{host}:{_bound_port(self._runner)}/v1/auth"
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _me(self, request: web.Request) -> web.Response:
+        self.calls["me"] += 1
+        await asyncio.sleep(self.latency)
+        if request.headers.get("Authorization") != f"Bearer {self.token}":
+            return web.json_response({"detail": "Could not validate credentials"}, status=401)
+        now = datetime.now(timezone.utc).isoformat()
+        return web.json_response(
+            {
+                "id": "6f1f0b3c-8f55-4c1e-9a7b-3f6b5f1e2a11",
+                "email": self.email,
+                "username": "bench",
+                "is_active": True,
+                "role": "BASE_USER",
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+
+    async def _sign_in(self, request: web.Request) -> web.Response:
+        self.calls["sign-in"] += 1
+        await asyncio.sleep(self.latency)
+        return web.json_response({"access_token": self.token, "expiration": "2099-01-01T00:00:00"})
+
+
+class FakeAmqpBroker:
+    """
+    Speaks just enough AMQP 0-9-1 for the gateway's publisher: connection and channel setup,
+    publisher confirms, and passive queue declares. Every message is acked and then dropped.
+    """
+
+    def __init__(self) -> None:
+        self.published = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: list = []
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        for writer in self._writers:
+            writer.close()
+        if self._server:
+            self._server.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.append(writer)
+
+        def send(channel: int, method) -> None:
+            writer.write(frame.Method(channel, method).marshal())
+
+        await reader.readexactly(8)  # protocol header
+        send(
+            0,
+            Connection.Start(
+                server_properties={"capabilities": {"publisher_confirms": True, "basic.nack": True}},
+                mechanisms=b"PLAIN",
+                locales=b"en_US",
+            ),
+        )
+        buffer = b""
+        delivery_tags: Dict[int, int] = {}
+        remaining_body: Dict[int, int] = {}
+        try:
+            while data := await reader.read(65536):
+                buffer += data
+                while True:
+                    consumed, received = frame.decode_frame(buffer)
+                    if received is None:
+                        break
+                    buffer = buffer[consumed:]
+                    channel = received.channel_number
+                    if isinstance(received, frame.Header):
+                        remaining_body[channel] = received.body_size
+                        if received.body_size == 0:
+                            self._confirm(send, channel, delivery_tags)
+                        continue
+                    if isinstance(received, frame.Body):
+                        remaining_body[channel] -= len(received.fragment)
+                        if remaining_body[channel] <= 0:
+                            self._confirm(send, channel, delivery_tags)
+                        continue
+                    if not isinstance(received, frame.Method):
+                        continue
+                    method = received.method
+                    if isinstance(method, Connection.StartOk):
+                        send(0, Connection.Tune(channel_max=2047, frame_max=131072, heartbeat=0))
+                    elif isinstance(method, Connection.Open):
+                        send(0, Connection.OpenOk())
+                    elif isinstance(method, Connection.Close):
+                        send(0, Connection.CloseOk())
+                        await writer.drain()
+                        writer.close()
+                        return
+                    elif isinstance(method, Channel.Open):
+                        delivery_tags[channel] = 0
+                        send(channel, Channel.OpenOk())
+                    elif isinstance(method, Channel.Close):
+                        send(channel, Channel.CloseOk())
+                    elif isinstance(method, Confirm.Select):
+                        send(channel, Confirm.SelectOk())
+                    elif isinstance(method, Queue.Declare):
+                        send(channel, Queue.DeclareOk(queue=method.queue, message_count=0, consumer_count=1))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+    def _confirm(self, send, channel: int, delivery_tags: Dict[int, int]) -> None:
+        self.published += 1
+        delivery_tags[channel] += 1
+        send(channel, Basic.Ack(delivery_tag=delivery_tags[channel]))
@@ -0,0 +1,321 @@
+"""
+End-to-end load test for the gateway.
+
+Starts an S3-compatible stub, a fake auth service and an AMQP stand-in in this process, runs the
+gateway under uvicorn in a child process pointed at them, drives the selected workloads with a
+fixed number of concurrent clients and writes the results as JSON:
+
+    python -m benchmarks.load_test --workload upload --concurrency 32 --requests 500 --upload-mb 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import aiohttp
+
+from benchmarks.fakes import FakeAmqpBroker
+from benchmarks.fakes import FakeAuthService
+from benchmarks.fakes import FakeS3
+
+BUCKET = "bench-bucket"
+EMAIL = "bench@example.com"
+TOKEN = "bench-token"
+DOWNLOAD_KEY = f"{EMAIL}/bench-download.mp4"
+MP4_HEADER = b"\x00\x00\x00\x18ftypisom\x00\x00\x02\x00isomiso2"
+MIB = 1024 * 1024
+WORKLOADS = ("sign-in", "upload", "download")
+
+RequestFunction = Callable[[aiohttp.ClientSession, int], Awaitable[tuple]]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", action="append", choices=WORKLOADS, help="repeatable; defaults to all")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per workload")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests before each workload")
+    parser.add_argument("--upload-mb", type=float, default=8.0)
+    parser.add_argument("--download-mb", type=float, default=8.0)
+    parser.add_argument("--duplicate-uploads", action="store_true", help="upload identical content every time")
+    parser.add_argument("--upload-keys", type=int, default=64, help="distinct object keys uploads rotate over")
+    parser.add_argument("--workers", type=int, default=1, help="gateway worker processes")
+    parser.add_argument("--auth-latency-ms", type=float, default=0.0, help="latency added by the fake auth service")
+    parser.add_argument("--gateway-env", action="append", default=[], metavar="NAME=VALUE")
+    parser.add_argument("--output", type=Path, help="defaults to benchmarks/results/<timestamp>.json")
+    return parser.parse_args(argv)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def peak_rss_mib(pid: int) -> Optional[float]:
+    """Peak resident set size of ``pid`` and its children, from /proc (Linux only)."""
+    total_kib = 0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            for line in Path(f"/proc/{current}/status").read_text().splitlines():
+                if line.startswith("VmHWM:"):
+                    total_kib += int(line.split()[1])
+            for task in Path(f"/proc/{current}/task").iterdir():
+                pending.extend(int(child) for child in (task / "children").read_text().split())
+    except (FileNotFoundError, ProcessLookupError):
+        if not total_kib:
+            return None
+    return round(total_kib / 1024, 1)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def gateway_env(s3_url: str, auth_url: str, broker_port: int, workdir: str) -> Dict[str, str]:
+    """Environment that points a gateway at the local stand-ins, keeping its state files in ``workdir``."""
+    return {
+        "is_prod": "true",
+        "AUTH_SERVICE_URL": auth_url,
+        "s3_endpoint": s3_url,
+        "s3_access_key": "bench",
+        "s3_secret_key": "bench",
+        "upload_bucket_name": BUCKET,
+        "RABBIT_URL": "127.0.0.1",
+        "RABBIT_PORT": str(broker_port),
+        "RABBITMQ_USER": "guest",
+        "RABBITMQ_PASS": "guest",
+        "UPLOAD_ROUTING_KEY": "video",
+        "outbox_path": os.path.join(workdir, "outbox.sqlite3"),
+        "upload_session_path": os.path.join(workdir, "upload_sessions.sqlite3"),
+        "token_cache_shared_path": os.path.join(workdir, "token-cache"),
+    }
+
+
+class Gateway:
+    def __init__(self, env: Dict[str, str], workers: int = 1) -> None:
+        self.port = free_port()
+        self.workers = workers
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.env = {**os.environ, **env}
+        self.process: Optional[subprocess.Popen] = None
+        self.ready_after: Optional[float] = None
+
+    async def start(self, timeout: float = 30.0, poll_interval: float = 0.1) -> None:
+        """Starts the gateway and waits until it answers; ``ready_after`` is how long that took."""
+        started = time.perf_counter()
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "app.main:app",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(self.port),
+                "--log-level",
+                "warning",
+                "--no-access-log",
+                "--workers",
+                str(self.workers),
+            ],
+            env=self.env,
+        )
+        deadline = time.monotonic() + timeout
+        async with aiohttp.ClientSession() as session:
+            while time.monotonic() < deadline:
+                if self.process.poll() is not None:
+                    raise RuntimeError(f"Gateway exited with status {self.process.returncode}")
+                try:
+                    async with session.get(f"{self.url}/v1/ping") as response:
+                        if response.status == 200:
+                            self.ready_after = time.perf_counter() - started
+                            return
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(poll_interval)
+        raise RuntimeError("Gateway did not become ready in time")
+
+    def stop(self) -> None:
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.s3 = FakeS3()
+        self.auth = FakeAuthService(token=TOKEN, email=EMAIL, latency=args.auth_latency_ms / 1000)
+        self.broker = FakeAmqpBroker()
+        self.gateway: Optional[Gateway] = None
+        self.upload_body = MP4_HEADER + bytes(max(0, int(args.upload_mb * MIB) - len(MP4_HEADER) - 16))
+
+    async def run(self) -> dict:
+        workdir = tempfile.mkdtemp(prefix="gateway-bench-")
+        s3_url = await self.s3.start()
+        auth_url = await self.auth.start()
+        broker_port = await self.broker.start()
+        self.s3.put(BUCKET, DOWNLOAD_KEY, MP4_HEADER + bytes(int(self.args.download_mb * MIB)), "video/mp4")
+        env = gateway_env(s3_url, auth_url, broker_port, workdir)
+        env.update(item.split("=", 1) for item in self.args.gateway_env)
+        self.gateway = Gateway(env, workers=self.args.workers)
+        try:
+            await self.gateway.start()
+            results = [await self.run_workload(name) for name in self.args.workload or WORKLOADS]
+        finally:
+            self.gateway.stop()
+            await self.broker.close()
+            await self.auth.close()
+            await self.s3.close()
+
+        return {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {key: str(value) if isinstance(value, Path) else value for key, value in vars(self.args).items()},
+            "results": results,
+            "dependencies": {
+                "s3_requests": self.s3.requests,
+                "auth_calls": self.auth.calls,
+                "published_messages": self.broker.published,
+            },
+        }
+
+    async def run_workload(self, name: str) -> dict:
+        request = {"sign-in": self.sign_in, "upload": self.upload, "download": self.download}[name]
+        connector = aiohttp.TCPConnector(limit=self.args.concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await self.drive(session, request, self.args.warmup)
+            started = time.perf_counter()
+            samples = await self.drive(session, request, self.args.requests)
+            duration = time.perf_counter() - started
+
+        latencies = [latency for latency, _, _ in samples]
+        statuses = Counter(status for _, status, _ in samples)
+        transferred = sum(size for _, _, size in samples)
+        result = {
+            "workload": name,
+            "requests": len(samples),
+            "concurrency": self.args.concurrency,
+            "errors": sum(count for status, count in statuses.items() if not 200 <= status < 300),
+            "status_codes": {str(status): count for status, count in sorted(statuses.items())},
+            "duration_s": round(duration, 3),
+            "requests_per_s": round(len(samples) / duration, 2) if duration else None,
+            "throughput_mib_per_s": round(transferred / MIB / duration, 2) if duration else None,
+            "latency_ms": {
+                "mean": round(statistics.fmean(latencies) * 1000, 2),
+                "p50": round(percentile(latencies, 0.50) * 1000, 2),
+                "p95": round(percentile(latencies, 0.95) * 1000, 2),
+                "p99": round(percentile(latencies, 0.99) * 1000, 2),
+                "max": round(max(latencies) * 1000, 2),
+            },
+            "gateway_peak_rss_mib": peak_rss_mib(self.gateway.process.pid),  # type: ignore
+            "harness_peak_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+        print(
+            f"{name:>8}: {result['requests_per_s']} req/s, p50 {result['latency_ms']['p50']} ms, "
+            f"p95 {result['latency_ms']['p95']} ms, p99 {result['latency_ms']['p99']} ms, "
+            f"errors {result['errors']}, gateway peak RSS {result['gateway_peak_rss_mib']} MiB"
+        )
+        return result
+
+    async def drive(self, session: aiohttp.ClientSession, request: RequestFunction, count: int) -> List[tuple]:
+        """Runs ``count`` requests with ``concurrency`` clients; returns (latency, status, bytes) per request."""
+        counter = iter(range(count))
+        samples: List[tuple] = []
+
+        async def client() -> None:
+            for index in counter:
+                started = time.perf_counter()
+                try:
+                    status, size = await request(session, index)
+                except aiohttp.ClientError:
+                    status, size = 599, 0
+                samples.append((time.perf_counter() - started, status, size))
+
+        await asyncio.gather(*(client() for _ in range(self.args.concurrency)))
+        return samples
+
+    async def sign_in(self, session: aiohttp.ClientSession, index: int) -> tuple:
+        async with session.post(
+            f"{self.gateway.url}/v1/auth/sign-in",  # type: ignore
+            json={"email__eq": EMAIL, "password": "bench-password"},
+        ) as response:
+            await response.read()
+            return response.status, 0
+
+    async def upload(self, session: aiohttp.ClientSession, index: int) -> tuple:
+        unique = bytes(16) if self.args.duplicate_uploads else uuid.uuid4().bytes
+        form = aiohttp.FormData()
+        form.add_field(
+            "file",
+            self.upload_body[: len(MP4_HEADER)] + unique + self.upload_body[len(MP4_HEADER) :],
+            filename=f"bench-{index % self.args.upload_keys}.mp4",
+            content_type="video/mp4",
+        )
+        async with session.post(
+            f"{self.gateway.url}/v1/converter/upload/{EMAIL}",  # type: ignore
+            data=form,
+            headers={"Authorization": f"Bearer {TOKEN}"},
+        ) as response:
+            await response.read()
+            return response.status, len(self.upload_body) + len(unique)
+
+    async def download(self, session: aiohttp.ClientSession, index: int) -> tuple:
+        size = 0
+        async with session.get(
+            f"{self.gateway.url}/v1/converter/download",  # type: ignore
+            params={"file_name": DOWNLOAD_KEY},
+            headers={"Authorization": f"Bearer {TOKEN}"},
+        ) as response:
+            async for chunk in response.content.iter_any():
+                size += len(chunk)
+            return response.status, size
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(LoadTest(args).run())
+    output = args.output or Path(__file__).parent / "results" / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
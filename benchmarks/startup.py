@@ -0,0 +1,173 @@
+"""
+Startup benchmark for the gateway.
+
+Measures, over several fresh processes, how long ``import app.main`` takes and how long a new
+gateway process needs to answer its first request (and its first request that touches S3),
+using the same local stand-ins as the load test:
+
+    python -m benchmarks.startup --runs 5 --max-ready-ms 2500
+
+Exits with status 1 when a median exceeds one of the given budgets, so it can guard CI.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import aiohttp
+
+from benchmarks.fakes import FakeAmqpBroker
+from benchmarks.fakes import FakeAuthService
+from benchmarks.fakes import FakeS3
+from benchmarks.load_test import BUCKET
+from benchmarks.load_test import DOWNLOAD_KEY
+from benchmarks.load_test import EMAIL
+from benchmarks.load_test import MP4_HEADER
+from benchmarks.load_test import TOKEN
+from benchmarks.load_test import Gateway
+from benchmarks.load_test import gateway_env
+from benchmarks.load_test import git_commit
+
+IMPORT_SCRIPT = "import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes measured for each metric")
+    parser.add_argument("--slowest-imports", type=int, default=15, help="modules listed from -X importtime")
+    parser.add_argument("--max-import-ms", type=float, help="fail when the median import time exceeds this")
+    parser.add_argument("--max-ready-ms", type=float, help="fail when the median time to first request exceeds this")
+    parser.add_argument("--output", type=Path, help="defaults to benchmarks/results/startup-<timestamp>.json")
+    return parser.parse_args(argv)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "median": round(statistics.median(samples) * 1000, 1),
+        "min": round(min(samples) * 1000, 1),
+        "max": round(max(samples) * 1000, 1),
+    }
+
+
+def measure_import(env: Dict[str, str]) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT], env={**os.environ, **env}, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(env: Dict[str, str], count: int) -> List[dict]:
+    """Third-party and standard-library packages loaded by ``import app.main``, slowest first (``-X importtime``)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    packages: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        package = name.strip().split(".")[0]
+        if package != "app":
+            # The first module of a package to load pulls in the rest, so its cumulative time is the package's.
+            packages[package] = max(packages.get(package, 0), int(cumulative))
+    ordered = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:count]
+    return [{"module": name, "cumulative_ms": round(micros / 1000, 1)} for name, micros in ordered]
+
+
+async def measure_first_requests(env: Dict[str, str]) -> tuple:
+    """Returns (seconds until /v1/ping answers, seconds for the first download after that)."""
+    gateway = Gateway(env)
+    try:
+        await gateway.start(poll_interval=0.005)
+        started = time.perf_counter()
+        async with aiohttp.ClientSession() as session:
+            async with session.get(
+                f"{gateway.url}/v1/converter/download",
+                params={"file_name": DOWNLOAD_KEY},
+                headers={"Authorization": f"Bearer {TOKEN}"},
+            ) as r:
+                await r.read()
+                if r.status != 200:
+                    raise RuntimeError(f"First download failed with status {r.status}")
+        return gateway.ready_after, time.perf_counter() - started
+    finally:
+        gateway.stop()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    s3 = FakeS3()
+    auth = FakeAuthService(token=TOKEN, email=EMAIL)
+    broker = FakeAmqpBroker()
+    s3_url = await s3.start()
+    auth_url = await auth.start()
+    broker_port = await broker.start()
+    s3.put(BUCKET, DOWNLOAD_KEY, MP4_HEADER + bytes(1024), "video/mp4")
+    env = gateway_env(s3_url, auth_url, broker_port, tempfile.mkdtemp(prefix="gateway-startup-"))
+    try:
+        imports = [await asyncio.to_thread(measure_import, env) for _ in range(args.runs)]
+        first_requests = [await measure_first_requests(env) for _ in range(args.runs)]
+        slowest = await asyncio.to_thread(slowest_imports, env, args.slowest_imports)
+    finally:
+        await broker.close()
+        await auth.close()
+        await s3.close()
+
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": args.runs,
+        "import_ms": summarize(imports),
+        "time_to_first_request_ms": summarize([ready for ready, _ in first_requests]),
+        "first_s3_request_ms": summarize([first_s3 for _, first_s3 in first_requests]),
+        "slowest_imports": slowest,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    print(
+        f"import {report['import_ms']['median']} ms, first request {report['time_to_first_request_ms']['median']} ms, "
+        f"first S3 request {report['first_s3_request_ms']['median']} ms (medians of {args.runs} runs)"
+    )
+    for entry in report["slowest_imports"][:5]:
+        print(f"  {entry['cumulative_ms']:>8} ms  {entry['module']}")
+    output = args.output or Path(__file__).parent / "results" / f"startup-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+    over_budget = [
+        name
+        for name, budget, measured in (
+            ("import", args.max_import_ms, report["import_ms"]["median"]),
+            ("time to first request", args.max_ready_ms, report["time_to_first_request_ms"]["median"]),
+        )
+        if budget is not None and measured > budget
+    ]
+    if over_budget:
+        print(f"Over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import FastAPI
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+from app.core.admission import AdmissionController
+from app.core.exceptions import LengthRequiredError
+from app.core.exceptions import ServiceUnavailableError
+from app.core.routing import GatewayRoute
+from app.core.routing import guarded_by
+
+
+def make_request(content_length=None):
+    headers = [] if content_length is None else [(b"content-length", str(content_length).encode())]
+    return Request({"type": "http", "headers": headers})
+
+
+@pytest.mark.asyncio
+async def test_admission_limits_concurrent_uploads():
+    controller = AdmissionController(max_concurrent_uploads=1, max_inflight_bytes=100, retry_after=7)
+
+    async with controller.admit(make_request(10)):
+        with pytest.raises(ServiceUnavailableError) as error:
+            async with controller.admit(make_request(10)):
+                pass
+        assert error.value.headers == {"Retry-After": "7"}
+
+    assert (controller.in_flight_uploads, controller.in_flight_bytes, controller.rejected) == (0, 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_admission_enforces_byte_budget_but_admits_oversized_upload_when_idle():
+    controller = AdmissionController(max_concurrent_uploads=10, max_inflight_bytes=100)
+
+    async with controller.admit(make_request(500)):
+        with pytest.raises(ServiceUnavailableError):
+            async with controller.admit(make_request(1)):
+                pass
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content_length", [None, "chunked", -1])
+async def test_admission_requires_a_declared_length(content_length):
+    controller = AdmissionController()
+
+    with pytest.raises(LengthRequiredError):
+        async with controller.admit(make_request(content_length)):
+            pass
+    assert controller.in_flight_uploads == 0
+
+
+@pytest.mark.asyncio
+async def test_admission_sheds_when_queue_is_too_deep():
+    controller = AdmissionController(max_queue_depth=10)
+    controller.queue_depth = 11
+
+    with pytest.raises(ServiceUnavailableError):
+        async with controller.admit(make_request(1)):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_admission_polls_queue_depth():
+    class FakePublisher:
+        async def queue_depth(self, queue):
+            return 42
+
+    controller = AdmissionController(max_queue_depth=10, queue_name="video", poll_interval=60)
+    await controller.start(FakePublisher())
+    await asyncio.sleep(0)
+    await controller.close()
+
+    assert controller.queue_depth == 42
+
+
+def test_guard_rejects_before_the_body_is_read():
+    controller = AdmissionController(max_concurrent_uploads=1)
+    controller.in_flight_uploads = 1
+    body_read = False
+    router = APIRouter(route_class=GatewayRoute)
+
+    async def dependency(request: Request):
+        nonlocal body_read
+        body_read = True
+        return await request.body()
+
+    @router.post("/upload")
+    @guarded_by(controller.admit)
+    async def upload(body: bytes = Depends(dependency)):
+        return {"size": len(body)}
+
+    app = FastAPI()
+    app.include_router(router)
+    response = TestClient(app).post("/upload", content=b"x" * 10)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    assert not body_read
@@ -0,0 +1,67 @@
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from jose import jwt
+
+from app.core.exceptions import AuthError
+from app.core.jwt_verifier import LocalTokenVerifier
+
+SECRET = "test-signing-secret"
+
+
+def make_verifier(**kwargs) -> LocalTokenVerifier:
+    options = {"enabled": True, "public_key": SECRET, "jwks_url": None, "algorithms": ["HS256"]}
+    options.update(kwargs)
+    return LocalTokenVerifier(**options)
+
+
+def make_claims(**overrides) -> dict:
+    claims = {
+        "sub": str(uuid4()),
+        "email": "test@example.com",
+        "username": "testuser",
+        "is_active": True,
+        "role": "BASE_USER",
+        "created_at": datetime.now().isoformat(),
+        "updated_at": datetime.now().isoformat(),
+        "exp": int(time.time()) + 60,
+    }
+    claims.update(overrides)
+    return claims
+
+
+def test_verify_builds_user_from_claims():
+    claims = make_claims()
+    user = make_verifier().verify(jwt.encode(claims, SECRET))
+    assert str(user.id) == claims["sub"]
+    assert user.email == "test@example.com"
+
+
+def test_verify_returns_none_when_claims_are_incomplete():
+    claims = make_claims()
+    del claims["role"]
+    assert make_verifier().verify(jwt.encode(claims, SECRET)) is None
+
+
+def test_verify_returns_none_when_key_is_unknown():
+    verifier = make_verifier(public_key=None, jwks_url="http://auth/jwks.json")
+    token = jwt.encode(make_claims(), SECRET, headers={"kid": "rotated"})
+    assert verifier.verify(token) is None
+
+
+def test_verify_rejects_expired_token():
+    token = jwt.encode(make_claims(exp=int(time.time()) - 10), SECRET)
+    with pytest.raises(AuthError):
+        make_verifier().verify(token)
+
+
+def test_verify_rejects_bad_signature():
+    token = jwt.encode(make_claims(), "another-secret")
+    with pytest.raises(AuthError):
+        make_verifier().verify(token)
+
+
+def test_verify_is_noop_when_disabled():
+    assert make_verifier(enabled=False).verify(jwt.encode(make_claims(), SECRET)) is None
@@ -0,0 +1,55 @@
+import pytest
+
+from app.core.metrics import outbound_errors
+from app.core.metrics import outbound_requests
+from app.core.metrics import Registry
+from app.core.metrics import track_outbound
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("stage_seconds", "Stage time.", ["stage"], buckets=(0.1, 1.0))
+    histogram.labels("auth").observe(0.05)
+    histogram.labels("auth").observe(0.5)
+    histogram.labels("auth").observe(5)
+
+    lines = registry.render().splitlines()
+
+    assert lines[:2] == ["# HELP stage_seconds Stage time.", "# TYPE stage_seconds histogram"]
+    assert 'stage_seconds_bucket{stage="auth",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="auth",le="1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="auth",le="+Inf"} 3' in lines
+    assert 'stage_seconds_sum{stage="auth"} 5.55' in lines
+    assert 'stage_seconds_count{stage="auth"} 3' in lines
+
+
+def test_counter_and_gauges_render():
+    registry = Registry()
+    registry.counter("calls", "Calls.", ["dependency"]).labels('s3 "eu"').inc(2)
+    registry.gauge("in_flight", "In flight.").set(3)
+    registry.gauge("depth", "Depth.", function=lambda: {(): 7})
+
+    output = registry.render()
+
+    assert 'calls_total{dependency="s3 \\"eu\\""} 2' in output
+    assert "in_flight 3" in output
+    assert "depth 7" in output
+
+
+def test_labels_must_match_declared_names():
+    registry = Registry()
+    counter = registry.counter("calls", "Calls.", ["dependency", "operation"])
+
+    with pytest.raises(ValueError):
+        counter.labels("s3")
+
+
+def test_track_outbound_counts_errors():
+    requests = outbound_requests.labels("test", "fail").value
+    errors = outbound_errors.labels("test", "fail").value
+    with pytest.raises(RuntimeError):
+        with track_outbound("test", "fail"):
+            raise RuntimeError
+
+    assert outbound_requests.labels("test", "fail").value == requests + 1
+    assert outbound_errors.labels("test", "fail").value == errors + 1
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from app.core.exceptions import GatewayTimeoutError
+from app.core.exceptions import ServiceUnavailableError
+from app.core.outbound import CircuitBreaker
+from app.core.outbound import OutboundPolicy
+
+
+class Flaky(Exception):
+    pass
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_policy(**kwargs) -> OutboundPolicy:
+    options = {"timeout": 1.0, "retries": 2, "backoff": 0.001, "backoff_max": 0.001}
+    options.update(kwargs)
+    return OutboundPolicy("test", is_failure=lambda error: isinstance(error, Flaky), **options)
+
+
+def failing_then(result, failures: int):
+    calls = []
+
+    async def func():
+        calls.append(None)
+        if len(calls) <= failures:
+            raise Flaky()
+        return result
+
+    return func, calls
+
+
+@pytest.mark.asyncio
+async def test_idempotent_calls_are_retried():
+    policy = make_policy()
+    func, calls = failing_then("ok", failures=2)
+
+    assert await policy.call("read", func, idempotent=True) == "ok"
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_non_idempotent_calls_run_once():
+    policy = make_policy()
+    func, calls = failing_then("ok", failures=1)
+
+    with pytest.raises(Flaky):
+        await policy.call("write", func)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_ordinary_errors_are_not_retried():
+    policy = make_policy()
+    calls = []
+
+    async def not_found():
+        calls.append(None)
+        raise KeyError("missing")
+
+    with pytest.raises(KeyError):
+        await policy.call("read", not_found, idempotent=True)
+    assert len(calls) == 1
+    assert policy.breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_deadline_raises_gateway_timeout():
+    policy = make_policy(timeout=0.05)
+
+    async def stalled():
+        await asyncio.sleep(10)
+
+    with pytest.raises(GatewayTimeoutError):
+        await policy.call("read", stalled, idempotent=True)
+    assert policy.breaker.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_hedged_call_takes_first_success_and_discards_the_loser():
+    policy = make_policy(hedge_delay=0.01)
+    delays = [0.5, 0.0]
+    started = []
+    discarded = []
+
+    async def read():
+        index = len(started)
+        started.append(index)
+        await asyncio.sleep(delays[index])
+        return index
+
+    assert await policy.call("read", read, hedge=True, discard=discarded.append) == 1
+    assert started == [0, 1]
+    await asyncio.sleep(0)
+    assert discarded == []  # the slow attempt was cancelled, not completed
+
+
+def test_circuit_opens_after_consecutive_failures_and_probes_after_reset():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=10, clock=clock)
+
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(ServiceUnavailableError) as error:
+        breaker.before_call()
+    assert error.value.headers == {"Retry-After": "10"}
+
+    clock.now = 10
+    breaker.before_call()  # the probe
+    with pytest.raises(ServiceUnavailableError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_without_calling():
+    policy = make_policy(retries=0, breaker=CircuitBreaker("test", failure_threshold=1, reset_timeout=60))
+    func, calls = failing_then("ok", failures=1)
+
+    with pytest.raises(Flaky):
+        await policy.call("read", func)
+    with pytest.raises(ServiceUnavailableError):
+        await policy.call("read", func)
+    assert len(calls) == 1
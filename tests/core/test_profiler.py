@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.exceptions import DuplicatedError
+from app.core.profiler import SamplingProfiler
+
+
+def busy_wait(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def busy_handler() -> None:
+    for _ in range(5):
+        busy_wait(0.02)
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_profile_collapses_loop_thread_stacks():
+    profiler = SamplingProfiler(interval=0.001)
+
+    profiling = asyncio.create_task(profiler.profile(0.2))
+    await asyncio.sleep(0)
+    await busy_handler()
+    stacks = await profiling
+
+    lines = stacks.splitlines()
+    assert lines
+    busy = [line for line in lines if "busy_wait (" in line]
+    assert busy
+    stack, count = busy[0].rsplit(" ", 1)
+    frames = [frame.split(" (")[0] for frame in stack.split(";")]
+    assert int(count) > 0
+    assert frames[-2:] == ["busy_handler", "busy_wait"]
+    assert not profiler.is_running
+
+
+@pytest.mark.asyncio
+async def test_only_one_profile_runs_at_a_time():
+    profiler = SamplingProfiler(interval=0.01)
+
+    profiling = asyncio.create_task(profiler.profile(0.05))
+    await asyncio.sleep(0)
+    with pytest.raises(DuplicatedError):
+        await profiler.profile(0.05)
+    await profiling
+
+    assert await profiler.profile(0.01) is not None
+
+
+@pytest.mark.asyncio
+async def test_task_filter_skips_other_tasks():
+    profiler = SamplingProfiler(interval=0.001)
+
+    async def idle() -> None:
+        await asyncio.sleep(0.1)
+
+    target = asyncio.create_task(idle())
+    await asyncio.sleep(0)
+    sampler = profiler.start(task=target)
+    busy_wait(0.05)
+    await target
+    samples = await sampler.finish()
+
+    assert not any("busy_wait" in stack for stack in samples)
@@ -0,0 +1,114 @@
+from datetime import datetime
+from uuid import uuid4
+
+from fastapi import Depends
+from fastapi import FastAPI
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+from app.core.enums import UserRoles
+from app.core.rate_limit import RateLimiter
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.rate_limit import RateLimitRule
+from app.core.security import JWTBearer
+from app.schemas.user_schema import User
+
+RULES = {UserRoles.ADMIN: RateLimitRule(rate=10, burst=5), UserRoles.GUEST: RateLimitRule(rate=1, burst=2)}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_user(role=UserRoles.GUEST):
+    now = datetime.now()
+    return User(
+        id=uuid4(), created_at=now, updated_at=now, email="a@example.com", username="a", is_active=True, role=role
+    )
+
+
+def test_rate_limiter_allows_burst_then_refills_at_the_roles_rate():
+    clock = FakeClock()
+    limiter = RateLimiter(RULES, max_users=10, clock=clock)
+
+    assert [limiter.take("user", UserRoles.GUEST) for _ in range(2)] == [None, None]
+    assert limiter.take("user", UserRoles.GUEST) == 1.0
+    clock.now = 0.5
+    assert limiter.take("user", UserRoles.GUEST) == 0.5
+    clock.now = 1.0
+    assert limiter.take("user", UserRoles.GUEST) is None
+    assert [limiter.take("admin", UserRoles.ADMIN) for _ in range(5)] == [None] * 5
+
+
+def test_rate_limiter_evicts_idle_buckets_and_stays_bounded():
+    clock = FakeClock()
+    limiter = RateLimiter(RULES, max_users=2, clock=clock)
+    limiter.take("first", UserRoles.GUEST)
+    limiter.take("second", UserRoles.ADMIN)
+    limiter.take("third", UserRoles.ADMIN)
+
+    assert len(limiter) == 2
+    clock.now = 1.0
+    limiter.take("third", UserRoles.ADMIN)
+    assert len(limiter) == 1
+
+
+def test_rate_limiter_ignores_roles_without_a_rule():
+    limiter = RateLimiter(RULES, max_users=10)
+
+    assert all(limiter.take("user", UserRoles.MODERATOR) is None for _ in range(10))
+    assert len(limiter) == 0
+
+
+def test_middleware_rejects_before_the_body_is_read():
+    users = {"known": make_user()}
+    body_read = False
+
+    async def dependency(request: Request):
+        nonlocal body_read
+        body_read = True
+        return await request.body()
+
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(body: bytes = Depends(dependency)):
+        return {"size": len(body)}
+
+    app.add_middleware(RateLimitMiddleware, limiter=RateLimiter(RULES, max_users=10), identify=users.get)
+    client = TestClient(app)
+    known = {"Authorization": "Bearer known"}
+
+    assert [client.post("/upload", content=b"x", headers=known).status_code for _ in range(2)] == [200, 200]
+    body_read = False
+    response = client.post("/upload", content=b"x", headers=known)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert response.headers["RateLimit-Limit"] == "2"
+    assert response.headers["RateLimit-Remaining"] == "0"
+    assert not body_read
+    assert client.post("/upload", content=b"x", headers={"Authorization": "Bearer unknown"}).status_code == 200
+    assert client.post("/upload", content=b"x").status_code == 200
+
+
+def test_jwt_bearer_reuses_the_user_the_middleware_verified(monkeypatch):
+    user = make_user()
+    verified = []
+    monkeypatch.setattr("app.core.security.token_verifier.verify", lambda token: verified.append(token))
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(current_user: User = Depends(JWTBearer())):
+        return {"id": str(current_user.id)}
+
+    app.add_middleware(RateLimitMiddleware, limiter=RateLimiter(RULES, max_users=10), identify={"known": user}.get)
+    response = TestClient(app).get("/me", headers={"Authorization": "Bearer known"})
+
+    assert response.status_code == 200
+    assert response.json() == {"id": str(user.id)}
+    assert verified == []
@@ -0,0 +1,59 @@
+import hashlib
+
+from app.core.shared_cache import HEADER
+from app.core.shared_cache import SharedTokenStore
+
+
+def digest(value: str) -> bytes:
+    return hashlib.sha256(value.encode()).digest()
+
+
+def test_round_trip_and_expiry(tmp_path):
+    store = SharedTokenStore(str(tmp_path / "cache"), slots=8, slot_size=256)
+    store.open()
+
+    assert store.set(digest("a"), b"user-a", ttl=60)
+    assert store.get(digest("a")) == b"user-a"
+    assert store.get(digest("b")) is None
+
+    store.set(digest("a"), b"user-a", ttl=-1)
+    assert store.get(digest("a")) == b"user-a"  # a non-positive ttl is not written
+    assert not store.set(digest("big"), bytes(1024), ttl=60)
+    store.close()
+
+
+def test_torn_slot_reads_as_miss(tmp_path):
+    store = SharedTokenStore(str(tmp_path / "cache"), slots=8, slot_size=256)
+    store.open()
+    key = digest("a")
+    store.set(key, b"user-a", ttl=60)
+
+    offset = store._offset(key)
+    store._map[offset + 50] ^= 0xFF  # type: ignore
+
+    assert store.get(key) is None
+    store.close()
+
+
+def test_layout_change_resets_the_file(tmp_path):
+    path = str(tmp_path / "cache")
+    store = SharedTokenStore(path, slots=8, slot_size=256)
+    store.open()
+    store.set(digest("a"), b"user-a", ttl=60)
+    store.close()
+
+    resized = SharedTokenStore(path, slots=16, slot_size=256)
+    resized.open()
+    assert resized.get(digest("a")) is None
+    assert resized._map[: HEADER.size] == HEADER.pack(b"GWTC", 1, 16, 256)  # type: ignore
+    resized.close()
+
+
+def test_store_stays_closed_without_fcntl(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.core.shared_cache.fcntl", None)
+    store = SharedTokenStore(str(tmp_path / "cache"), slots=8, slot_size=256)
+    store.open()
+
+    assert not store.set(digest("a"), b"user-a", ttl=60)
+    assert store.get(digest("a")) is None
+    assert not (tmp_path / "cache").exists()
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from jose import jwt
+
+from app.core.cache import TTLCache
+from app.core.enums import UserRoles
+from app.core.exceptions import AuthError
+from app.core.shared_cache import SharedTokenStore
+from app.core.token_cache import TokenCache
+from app.schemas.user_schema import User
+
+
+def make_user() -> User:
+    return User(
+        id=uuid4(),
+        email="test@example.com",
+        username="testuser",
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+        is_active=True,
+        role=UserRoles.BASE_USER,
+    )
+
+
+def test_ttl_cache_evicts_least_recently_used_entry():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    now = [0.0]
+    cache = TTLCache(max_entries=10, clock=lambda: now[0])
+    cache.set("a", 1, ttl=5)
+
+    now[0] = 4.9
+    assert cache.get("a") == 1
+    now[0] = 5.0
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_token_cache_coalesces_concurrent_lookups():
+    cache = TokenCache(max_entries=10, ttl=60)
+    user = make_user()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return user
+
+    results = await asyncio.gather(*(cache.get_or_load("token", loader) for _ in range(5)))
+    assert results == [user] * 5
+    assert await cache.get_or_load("token", loader) == user
+    assert calls == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 4
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_token_cache_does_not_cache_failures():
+    cache = TokenCache(max_entries=10, ttl=60)
+
+    async def failing_loader():
+        raise AuthError(detail="bad token")
+
+    with pytest.raises(AuthError):
+        await cache.get_or_load("token", failing_loader)
+    assert len(cache._users) == 0
+
+
+@pytest.mark.asyncio
+async def test_token_cache_respects_token_expiry():
+    cache = TokenCache(max_entries=10, ttl=60)
+    expired_token = jwt.encode({"exp": int(time.time()) - 10}, "secret")
+
+    async def loader():
+        return make_user()
+
+    await cache.get_or_load(expired_token, loader)
+    assert len(cache._users) == 0
+
+
+@pytest.mark.asyncio
+async def test_token_cache_shares_users_between_workers(tmp_path):
+    path = str(tmp_path / "token-cache")
+    worker_a = TokenCache(max_entries=10, ttl=60, shared=SharedTokenStore(path, slots=16, slot_size=1024))
+    worker_b = TokenCache(max_entries=10, ttl=60, shared=SharedTokenStore(path, slots=16, slot_size=1024))
+    worker_a.start()
+    worker_b.start()
+    user = make_user()
+
+    async def loader():
+        return user
+
+    async def unexpected_loader():
+        raise AssertionError("the other worker already validated this token")
+
+    await worker_a.get_or_load("token", loader)
+    assert await worker_b.get_or_load("token", unexpected_loader) == user
+    assert worker_b.stats()["shared_hits"] == 1
+
+    worker_a.invalidate("token")
+    worker_b._users.clear()
+    with pytest.raises(AssertionError):
+        await worker_b.get_or_load("token", unexpected_loader)
+    worker_a.close()
+    worker_b.close()
+
+
+@pytest.mark.asyncio
+async def test_token_cache_peek_does_not_load_or_count():
+    cache = TokenCache(max_entries=10, ttl=60)
+    user = make_user()
+
+    assert cache.peek("token") is None
+    await cache.get_or_load("token", lambda: asyncio.sleep(0, result=user))
+
+    assert cache.peek("token") == user
+    assert (cache.hits, cache.misses) == (0, 1)
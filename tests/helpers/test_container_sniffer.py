@@ -0,0 +1,46 @@
+import pytest
+
+from app.core.exceptions import ValidationError
+from app.helpers.container_sniffer import resolve_content_type
+from app.helpers.container_sniffer import sniff_container
+
+MP4 = b"\x00\x00\x00\x18ftypisom\x00\x00\x02\x00isomiso2"
+QUICKTIME = b"\x00\x00\x00\x14ftypqt  \x00\x00\x00\x00qt  "
+WEBM = b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81\x01\x42\xf7\x81\x01\x42\x82\x84webm\x42\x87\x81\x04"
+MATROSKA = b"\x1a\x45\xdf\xa3\xa3\x42\x86\x81\x01\x42\xf7\x81\x01\x42\x82\x88matroska\x42\x87\x81\x04"
+AVI = b"RIFF\x00\x10\x00\x00AVI LIST"
+WAVE = b"RIFF\x00\x10\x00\x00WAVEfmt "
+OGG_THEORA = b"OggS\x00\x02" + b"\x00" * 22 + b"\x80theora"
+OGG_VORBIS = b"OggS\x00\x02" + b"\x00" * 22 + b"\x01vorbis"
+
+
+@pytest.mark.parametrize(
+    "head, expected",
+    [
+        (MP4, "video/mp4"),
+        (QUICKTIME, "video/quicktime"),
+        (WEBM, "video/webm"),
+        (MATROSKA, "video/x-matroska"),
+        (AVI, "video/avi"),
+        (WAVE, "audio/wav"),
+        (OGG_THEORA, "video/ogg"),
+        (OGG_VORBIS, "audio/ogg"),
+        (b"\x89PNG\r\n\x1a\n", None),
+        (b"", None),
+    ],
+)
+def test_sniff_container(head, expected):
+    assert sniff_container(head) == expected
+
+
+def test_resolve_content_type_accepts_related_matroska_types():
+    assert resolve_content_type("video/x-matroska", WEBM) == "video/webm"
+
+
+@pytest.mark.parametrize(
+    "declared, head",
+    [("video/mp4", MATROSKA), ("video/ogg", OGG_VORBIS), ("video/mp4", QUICKTIME), ("video/mp4", b"not a video")],
+)
+def test_resolve_content_type_rejects_mismatched_or_disallowed_files(declared, head):
+    with pytest.raises(ValidationError):
+        resolve_content_type(declared, head)
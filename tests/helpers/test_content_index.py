@@ -0,0 +1,86 @@
+import pytest
+
+from app.core.exceptions import ObjectNotFoundError
+from app.helpers.content_index import ContentIndex
+
+
+class FakeS3Manager:
+    def __init__(self, objects):
+        self.objects = objects
+
+    async def iter_objects(self, bucket_name):
+        for key in self.objects:
+            yield {"Key": key}
+
+    async def head_object(self, bucket_name, key):
+        if key not in self.objects:
+            raise ObjectNotFoundError()
+        return {"Metadata": self.objects[key]}
+
+
+def test_content_index_records_the_latest_job_and_its_requester():
+    index = ContentIndex(max_entries=10)
+    index.add("digest", "video.mp4", job_id="job-1", requester="a@example.com")
+    index.add("digest", "video.mp4", job_id="job-2", requester="b@example.com")
+
+    record = index.get("digest")
+
+    assert record.job_id == "job-2"
+    assert record.requester == "b@example.com"
+
+
+def test_content_index_evicts_least_recently_used():
+    index = ContentIndex(max_entries=2)
+    index.add("first", "first.mp4")
+    index.add("second", "second.mp4")
+    index.get("first")
+    index.add("third", "third.mp4")
+
+    assert index.get("second") is None
+    assert index.get("first") is not None
+    assert len(index) == 2
+
+
+def test_content_index_drops_stale_digest_when_key_is_overwritten():
+    index = ContentIndex(max_entries=10)
+    index.add("old", "video.mp4")
+    index.add("new", "video.mp4")
+
+    assert index.get("old") is None
+    index.discard_key("video.mp4")
+    assert index.get("new") is None
+
+
+@pytest.mark.asyncio
+async def test_content_index_rebuilds_from_object_metadata():
+    s3 = FakeS3Manager(
+        {
+            "a.mp4": {"sha256": "digest-a", "job-id": "job-a", "requester": "a@example.com"},
+            "b.mp4": {},
+        }
+    )
+    index = ContentIndex(max_entries=10)
+
+    indexed = await index.rebuild(s3, "bucket", concurrency=2)
+
+    assert indexed == 1
+    assert index.get("digest-a").key == "a.mp4"
+    assert index.get("digest-a").job_id == "job-a"
+    assert index.get("digest-a").requester == "a@example.com"
+
+
+@pytest.mark.asyncio
+async def test_content_index_rebuild_stops_after_max_entries_objects():
+    s3 = FakeS3Manager({f"{number}.mp4": {"sha256": f"digest-{number}"} for number in range(5)})
+    s3.heads = 0
+    head_object = s3.head_object
+
+    async def counting_head_object(bucket_name, key):
+        s3.heads += 1
+        return await head_object(bucket_name, key)
+
+    s3.head_object = counting_head_object
+    index = ContentIndex(max_entries=2)
+
+    assert await index.rebuild(s3, "bucket", concurrency=2) == 2
+    assert s3.heads == 2
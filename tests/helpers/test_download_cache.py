@@ -0,0 +1,89 @@
+import asyncio
+import os
+
+import pytest
+
+from app.helpers.download_cache import DownloadCache
+
+
+class FakeObject:
+    def __init__(self, content: bytes, delay: float = 0):
+        self.content = content
+        self.delay = delay
+        self.opened = 0
+
+    async def open(self) -> dict:
+        self.opened += 1
+
+        async def body():
+            await asyncio.sleep(self.delay)
+            yield self.content[:3]
+            yield self.content[3:]
+
+        return {"Body": body(), "ContentType": "audio/mpeg", "LastModified": None}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DownloadCache(str(tmp_path), max_bytes=10, max_object_size=10)
+    cache.start()
+    yield cache
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_download_cache_serves_filled_entries_from_disk(cache):
+    source = FakeObject(b"123456")
+
+    filled = await cache.fill("bucket", "a.mp3", '"v1"', source.open)
+    cache.release(filled)
+    hit = cache.acquire("bucket", "a.mp3", '"v1"')
+
+    assert open(hit.path, "rb").read() == b"123456"
+    assert cache.acquire("bucket", "a.mp3", '"v2"') is None
+    assert cache.stats()["bytes_saved"] == 6
+    assert source.opened == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fill(cache):
+    source = FakeObject(b"123456", delay=0.01)
+
+    entries = await asyncio.gather(*(cache.fill("bucket", "a.mp3", '"v1"', source.open) for _ in range(3)))
+
+    assert source.opened == 1
+    assert entries[0] is entries[1] is entries[2]
+    assert entries[0].readers == 3
+    assert cache.stats()["coalesced"] == 2
+
+
+@pytest.mark.asyncio
+async def test_download_cache_evicts_least_recently_used_but_keeps_files_being_read(cache):
+    first = await cache.fill("bucket", "a.mp3", '"v1"', FakeObject(b"aaaa").open)
+    second = await cache.fill("bucket", "b.mp3", '"v1"', FakeObject(b"bbbb").open)
+    cache.release(second)
+
+    await cache.fill("bucket", "c.mp3", '"v1"', FakeObject(b"cccc").open)
+
+    assert cache.acquire("bucket", "a.mp3", '"v1"') is None
+    assert cache.acquire("bucket", "b.mp3", '"v1"') is not None
+    assert os.path.exists(first.path)
+    cache.release(first)
+    assert not os.path.exists(first.path)
+    assert cache.size == 8
+
+
+@pytest.mark.asyncio
+async def test_failed_fill_leaves_nothing_behind(cache):
+    async def open_object():
+        async def body():
+            yield b"12"
+            raise ConnectionError("reset")
+
+        return {"Body": body(), "ContentType": "audio/mpeg", "LastModified": None}
+
+    with pytest.raises(ConnectionError):
+        await cache.fill("bucket", "a.mp3", '"v1"', open_object)
+
+    assert os.listdir(cache.path) == []
+    assert cache.acquire("bucket", "a.mp3", '"v1"') is None
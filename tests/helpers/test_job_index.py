@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+import pika
+import pytest
+
+from app.core.enums import JobStates
+from app.helpers.job_index import JobIndex
+from app.schemas.job_schema import JobStatusMessage
+
+
+def status_message(state, job_id=None, **fields) -> bytes:
+    return json.dumps({"job_id": job_id, "state": state, **fields}).encode()
+
+
+def test_job_index_merges_converter_updates_into_tracked_job():
+    jobs = JobIndex(max_entries=10, ttl=60)
+    jobs.track("job-1", file_name="a.mp4")
+
+    jobs.handle_message(pika.BasicProperties(), status_message("processing", "job-1"))
+    jobs.handle_message(pika.BasicProperties(), status_message("completed", "job-1", download_link="a.mp3"))
+
+    status = jobs.get("job-1")
+    assert status.state == JobStates.COMPLETED
+    assert status.file_name == "a.mp4"
+    assert status.download_link == "a.mp3"
+
+
+def test_job_index_falls_back_to_correlation_id_and_ignores_invalid_messages():
+    jobs = JobIndex(max_entries=10, ttl=60)
+
+    jobs.handle_message(pika.BasicProperties(correlation_id="job-1"), status_message("failed", detail="bad codec"))
+    jobs.handle_message(pika.BasicProperties(), b"not json")
+    jobs.handle_message(pika.BasicProperties(), status_message("processing"))
+
+    assert jobs.get("job-1").detail == "bad codec"
+    assert len(jobs) == 1
+
+
+def test_job_index_keeps_final_state_and_does_not_reset_known_jobs():
+    jobs = JobIndex(max_entries=10, ttl=60)
+    jobs.update(JobStatusMessage(job_id="job-1", state=JobStates.COMPLETED))
+
+    jobs.update(JobStatusMessage(job_id="job-1", state=JobStates.PROCESSING))
+    jobs.track("job-1")
+
+    assert jobs.get("job-1").state == JobStates.COMPLETED
+
+
+def test_job_index_is_bounded():
+    jobs = JobIndex(max_entries=2, ttl=60)
+    for job_id in ("job-1", "job-2", "job-3"):
+        jobs.track(job_id)
+
+    assert jobs.get("job-1") is None
+    assert len(jobs) == 2
+
+
+@pytest.mark.asyncio
+async def test_watch_pushes_changes_until_the_job_finishes():
+    jobs = JobIndex(max_entries=10, ttl=60)
+    jobs.track("job-1")
+
+    async def collect():
+        return [status.state if status else None async for status in jobs.watch("job-1", heartbeat=0.05)]
+
+    watcher = asyncio.create_task(collect())
+    await asyncio.sleep(0.08)
+    jobs.update(JobStatusMessage(job_id="job-1", state=JobStates.PROCESSING))
+    jobs.update(JobStatusMessage(job_id="job-1", state=JobStates.COMPLETED))
+
+    states = await asyncio.wait_for(watcher, timeout=1)
+    assert states == [JobStates.QUEUED, None, JobStates.PROCESSING, JobStates.COMPLETED]
+    assert not jobs._watchers
+
+
+@pytest.mark.asyncio
+async def test_close_ends_open_watches():
+    jobs = JobIndex(max_entries=10, ttl=60)
+    jobs.track("job-1")
+
+    async def collect():
+        return [status async for status in jobs.watch("job-1", heartbeat=10)]
+
+    watcher = asyncio.create_task(collect())
+    await asyncio.sleep(0.01)
+    jobs.close()
+
+    assert len(await asyncio.wait_for(watcher, timeout=1)) == 1
+
+
+class FakePublisher:
+    def __init__(self):
+        self.published = []
+        self.handlers = []
+
+    def subscribe(self, exchange, on_message):
+        self.handlers.append(on_message)
+
+    async def publish(self, body, routing_key, exchange="", properties=None):
+        self.published.append((exchange, body))
+        for handler in self.handlers:
+            handler(properties, body)
+
+
+@pytest.mark.asyncio
+async def test_tracked_jobs_are_announced_to_the_other_workers():
+    publisher = FakePublisher()
+    this_worker, other_worker = JobIndex(max_entries=10, ttl=60), JobIndex(max_entries=10, ttl=60)
+    this_worker.start(publisher, "job-status")
+    other_worker.start(publisher, "job-status")
+
+    this_worker.track("job-1", file_name="a.mp4", client_email="a@example.com")
+    await asyncio.sleep(0)
+
+    assert [exchange for exchange, _ in publisher.published] == ["job-status"]
+    assert other_worker.get("job-1").state == JobStates.QUEUED
+    assert other_worker.get("job-1").client_email == "a@example.com"
+    assert other_worker.get("job-1").file_name == "a.mp4"
+
+
+def test_late_queued_announcement_only_fills_in_the_owner():
+    jobs = JobIndex(max_entries=10, ttl=60)
+    jobs.update(JobStatusMessage(job_id="job-1", state=JobStates.PROCESSING))
+
+    jobs.update(JobStatusMessage(job_id="job-1", state=JobStates.QUEUED, client_email="a@example.com"))
+
+    assert jobs.get("job-1").state == JobStates.PROCESSING
+    assert jobs.get("job-1").client_email == "a@example.com"
@@ -0,0 +1,156 @@
+import asyncio
+import tracemalloc
+
+import pytest
+
+from app.core.exceptions import ObjectUploadError
+from app.helpers.object_storage import AsyncS3Manager
+
+PART_SIZE = 5 * 1024 * 1024
+
+
+class FakeS3Client:
+    def __init__(self, fail_on_part: int | None = None):
+        self.fail_on_part = fail_on_part
+        self.put_calls = []
+        self.parts = {}
+        self.completed = None
+        self.aborted = False
+
+    async def put_object(self, **kwargs):
+        self.put_calls.append(kwargs)
+        return {"ETag": '"single"'}
+
+    async def create_multipart_upload(self, **kwargs):
+        return {"UploadId": "upload-id"}
+
+    async def upload_part(self, PartNumber: int, Body: bytes, **kwargs):
+        if PartNumber == self.fail_on_part:
+            raise RuntimeError("part failed")
+        self.parts[PartNumber] = Body
+        return {"ETag": f'"etag-{PartNumber}"'}
+
+    async def complete_multipart_upload(self, MultipartUpload: dict, **kwargs):
+        self.completed = MultipartUpload["Parts"]
+        return {"ETag": '"multipart"'}
+
+    async def abort_multipart_upload(self, **kwargs):
+        self.aborted = True
+
+
+def make_manager(client: FakeS3Client) -> AsyncS3Manager:
+    manager = AsyncS3Manager()
+    manager._client = client
+    return manager
+
+
+async def chunked(total_size: int, chunk_size: int = 1024 * 1024):
+    sent = 0
+    while sent < total_size:
+        size = min(chunk_size, total_size - sent)
+        yield b"x" * size
+        sent += size
+
+
+@pytest.mark.asyncio
+async def test_upload_stream_small_file_uses_put_object():
+    client = FakeS3Client()
+    manager = make_manager(client)
+
+    await manager.upload_stream("bucket", "key", chunked(1024), content_type="video/mp4", part_size=PART_SIZE)
+
+    assert len(client.put_calls) == 1
+    assert client.put_calls[0]["ContentType"] == "video/mp4"
+    assert len(client.put_calls[0]["Body"]) == 1024
+    assert client.completed is None
+
+
+@pytest.mark.asyncio
+async def test_upload_stream_large_file_uses_ordered_multipart_parts():
+    client = FakeS3Client()
+    manager = make_manager(client)
+
+    await manager.upload_stream("bucket", "key", chunked(2 * PART_SIZE + 10), part_size=PART_SIZE, max_concurrency=2)
+
+    assert client.put_calls == []
+    assert [part["PartNumber"] for part in client.completed] == [1, 2, 3]
+    assert [len(client.parts[number]) for number in (1, 2, 3)] == [PART_SIZE, PART_SIZE, 10]
+
+
+@pytest.mark.asyncio
+async def test_upload_stream_aborts_multipart_upload_on_failure():
+    client = FakeS3Client(fail_on_part=2)
+    manager = make_manager(client)
+
+    with pytest.raises(ObjectUploadError):
+        await manager.upload_stream("bucket", "key", chunked(3 * PART_SIZE), part_size=PART_SIZE)
+
+    assert client.aborted is True
+    assert client.completed is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_concurrency", [1, 3])
+async def test_upload_stream_holds_at_most_one_part_beyond_those_in_flight(max_concurrency):
+    class SlowClient(FakeS3Client):
+        async def upload_part(self, PartNumber: int, Body: bytes, **kwargs):
+            await asyncio.sleep(0.001)
+            return {"ETag": f'"etag-{PartNumber}"'}
+
+    part_size = 1024 * 1024
+    manager = make_manager(SlowClient())
+    tracemalloc.start()
+    try:
+        await manager.upload_stream(
+            "bucket", "key", chunked(8 * part_size, 64 * 1024), part_size=part_size, max_concurrency=max_concurrency
+        )
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert peak < part_size * (max_concurrency + 1.5)
+
+
+class FakeListingClient:
+    def __init__(self, keys):
+        self.keys = keys
+        self.calls = []
+
+    async def list_objects_v2(self, Bucket, Prefix, MaxKeys, ContinuationToken=None):
+        self.calls.append(ContinuationToken)
+        matching = [key for key in self.keys if key.startswith(Prefix)]
+        start = int(ContinuationToken or 0)
+        page = matching[start : start + MaxKeys]
+        truncated = start + MaxKeys < len(matching)
+        response = {"IsTruncated": truncated, "Contents": [{"Key": key} for key in page]}
+        if truncated:
+            response["NextContinuationToken"] = str(start + MaxKeys)
+        return response
+
+
+@pytest.mark.asyncio
+async def test_iter_objects_fetches_pages_lazily():
+    client = FakeListingClient(["a/1", "a/2", "a/3", "b/1"])
+    manager = make_manager(client)
+
+    objects = manager.iter_objects("bucket", "a/", page_size=2)
+    first = await anext(objects)
+
+    assert first == {"Key": "a/1"}
+    assert client.calls == [None]
+    assert [obj["Key"] async for obj in objects] == ["a/2", "a/3"]
+    assert client.calls == [None, "2"]
+
+
+@pytest.mark.asyncio
+async def test_list_objects_page_returns_the_next_continuation_token():
+    manager = make_manager(FakeListingClient(["a/1", "a/2", "a/3"]))
+
+    first = await manager.list_objects_page("bucket", "a/", max_keys=2)
+    last = await manager.list_objects_page(
+        "bucket", "a/", max_keys=2, continuation_token=first["NextContinuationToken"]
+    )
+
+    assert [obj["Key"] for obj in first["Contents"]] == ["a/1", "a/2"]
+    assert [obj["Key"] for obj in last["Contents"]] == ["a/3"]
+    assert last["NextContinuationToken"] is None
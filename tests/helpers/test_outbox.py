@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from app.helpers.outbox import Outbox
+from app.helpers.outbox import OutboxRecord
+from app.helpers.rabbit_publisher import PublishError
+
+
+class FakePublisher:
+    is_ready = True
+
+    def __init__(self, fail_times: int = 0):
+        self.fail_times = fail_times
+        self.published = []
+
+    async def publish_batch(self, messages):
+        results = []
+        for message in messages:
+            if self.fail_times:
+                self.fail_times -= 1
+                results.append(PublishError("nack"))
+                continue
+            self.published.append(message)
+            results.append(None)
+        return results
+
+
+async def wait_until(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_outbox_relays_records_once(tmp_path):
+    publisher = FakePublisher()
+    outbox = Outbox(path=str(tmp_path / "outbox.sqlite3"), poll_interval=0.05)
+    await outbox.start(publisher)
+    try:
+        record = OutboxRecord(message_id="job-1", body=b"{}", routing_key="video")
+        await outbox.enqueue(record)
+        await outbox.enqueue(record)
+
+        await wait_until(lambda: len(publisher.published) == 1)
+        assert publisher.published[0].properties.message_id == "job-1"
+        assert await outbox.pending_count() == 0
+    finally:
+        await outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_outbox_retries_unconfirmed_records(tmp_path):
+    publisher = FakePublisher(fail_times=1)
+    outbox = Outbox(path=str(tmp_path / "outbox.sqlite3"), poll_interval=0.05, retry_delay=0.05)
+    await outbox.start(publisher)
+    try:
+        await outbox.enqueue(OutboxRecord(message_id="job-1", body=b"{}", routing_key="video"))
+
+        await wait_until(lambda: len(publisher.published) == 1)
+        assert await outbox.pending_count() == 0
+    finally:
+        await outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_outbox_replays_pending_records_after_restart(tmp_path):
+    path = str(tmp_path / "outbox.sqlite3")
+    offline = FakePublisher()
+    offline.is_ready = False
+    outbox = Outbox(path=path)
+    await outbox.start(offline)
+    await outbox.enqueue(OutboxRecord(message_id="job-1", body=b"{}", routing_key="video"))
+    await outbox.close()
+
+    publisher = FakePublisher()
+    restarted = Outbox(path=path, poll_interval=0.05)
+    await restarted.start(publisher)
+    try:
+        await wait_until(lambda: len(publisher.published) == 1)
+    finally:
+        await restarted.close()
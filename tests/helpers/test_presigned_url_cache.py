@@ -0,0 +1,48 @@
+import pytest
+
+from app.helpers.presigned_url_cache import PresignedUrlCache
+
+
+class FakeS3Manager:
+    def __init__(self):
+        self.signed = 0
+
+    async def generate_presigned_url(self, client_method, params, expires_in):
+        self.signed += 1
+        return f"https://bucket/{params['Key']}?signature={self.signed}"
+
+
+@pytest.mark.asyncio
+async def test_presigned_url_cache_reuses_urls_until_refresh_margin():
+    s3 = FakeS3Manager()
+    cache = PresignedUrlCache(s3, max_entries=10, expires_in=3600, refresh_margin=300)
+
+    first = await cache.get_download_url("bucket", "video.mp4")
+    second = await cache.get_download_url("bucket", "video.mp4")
+
+    assert first == second
+    assert s3.signed == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_presigned_url_cache_is_disabled_when_margin_covers_expiry():
+    s3 = FakeS3Manager()
+    cache = PresignedUrlCache(s3, max_entries=10, expires_in=60, refresh_margin=60)
+
+    await cache.get_download_url("bucket", "video.mp4")
+    await cache.get_download_url("bucket", "video.mp4")
+
+    assert s3.signed == 2
+
+
+@pytest.mark.asyncio
+async def test_presigned_url_cache_invalidate():
+    s3 = FakeS3Manager()
+    cache = PresignedUrlCache(s3, max_entries=10, expires_in=3600, refresh_margin=300)
+
+    await cache.get_download_url("bucket", "video.mp4")
+    cache.invalidate("bucket", "video.mp4")
+    await cache.get_download_url("bucket", "video.mp4")
+
+    assert s3.signed == 2
@@ -0,0 +1,154 @@
+from types import SimpleNamespace
+
+import pika
+import pytest
+
+from app.helpers.rabbit_publisher import _ConfirmChannel
+from app.helpers.rabbit_publisher import PERSISTENT_JSON
+from app.helpers.rabbit_publisher import PublishError
+from app.helpers.rabbit_publisher import RabbitPublisher
+
+
+class FakeChannel:
+    is_open = True
+
+    def __init__(self):
+        self.published = []
+
+    def basic_publish(self, **kwargs):
+        self.published.append(kwargs)
+
+
+def frame(method_class, delivery_tag: int, multiple: bool = False):
+    return SimpleNamespace(method=method_class(delivery_tag=delivery_tag, multiple=multiple))
+
+
+@pytest.mark.asyncio
+async def test_confirm_channel_resolves_acks_and_nacks():
+    channel = _ConfirmChannel(FakeChannel())
+    first = channel.publish("", "video", b"1", PERSISTENT_JSON)
+    second = channel.publish("", "video", b"2", PERSISTENT_JSON)
+
+    channel.on_ack_nack(frame(pika.spec.Basic.Ack, 1))
+    channel.on_ack_nack(frame(pika.spec.Basic.Nack, 2))
+
+    assert await first is None
+    with pytest.raises(PublishError):
+        await second
+    assert channel.pending == {}
+
+
+@pytest.mark.asyncio
+async def test_confirm_channel_handles_multiple_acks():
+    channel = _ConfirmChannel(FakeChannel())
+    confirmations = [channel.publish("", "video", b"x", PERSISTENT_JSON) for _ in range(3)]
+
+    channel.on_ack_nack(frame(pika.spec.Basic.Ack, 2, multiple=True))
+
+    assert [confirmation.done() for confirmation in confirmations] == [True, True, False]
+    assert list(channel.pending) == [3]
+
+
+@pytest.mark.asyncio
+async def test_confirm_channel_fails_pending_on_close():
+    channel = _ConfirmChannel(FakeChannel())
+    confirmation = channel.publish("", "video", b"x", PERSISTENT_JSON)
+
+    channel.fail_pending(PublishError("closed"))
+
+    with pytest.raises(PublishError):
+        await confirmation
+
+
+class FakeSubscriptionChannel:
+    def __init__(self):
+        self.calls = []
+        self.consumer = None
+
+    def exchange_declare(self, exchange, exchange_type, durable, callback):
+        self.calls.append(("exchange_declare", exchange, exchange_type))
+        callback(None)
+
+    def queue_declare(self, queue, exclusive, auto_delete, callback):
+        self.calls.append(("queue_declare", exclusive, auto_delete))
+        callback(SimpleNamespace(method=SimpleNamespace(queue="amq.gen-1")))
+
+    def queue_bind(self, queue, exchange, callback):
+        self.calls.append(("queue_bind", queue, exchange))
+        callback(None)
+
+    def basic_consume(self, queue, on_message_callback, auto_ack):
+        self.consumer = on_message_callback
+
+    def add_on_close_callback(self, callback):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, channel):
+        self._channel = channel
+
+    def channel(self, on_open_callback):
+        on_open_callback(self._channel)
+
+
+@pytest.mark.asyncio
+async def test_subscription_binds_an_exclusive_queue_to_the_fanout_exchange():
+    channel = FakeSubscriptionChannel()
+    received = []
+    publisher = RabbitPublisher(host="localhost", port=5672, username="guest", password="guest")
+
+    await publisher._open_subscription(FakeConnection(channel), "job-status", lambda p, body: received.append(body))
+    channel.consumer(channel, None, pika.BasicProperties(), b"{}")
+
+    assert channel.calls == [
+        ("exchange_declare", "job-status", "fanout"),
+        ("queue_declare", True, True),
+        ("queue_bind", "amq.gen-1", "job-status"),
+    ]
+    assert received == [b"{}"]
+
+
+class FakeDeclareChannel:
+    def __init__(self, queues):
+        self.queues = queues
+        self.is_open = True
+        self.on_close = None
+
+    def add_on_close_callback(self, callback):
+        self.on_close = callback
+
+    def queue_declare(self, queue, passive, callback):
+        if queue not in self.queues:
+            self.is_open = False
+            self.on_close(self, pika.exceptions.ChannelClosedByBroker(404, "NOT_FOUND"))
+            return
+        callback(SimpleNamespace(method=SimpleNamespace(message_count=self.queues[queue])))
+
+
+class FakeDeclareConnection:
+    def __init__(self, queues):
+        self.queues = queues
+        self.opened = 0
+
+    def channel(self, on_open_callback):
+        self.opened += 1
+        on_open_callback(FakeDeclareChannel(self.queues))
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_uses_its_own_channel_and_fails_fast_on_a_missing_queue():
+    publisher = RabbitPublisher(host="localhost", port=5672, username="guest", password="guest", confirm_timeout=5)
+    pool_channel = _ConfirmChannel(FakeChannel())
+    confirmation = pool_channel.publish("", "video", b"x", PERSISTENT_JSON)
+    publisher._channels = [pool_channel]
+    publisher._connection = FakeDeclareConnection({"video": 3})
+    publisher._ready.set()
+
+    assert await publisher.queue_depth("video") == 3
+    with pytest.raises(PublishError):
+        await publisher.queue_depth("missing")
+    assert await publisher.queue_depth("video") == 3
+
+    assert publisher._connection.opened == 2
+    assert not confirmation.done()
@@ -0,0 +1,86 @@
+import pytest
+
+from app.helpers.upload_sessions import UploadedPart
+from app.helpers.upload_sessions import UploadSession
+from app.helpers.upload_sessions import UploadSessionStore
+
+
+class FakeS3Manager:
+    def __init__(self):
+        self.aborted = []
+
+    async def abort_multipart_upload(self, bucket_name, key, upload_id):
+        self.aborted.append(upload_id)
+        return {}
+
+
+async def create_session(store, size=25, chunk_size=10):
+    return await store.create(
+        session_id="session-1",
+        bucket="bucket",
+        key="video.mp4",
+        upload_id="upload-1",
+        content_type="video/mp4",
+        client_email="user@example.com",
+        size=size,
+        chunk_size=chunk_size,
+    )
+
+
+def test_upload_session_part_sizes():
+    session = UploadSession("id", "bucket", "key", "upload", None, "user@example.com", 25, 10, 0)
+
+    assert session.part_count == 3
+    assert [session.part_size(number) for number in (1, 2, 3)] == [10, 10, 5]
+
+
+@pytest.mark.asyncio
+async def test_upload_session_store_tracks_parts(tmp_path):
+    store = UploadSessionStore(path=str(tmp_path / "sessions.sqlite3"), ttl=60, janitor_interval=60)
+    await store.start(FakeS3Manager())
+    try:
+        await create_session(store)
+        await store.record_part("session-1", UploadedPart(2, 10, '"b"'))
+        await store.record_part("session-1", UploadedPart(1, 10, '"a"'))
+        await store.record_part("session-1", UploadedPart(1, 10, '"a2"'))
+
+        assert (await store.get("session-1")).upload_id == "upload-1"
+        assert await store.parts("session-1") == [UploadedPart(1, 10, '"a2"'), UploadedPart(2, 10, '"b"')]
+
+        await store.delete("session-1")
+        assert await store.get("session-1") is None
+        assert await store.parts("session-1") == []
+    finally:
+        await store.close()
+
+
+@pytest.mark.asyncio
+async def test_upload_session_store_aborts_expired_sessions(tmp_path):
+    s3 = FakeS3Manager()
+    store = UploadSessionStore(path=str(tmp_path / "sessions.sqlite3"), ttl=-1, janitor_interval=60)
+    await store.start(s3)
+    try:
+        await create_session(store)
+
+        assert await store.get("session-1") is None
+        assert await store.expire() == 1
+        assert s3.aborted == ["upload-1"]
+        assert await store.expire() == 0
+    finally:
+        await store.close()
+
+
+@pytest.mark.asyncio
+async def test_upload_session_store_aborts_expired_presigned_uploads(tmp_path):
+    s3 = FakeS3Manager()
+    store = UploadSessionStore(path=str(tmp_path / "sessions.sqlite3"), ttl=-1, janitor_interval=60)
+    await store.start(s3)
+    try:
+        await store.create_presigned("token-1", "bucket", "video.mp4", "upload-1", "user@example.com")
+        await store.create_presigned("token-2", "bucket", "small.mp4", None, "user@example.com")
+
+        assert await store.get_presigned("token-1") is None
+        assert await store.expire() == 2
+        assert s3.aborted == ["upload-1"]
+    finally:
+        await store.close()
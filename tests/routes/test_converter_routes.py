@@ -0,0 +1,85 @@
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.dependencies import get_current_user
+from app.core.dependencies import get_save_service
+from app.core.enums import UserRoles
+from app.helpers.job_index import get_job_index
+from app.helpers.job_index import JobIndex
+from app.routes.v1 import job_routes
+from app.routes.v1.converter_routes import router
+from app.schemas.user_schema import User
+from app.services.converter_service import ConverterService
+from tests.services.test_converter_service import FakePublisher
+from tests.services.test_converter_service import FakeS3Manager
+from tests.services.test_converter_service import MP4_BYTES
+
+
+def make_user(email):
+    now = datetime.now()
+    return User(
+        id=uuid4(), created_at=now, updated_at=now, email=email, username="u", is_active=True, role=UserRoles.BASE_USER
+    )
+
+
+def make_client(user, service, jobs=None):
+    app = FastAPI()
+    app.include_router(router)
+    app.include_router(job_routes.router)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_save_service] = lambda: service
+    app.dependency_overrides[get_job_index] = lambda: jobs
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path, field", [("/converter/upload/{}", "file"), ("/converter/upload/{}/batch", "files")])
+def test_upload_into_another_users_prefix_is_rejected(path, field):
+    s3 = FakeS3Manager()
+    client = make_client(make_user("attacker@example.com"), ConverterService(s3, "bucket", publisher=FakePublisher()))
+    files = {field: ("x.mp4", MP4_BYTES, "video/mp4")}
+
+    response = client.post(path.format("victim@example.com"), files=files)
+
+    assert response.status_code == 403
+    assert s3.objects == {}
+    assert client.post(path.format("Attacker@example.com"), files=files).status_code < 300
+    assert list(s3.objects) == ["attacker@example.com/x.mp4"]
+
+
+class UntouchedService:
+    def __getattr__(self, name):
+        raise AssertionError(f"{name} must not be called for another user's upload")
+
+
+@pytest.mark.parametrize(
+    "method, path, body",
+    [
+        ("post", "/converter/presigned-upload/victim@example.com", {"file_name": "x.mp4", "content_type": "video/mp4"}),
+        ("post", "/converter/presigned-upload/victim@example.com/complete", {"upload_token": "t", "key": "k"}),
+        ("get", "/converter/uploads/victim@example.com/s1", None),
+        ("put", "/converter/uploads/victim@example.com/s1/parts/1", None),
+        ("post", "/converter/uploads/victim@example.com/s1/complete", None),
+        ("delete", "/converter/uploads/victim@example.com/s1", None),
+    ],
+)
+def test_another_users_uploads_cannot_be_touched(method, path, body):
+    client = make_client(make_user("attacker@example.com"), UntouchedService())
+
+    assert client.request(method, path, json=body).status_code == 403
+
+
+def test_jobs_are_owned_by_the_authenticated_uploader():
+    jobs = JobIndex(max_entries=10, ttl=60)
+    service = ConverterService(FakeS3Manager(), "bucket", publisher=FakePublisher(), job_index=jobs)
+    uploader = make_client(make_user("owner@example.com"), service, jobs)
+    other = make_client(make_user("other@example.com"), service, jobs)
+
+    files = {"file": ("x.mp4", MP4_BYTES, "video/mp4")}
+    job_id = uploader.post("/converter/upload/Owner@example.com", files=files).json()["job_id"]
+
+    assert uploader.get(f"/jobs/{job_id}").json()["client_email"] == "owner@example.com"
+    assert other.get(f"/jobs/{job_id}").status_code == 404
@@ -1,7 +1,9 @@
 import pytest
 from pydantic import ValidationError
 
+from app.schemas.file_schema import CompleteUploadRequest
 from app.schemas.file_schema import FileMetadata
+from app.schemas.file_schema import PresignedUploadRequest
 from app.schemas.file_schema import QueueMessage
 
 
@@ -39,3 +41,49 @@ def test_queue_message_invalid_email():
     }
     with pytest.raises(ValidationError):
         QueueMessage(**data)
+
+
+def test_presigned_upload_request_valid():
+    data = {"file_name": "test_video.mp4", "content_type": "video/mp4", "size": 1024}
+    request = PresignedUploadRequest(**data)
+    assert request.size == 1024
+
+
+def test_presigned_upload_request_invalid_content_type():
+    data = {"file_name": "test_video.mp4", "content_type": "image/jpeg", "size": 1024}
+    with pytest.raises(ValidationError):
+        PresignedUploadRequest(**data)
+
+
+def test_presigned_upload_request_negative_size():
+    data = {"file_name": "test_video.mp4", "content_type": "video/mp4", "size": -1}
+    with pytest.raises(ValidationError):
+        PresignedUploadRequest(**data)
+
+
+def test_complete_upload_request_valid():
+    data = {
+        "upload_token": "token",
+        "key": "test_video.mp4",
+        "upload_id": "abc",
+        "parts": [{"part_number": 1, "etag": '"etag"'}],
+    }
+    request = CompleteUploadRequest(**data)
+    assert request.parts[0].part_number == 1
+
+
+def test_complete_upload_request_requires_upload_token():
+    data = {"key": "test_video.mp4", "upload_id": "abc", "parts": [{"part_number": 1, "etag": '"etag"'}]}
+    with pytest.raises(ValidationError):
+        CompleteUploadRequest(**data)
+
+
+def test_complete_upload_request_invalid_part_number():
+    data = {
+        "upload_token": "token",
+        "key": "test_video.mp4",
+        "upload_id": "abc",
+        "parts": [{"part_number": 0, "etag": '"etag"'}],
+    }
+    with pytest.raises(ValidationError):
+        CompleteUploadRequest(**data)
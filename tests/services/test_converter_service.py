@@ -0,0 +1,510 @@
+import asyncio
+import json
+from datetime import datetime
+from datetime import timezone
+from io import BytesIO
+
+import pytest
+import pytest_asyncio
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from app.core.enums import JobStates
+from app.core.exceptions import NotFoundError
+from app.core.exceptions import ObjectNotFoundError
+from app.core.exceptions import PayloadTooLargeError
+from app.core.exceptions import RangeNotSatisfiableError
+from app.core.exceptions import ValidationError
+from app.core.settings import settings
+from app.helpers.content_index import ContentIndex
+from app.helpers.download_cache import CachedFileResponse
+from app.helpers.download_cache import CachedRangeResponse
+from app.helpers.download_cache import DownloadCache
+from app.helpers.job_index import JobIndex
+from app.helpers.upload_sessions import UploadSessionStore
+from app.schemas.file_schema import CompleteUploadRequest
+from app.schemas.file_schema import PresignedUploadRequest
+from app.schemas.file_schema import UploadSessionRequest
+from app.schemas.job_schema import JobStatusMessage
+from app.services.converter_service import ConverterService
+from app.services.converter_service import parse_byte_range
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-99", "bytes=0-99"),
+        ("bytes=100-", "bytes=100-"),
+        ("bytes=-500", "bytes=-500"),
+        ("bytes = 10 - 20", "bytes=10-20"),
+        (None, None),
+        ("bytes=-", None),
+        ("bytes=20-10", None),
+        ("bytes=0-10,20-30", None),
+        ("items=0-10", None),
+    ],
+)
+def test_parse_byte_range(header, expected):
+    assert parse_byte_range(header) == expected
+
+
+def test_if_range_with_strong_etag_maps_to_if_match():
+    assert ConverterService._if_range_conditions('"abc"') == {"if_match": '"abc"'}
+
+
+def test_if_range_with_http_date_maps_to_if_unmodified_since():
+    conditions = ConverterService._if_range_conditions("Wed, 21 Oct 2015 07:28:00 GMT")
+    assert conditions == {"if_unmodified_since": datetime(2015, 10, 21, 7, 28, tzinfo=timezone.utc)}
+
+
+@pytest.mark.parametrize("if_range", ['W/"abc"', "not a date"])
+def test_if_range_that_cannot_match_disables_the_range(if_range):
+    assert ConverterService._if_range_conditions(if_range) is None
+
+
+class FakeS3Manager:
+    def __init__(self):
+        self.objects = {}
+        self.uploads = 0
+
+    async def upload_stream(self, bucket_name, key, stream, content_type=None, metadata=None):
+        self.uploads += 1
+        self.objects[key] = (b"".join([chunk async for chunk in stream]), metadata or {})
+
+    async def head_object(self, bucket_name, key):
+        if key not in self.objects:
+            raise ObjectNotFoundError()
+        return {"Metadata": self.objects[key][1]}
+
+    async def delete_object(self, bucket_name, key):
+        self.objects.pop(key, None)
+
+
+class FakePublisher:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, body, routing_key, exchange="", properties=None):
+        self.published.append(properties.message_id)
+
+    async def publish_batch(self, messages):
+        self.batches = getattr(self, "batches", 0) + 1
+        results = []
+        for message in messages:
+            if b"reject-me" in message.body:
+                results.append(RuntimeError("nacked"))
+            else:
+                self.published.append(message.properties.message_id)
+                results.append(None)
+        return results
+
+
+MP4_BYTES = b"\x00\x00\x00\x18ftypisom\x00\x00\x02\x00isomiso2" + b"same bytes"
+
+
+def make_upload(name, content):
+    return UploadFile(BytesIO(content), filename=name, headers=Headers({"content-type": "video/mp4"}))
+
+
+def dedup_service(s3, publisher):
+    return ConverterService(
+        s3,
+        "bucket",
+        publisher=publisher,
+        content_index=ContentIndex(max_entries=10),
+        job_index=JobIndex(max_entries=10, ttl=60),
+    )
+
+
+@pytest.mark.asyncio
+async def test_upload_of_known_content_reuses_the_requesters_existing_job():
+    s3, publisher = FakeS3Manager(), FakePublisher()
+    service = dedup_service(s3, publisher)
+
+    first_job = await service.upload_video_file(make_upload("a.mp4", MP4_BYTES), "a@example.com")
+    second_job = await service.upload_video_file(make_upload("b.mp4", MP4_BYTES), "a@example.com")
+
+    assert second_job == first_job
+    assert s3.uploads == 1
+    assert publisher.published == [first_job]
+
+
+@pytest.mark.asyncio
+async def test_known_content_from_another_user_gets_its_own_job():
+    s3, publisher = FakeS3Manager(), FakePublisher()
+    service = dedup_service(s3, publisher)
+
+    first_job = await service.upload_video_file(make_upload("a.mp4", MP4_BYTES), "a@example.com")
+    second_job = await service.upload_video_file(make_upload("b.mp4", MP4_BYTES), "b@example.com")
+
+    assert second_job != first_job
+    assert publisher.published == [first_job, second_job]
+
+
+@pytest.mark.asyncio
+async def test_known_content_whose_job_failed_is_converted_again():
+    s3, publisher = FakeS3Manager(), FakePublisher()
+    service = dedup_service(s3, publisher)
+
+    failed_job = await service.upload_video_file(make_upload("a.mp4", MP4_BYTES), "a@example.com")
+    service.job_index.update(JobStatusMessage(job_id=failed_job, state=JobStates.FAILED))
+    retried_job = await service.upload_video_file(make_upload("a.mp4", MP4_BYTES), "a@example.com")
+
+    assert retried_job != failed_job
+    assert publisher.published == [failed_job, retried_job]
+
+
+@pytest.mark.asyncio
+async def test_upload_stores_again_when_indexed_object_is_gone():
+    s3, publisher = FakeS3Manager(), FakePublisher()
+    service = dedup_service(s3, publisher)
+
+    first_job = await service.upload_video_file(make_upload("a.mp4", MP4_BYTES), "a@example.com")
+    await s3.delete_object("bucket", "a@example.com/a.mp4")
+    second_job = await service.upload_video_file(make_upload("b.mp4", MP4_BYTES), "a@example.com")
+
+    assert second_job != first_job
+    assert s3.uploads == 2
+    assert s3.objects["a@example.com/b.mp4"][0] == MP4_BYTES
+
+
+@pytest.mark.asyncio
+async def test_upload_with_mismatched_container_is_rejected_before_storing():
+    s3, publisher = FakeS3Manager(), FakePublisher()
+    service = ConverterService(s3, "bucket", publisher=publisher)
+
+    with pytest.raises(ValidationError):
+        await service.upload_video_file(make_upload("a.mp4", b"OggS\x00\x02" + b"\x01vorbis"), "a@example.com")
+
+    assert s3.uploads == 0
+    assert publisher.published == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name, content_type", [("a.mp4", "application/octet-stream"), ("", "video/mp4")])
+async def test_invalid_upload_metadata_is_a_validation_error(name, content_type):
+    s3, publisher = FakeS3Manager(), FakePublisher()
+    service = ConverterService(s3, "bucket", publisher=publisher)
+    file = UploadFile(BytesIO(MP4_BYTES), filename=name, headers=Headers({"content-type": content_type}))
+
+    with pytest.raises(ValidationError):
+        await service.upload_video_file(file, "a@example.com")
+
+    assert s3.uploads == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_reports_each_file_and_publishes_once():
+    s3, publisher = FakeS3Manager(), FakePublisher()
+    service = ConverterService(s3, "bucket", publisher=publisher)
+    files = [
+        make_upload("a.mp4", MP4_BYTES),
+        make_upload("b.mp4", b"OggS\x00\x02" + b"\x01vorbis"),
+        make_upload("c.mp4", MP4_BYTES + b"other"),
+        make_upload("a.mp4", MP4_BYTES),
+    ]
+
+    results = await service.upload_video_files(files, "a@example.com")
+
+    assert [result.status for result in results] == ["queued", "failed", "queued", "failed"]
+    assert publisher.batches == 1
+    assert publisher.published == [results[0].job_id, results[2].job_id]
+    assert set(s3.objects) == {"a@example.com/a.mp4", "a@example.com/c.mp4"}
+    assert results[3].detail == "Another file in this batch has the same name"
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_removes_files_whose_message_was_not_confirmed():
+    s3, publisher = FakeS3Manager(), FakePublisher()
+    service = ConverterService(s3, "bucket", publisher=publisher)
+    files = [make_upload("a.mp4", MP4_BYTES), make_upload("reject-me.mp4", MP4_BYTES)]
+
+    results = await service.upload_video_files(files, "a@example.com")
+
+    assert [result.status for result in results] == ["queued", "failed"]
+    assert set(s3.objects) == {"a@example.com/a.mp4"}
+
+
+@pytest.mark.asyncio
+async def test_uploaded_files_are_tracked_as_queued_jobs():
+    s3, publisher, jobs = FakeS3Manager(), FakePublisher(), JobIndex(max_entries=10, ttl=60)
+    service = ConverterService(s3, "bucket", publisher=publisher, job_index=jobs)
+
+    job_id = await service.upload_video_file(make_upload("a.mp4", MP4_BYTES), "a@example.com")
+    results = await service.upload_video_files([make_upload("b.mp4", MP4_BYTES)], "a@example.com")
+
+    assert jobs.get(job_id).state == JobStates.QUEUED
+    assert jobs.get(job_id).file_name == "a@example.com/a.mp4"
+    assert jobs.get(job_id).client_email == "a@example.com"
+    assert jobs.get(results[0].job_id).file_name == "a@example.com/b.mp4"
+
+
+class StreamingS3(FakeS3Manager):
+    gets = 0
+    heads = 0
+
+    async def head_object(self, bucket_name, key):
+        self.heads += 1
+        return {"ETag": '"v1"', "ContentLength": len(self.objects[key][0]), "LastModified": LAST_MODIFIED}
+
+    async def stream_object(self, bucket_name, key, byte_range=None, **conditions):
+        self.gets += 1
+        content = self.objects[key][0]
+
+        async def body():
+            yield content
+
+        return {
+            "Body": body(),
+            "ContentType": "audio/mpeg",
+            "ContentLength": len(content),
+            "ContentRange": None,
+            "ETag": '"v1"',
+            "LastModified": LAST_MODIFIED,
+        }
+
+
+LAST_MODIFIED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def download_cache(tmp_path):
+    cache = DownloadCache(str(tmp_path), max_bytes=1024, max_object_size=1024, revalidate_after=60)
+    cache.start()
+    yield cache
+    cache.close()
+
+
+async def read_body(cache, response):
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    cache.release(response.entry)
+    return body
+
+
+@pytest.mark.asyncio
+async def test_download_is_served_from_the_disk_cache_once_filled(download_cache):
+    s3 = StreamingS3()
+    s3.objects["a@example.com/a.mp3"] = (b"audio", {})
+    service = ConverterService(s3, "bucket", download_cache=download_cache)
+
+    first = await service.download_video_file("a@example.com/a.mp3", "a@example.com")
+    download_cache.release(first.entry)
+    second = await service.download_video_file("a@example.com/a.mp3", "a@example.com")
+
+    assert isinstance(second, CachedFileResponse)
+    assert second.headers["etag"] == '"v1"'
+    assert (s3.heads, s3.gets) == (1, 1)
+    assert download_cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_range_downloads_are_served_from_the_disk_cache(download_cache):
+    s3 = StreamingS3()
+    s3.objects["a@example.com/a.mp3"] = (b"audio", {})
+    service = ConverterService(s3, "bucket", download_cache=download_cache)
+
+    # A range that misses is answered from S3 while the cache fills in the background.
+    first = await service.download_video_file("a@example.com/a.mp3", "a@example.com", range_header="bytes=0-")
+    assert not isinstance(first, CachedRangeResponse)
+    await asyncio.gather(*download_cache._fills.values())
+
+    middle = await service.download_video_file("a@example.com/a.mp3", "a@example.com", range_header="bytes=1-3")
+    suffix = await service.download_video_file("a@example.com/a.mp3", "a@example.com", range_header="bytes=-2")
+    stale = await service.download_video_file(
+        "a@example.com/a.mp3", "a@example.com", range_header="bytes=1-3", if_range='"v0"'
+    )
+
+    assert middle.status_code == 206
+    assert middle.headers["content-range"] == "bytes 1-3/5"
+    assert await read_body(download_cache, middle) == b"udi"
+    assert await read_body(download_cache, suffix) == b"io"
+    assert isinstance(stale, CachedFileResponse)
+    download_cache.release(stale.entry)
+    assert (s3.heads, s3.gets) == (1, 2)
+    with pytest.raises(RangeNotSatisfiableError):
+        await service.download_video_file("a@example.com/a.mp3", "a@example.com", range_header="bytes=9-")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cached", [False, True])
+async def test_download_of_another_users_file_is_not_found(tmp_path, cached):
+    s3 = FakeS3Manager()
+    s3.objects["victim@example.com/x.mp4"] = (b"victim-bytes", {})
+    cache = DownloadCache(str(tmp_path), max_bytes=1024, max_object_size=1024) if cached else None
+    service = ConverterService(s3, "bucket", download_cache=cache)
+
+    with pytest.raises(NotFoundError):
+        await service.download_video_file("victim@example.com/x.mp4", "attacker@example.com", range_header="bytes=0-")
+    with pytest.raises(NotFoundError):
+        await service.download_video_file("victim@example.com/x.mp4", "attacker@example.com")
+    with pytest.raises(NotFoundError):
+        await service.redirect_to_video_file("victim@example.com/x.mp4", "attacker@example.com")
+
+
+class PresignedS3(FakeS3Manager):
+    async def generate_presigned_url(self, operation, params, expires_in=None):
+        return f"https://s3.example.com/{params['Key']}?op={operation}"
+
+    async def head_object(self, bucket_name, key):
+        return {"ContentType": "video/mp4", "Metadata": {}}
+
+    async def stream_object(self, bucket_name, key, byte_range=None, **conditions):
+        async def body():
+            yield MP4_BYTES
+
+        return {"Body": body()}
+
+
+@pytest_asyncio.fixture
+async def upload_sessions(tmp_path):
+    store = UploadSessionStore(path=str(tmp_path / "sessions.sqlite3"), ttl=60, janitor_interval=60)
+    await store.start(FakeS3Manager())
+    yield store
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_presigned_upload_can_only_be_completed_by_its_owner_once(upload_sessions):
+    publisher = FakePublisher()
+    service = ConverterService(PresignedS3(), "bucket", publisher=publisher, upload_sessions=upload_sessions)
+    issued = await service.create_presigned_upload(
+        PresignedUploadRequest(file_name="a.mp4", content_type="video/mp4", size=10), "a@example.com"
+    )
+    completion = CompleteUploadRequest(upload_token=issued.upload_token, key=issued.key)
+
+    with pytest.raises(NotFoundError):
+        await service.complete_presigned_upload(completion, "b@example.com")
+    with pytest.raises(NotFoundError):
+        await service.complete_presigned_upload(
+            CompleteUploadRequest(upload_token=issued.upload_token, key="someone-else.mp4"), "a@example.com"
+        )
+    job_id = await service.complete_presigned_upload(completion, "a@example.com")
+    with pytest.raises(NotFoundError):
+        await service.complete_presigned_upload(completion, "a@example.com")
+
+    assert publisher.published == [job_id]
+
+
+class MultipartS3(FakeS3Manager):
+    def __init__(self):
+        super().__init__()
+        self.parts = {}
+
+    async def create_multipart_upload(self, bucket_name, key, content_type=None, metadata=None):
+        return "upload-1"
+
+    async def upload_part(self, bucket_name, key, upload_id, part_number, body):
+        self.parts[part_number] = body
+        return f'"etag-{part_number}"'
+
+
+CHUNK_SIZE = 5 * 1024 * 1024
+
+
+async def send(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def create_session(service, content_type="video/mp4", size=CHUNK_SIZE + 10, chunk_size=CHUNK_SIZE):
+    request = UploadSessionRequest(file_name="a.mp4", content_type=content_type, size=size, chunk_size=chunk_size)
+    return await service.create_upload_session(request, "a@example.com")
+
+
+@pytest.mark.asyncio
+async def test_upload_session_chunk_size_is_capped(upload_sessions, monkeypatch):
+    monkeypatch.setattr(settings, "upload_session_max_chunk_size", CHUNK_SIZE)
+    service = ConverterService(MultipartS3(), "bucket", upload_sessions=upload_sessions)
+
+    with pytest.raises(ValidationError):
+        await create_session(service, chunk_size=CHUNK_SIZE + 1)
+    with pytest.raises(PayloadTooLargeError):
+        await create_session(service, size=CHUNK_SIZE * 10_000 + 1, chunk_size=None)
+
+
+@pytest.mark.asyncio
+async def test_upload_session_part_must_have_its_exact_size(upload_sessions):
+    s3 = MultipartS3()
+    service = ConverterService(s3, "bucket", upload_sessions=upload_sessions)
+    session = await create_session(service)
+    full_part = MP4_BYTES + bytes(CHUNK_SIZE - len(MP4_BYTES))
+
+    with pytest.raises(PayloadTooLargeError):
+        await service.upload_session_part(session.session_id, "a@example.com", 1, send(full_part, b"extra"))
+    with pytest.raises(ValidationError):
+        await service.upload_session_part(session.session_id, "a@example.com", 1, send(full_part[:-1]))
+
+    assert s3.parts == {}
+
+
+@pytest.mark.asyncio
+async def test_upload_session_sniffs_the_container_from_the_first_part(upload_sessions):
+    s3 = MultipartS3()
+    service = ConverterService(s3, "bucket", upload_sessions=upload_sessions)
+    mismatched = await create_session(service, content_type="video/ogg")
+    session = await create_session(service, content_type="video/x-matroska")
+    webm = b"\x1a\x45\xdf\xa3\x9f\x42\x82\x84webm"
+    first_part = webm + bytes(CHUNK_SIZE - len(webm))
+
+    with pytest.raises(ValidationError):
+        await service.upload_session_part(mismatched.session_id, "a@example.com", 1, send(first_part))
+    part = await service.upload_session_part(
+        session.session_id, "a@example.com", 1, send(first_part[:100], first_part[100:])
+    )
+
+    assert part.size == CHUNK_SIZE
+    assert s3.parts[1] == first_part
+    assert (await upload_sessions.get(session.session_id)).content_type == "video/webm"
+
+
+class ListingS3(FakeS3Manager):
+    async def list_objects_page(self, bucket_name, prefix, max_keys, continuation_token=None):
+        return {
+            "Contents": [self._object(key) for key in sorted(self.objects) if key.startswith(prefix)][:max_keys],
+            "NextContinuationToken": "next",
+        }
+
+    async def iter_objects(self, bucket_name, prefix="", page_size=1000, continuation_token=None):
+        for key in sorted(self.objects):
+            if key.startswith(prefix):
+                yield self._object(key)
+
+    def _object(self, key):
+        return {
+            "Key": key,
+            "Size": len(self.objects[key][0]),
+            "LastModified": datetime(2024, 1, 1, tzinfo=timezone.utc),
+            "ETag": '"e"',
+        }
+
+
+@pytest.mark.asyncio
+async def test_uploaded_files_are_listed_for_their_user():
+    s3 = ListingS3()
+    service = ConverterService(s3, "bucket", publisher=FakePublisher())
+    await service.upload_video_file(make_upload("1.mp4", MP4_BYTES), "a@example.com")
+    await service.upload_video_files([make_upload("2.mp4", MP4_BYTES)], "a@example.com")
+    await service.upload_video_file(make_upload("1.mp4", MP4_BYTES), "b@example.com")
+
+    page = await service.list_files("a@example.com", limit=1)
+    response = await service.stream_files("a@example.com")
+    lines = [json.loads(line) async for line in response.body_iterator]
+
+    assert [file.key for file in page.files] == ["a@example.com/1.mp4"]
+    assert page.next_cursor == "next"
+    assert [line["key"] for line in lines] == ["a@example.com/1.mp4", "a@example.com/2.mp4"]
+
+
+@pytest.mark.asyncio
+async def test_known_content_is_reused_after_a_restart():
+    s3, publisher = ListingS3(), FakePublisher()
+    first_job = await dedup_service(s3, publisher).upload_video_file(make_upload("a.mp4", MP4_BYTES), "a@example.com")
+
+    restarted = dedup_service(s3, publisher)
+    assert await restarted.content_index.rebuild(s3, "bucket") == 1
+    second_job = await restarted.upload_video_file(make_upload("b.mp4", MP4_BYTES), "a@example.com")
+    other_job = await restarted.upload_video_file(make_upload("a.mp4", MP4_BYTES), "b@example.com")
+
+    assert second_job == first_job
+    assert other_job != first_job
+    assert s3.uploads == 2